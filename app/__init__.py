@@ -1,9 +1,17 @@
 
 import os
+import io
+import csv
 import json
-import difflib
+import base64
+import hashlib
+import threading
+import time
+import multiprocessing
+from collections import deque
 from datetime import datetime, date
-from flask import Flask, jsonify, request
+import click
+from flask import Flask, Response, g, jsonify, request, session, stream_with_context
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
 from flask_session import Session
@@ -12,6 +20,23 @@ from dotenv import load_dotenv
 import joblib
 import numpy as np
 import pandas as pd
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: Parquet export only
+    pa = pq = None
+
+from .cache import TTLCache
+from .compiled import compile_ensemble
+from .explain import Explainer
+from .fuzzy import FuzzyIndex
+from .psgc import LEVELS as PSGC_LEVELS, psgc_token_index
+from .snapshot import load_snapshot, save_snapshot, snapshot_key
+from .writebehind import RecordWriter
+from .livefeed import LiveFeed
+from .batcher import MicroBatcher
+from .metrics import METRICS, install_query_timer, server_timing_header, server_timing_requested, stage
+from .sqlite_profile import install_sqlite_profile, sqlite_engine_options, sqlite_status
 
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
@@ -19,6 +44,7 @@ from werkzeug.security import generate_password_hash, check_password_hash
 
 from datetime import datetime, timedelta
 from sqlalchemy import func, desc
+from sqlalchemy.exc import IntegrityError
 
 
 
@@ -60,8 +86,43 @@ class Record(db.Model):
     same_city = db.Column(db.Integer)
     prob_enroll_pct = db.Column(db.Float)
     confidence = db.Column(db.Float)
+    priority = db.Column(db.Float)  # prob_enroll_pct * confidence, stored so the lead table can sort on an index
+    model_version = db.Column(db.String(64))
+    oov_mask = db.Column(db.Integer)  # bit i set = OOV_FIELDS[i] was outside the model's vocabulary; NULL = not checked
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-
+    __table_args__ = (
+        db.Index("ix_records_created_at", "created_at"),
+        db.Index("ix_records_program_created", "first_program", "created_at"),
+        db.Index("ix_records_region_created", "curr_region", "created_at"),
+        db.Index("ix_records_priority_id", "priority", "id"),
+        db.Index("ix_records_prob_id", "prob_enroll_pct", "id"),
+        db.Index("ix_records_conf_id", "confidence", "id"),
+    )
+
+# rollup key columns besides the day, and its count columns: 20-bin prob/conf histograms and the 10x10 heat grid
+ROLLUP_KEYS = ("first_program", "curr_region", "student_type", "local_or_foreign")
+PROB_HIST = [f"p{k}" for k in range(20)]
+CONF_HIST = [f"c{k}" for k in range(20)]
+HEAT_CELLS = [f"h{i}_{j}" for i in range(10) for j in range(10)]
+
+class RecordDailyRollup(db.Model):
+    # counts and sums per day x dimension (unknown dimensions stored as ''); score distributions live in count columns
+    __table__ = db.Table(
+        'record_daily_rollup',
+        db.Column("id", db.Integer, primary_key=True),
+        db.Column("day", db.Date, nullable=False),
+        db.Column("first_program", db.String(128), nullable=False, default=""),
+        db.Column("curr_region", db.String(128), nullable=False, default=""),
+        db.Column("student_type", db.String(32), nullable=False, default=""),
+        db.Column("local_or_foreign", db.String(16), nullable=False, default=""),
+        db.Column("n", db.Integer, nullable=False, default=0),
+        db.Column("n_prob", db.Integer, nullable=False, default=0),  # non-NULL prob / conf, for the averages
+        db.Column("sum_prob", db.Float, nullable=False, default=0.0),
+        db.Column("n_conf", db.Integer, nullable=False, default=0),
+        db.Column("sum_conf", db.Float, nullable=False, default=0.0),
+        *[db.Column(c, db.Integer, nullable=False, default=0) for c in PROB_HIST + CONF_HIST + HEAT_CELLS],
+        db.UniqueConstraint("day", *ROLLUP_KEYS, name="uq_rollup_key"),
+    )
 
 
 MODELS = {
@@ -71,9 +132,30 @@ MODELS = {
     "xg": None,
     "training_columns": None,
     "X_train_encoded": None,
+    "encoder": None,
+    "compiled": None,
+    "kernels": None,
+    "explainer": None,
+    "vocab": None,
+    "tokens": None,
+    "token_index": None,
+    "checks": None,
+    "snapshot": None,
+    "version": None,
+    "dir": None,
 }
 MODELS_LOADED = False
 
+# Admin dashboard responses, keyed by normalized query args. /api/predict bumps the version in this
+# process; other gunicorn workers pick up new records once their entries expire (ADMIN_CACHE_TTL).
+ADMIN_CACHE = TTLCache(maxsize=int(os.getenv("ADMIN_CACHE_SIZE", "256")), ttl=float(os.getenv("ADMIN_CACHE_TTL", "5")))
+
+# (model version, normalized feature row) -> (prob, confidence); records are still saved per submission
+PREDICTION_CACHE = TTLCache(maxsize=int(os.getenv("PREDICT_CACHE_SIZE", "4096")), ttl=float(os.getenv("PREDICT_CACHE_TTL", "3600")))
+
+# same key -> explanation (top contributing features)
+EXPLAIN_CACHE = TTLCache(maxsize=int(os.getenv("EXPLAIN_CACHE_SIZE", "1024")), ttl=float(os.getenv("PREDICT_CACHE_TTL", "3600")))
+
 EXPECTED_INPUT_KEYS = [
     "first program",
     "second program",
@@ -114,6 +196,7 @@ CACHED_TOKEN_OPTIONS = {
     "student type": ["full time", "part time"],
     "school type": ["public", "private"],
 }
+DEFAULT_TOKEN_OPTIONS = {k: list(v) for k, v in CACHED_TOKEN_OPTIONS.items()}
 
 # ---------------- Helpers ----------------
 def _lower(s): return str(s or "").strip().lower()
@@ -138,11 +221,6 @@ def age_from_dob_iso(dob_str):
         return t.year - b.year - ((t.month, t.day) < (b.month, b.day))
     except: return None
 
-def suggest_token(value, choices):
-    value = _lower(value)
-    if not choices: return []
-    return difflib.get_close_matches(value, choices, n=3, cutoff=0.6)
-
 def derive_engineered(ex):
     local_or_foreign = "local" if ex.get("permanent country") == "philippines" else "foreign"
     same_region = 1 if ex.get("current region") == ex.get("permanent region") else 0
@@ -151,7 +229,8 @@ def derive_engineered(ex):
     age = age_from_dob_iso(ex.get("dateofbirth",""))
     return local_or_foreign, same_region, same_province, same_city, age
 
-def build_feature_row(payload):
+def build_feature_row(payload, suggestions=None):
+    # suggestions: optional dict, filled with {input key: did-you-mean tokens} for tokens the model never saw
     ex = {k: tokenize(payload.get(k, "")) for k in EXPECTED_INPUT_KEYS}
     # normalize tolerant fields
     ex["student type"] = normalize_student_type(ex.get("student type"))
@@ -166,6 +245,11 @@ def build_feature_row(payload):
     if age is None:
         return None, {"error":"invalid_date","message":"dateOfBirth must be ISO yyyy-mm-dd"}
 
+    if suggestions is not None:
+        for k, index in TOKEN_INDEX.items():
+            if ex.get(k) and ex[k] not in index:
+                suggestions[k] = index.search(ex[k])
+
     row = {
         "Program (First Choice)": ex["first program"],
         "Program (Second Choice)": ex["second program"],
@@ -186,25 +270,207 @@ def build_feature_row(payload):
     }
     return row, None
 
-def encode_row_to_training(df_one_row):
+def encode_row_to_training(df_one_row, models=None):
+    # works for any number of rows: one get_dummies/reindex pass for the whole frame
+    models = MODELS if models is None else models
     dummies = pd.get_dummies(df_one_row)
-    cols = MODELS["training_columns"]
+    cols = models["training_columns"]
     dummies = dummies.reindex(columns=cols, fill_value=0)
     assert dummies.shape[1] == len(cols)
     return dummies
 
-def predict_with_stack(df_encoded):
-    p1 = MODELS["rf"].predict_proba(df_encoded)[:,1]
-    p2 = MODELS["lr"].predict_proba(df_encoded)[:,1]
-    p3 = MODELS["xg"].predict_proba(df_encoded.to_numpy())[:,1]
+def split_training_column(c):
+    # "Current City_lipa city" -> ("Current City", "lipa city"); numeric columns have no token
+    if "_" not in c: return None, None
+    prefix, token = c.split("_",1)
+    return prefix, token
+
+def compile_encoder(cols):
+    # (feature, token) -> column index, so encoding is a few dict lookups instead of get_dummies + reindex
+    names, onehot = {}, {}
+    for i, c in enumerate(cols):
+        c = str(c)
+        names[c] = i
+        prefix, token = split_training_column(c)
+        if prefix is not None: onehot[(prefix, token)] = i
+    return {"columns": pd.Index(cols), "names": names, "onehot": onehot, "width": len(cols)}
+
+# categorical model features checked against the trained vocabulary; bit positions are stored in
+# Record.oov_mask, so only ever append to this list
+OOV_FIELDS = [
+    ("Program (First Choice)", "first program"),
+    ("Program (Second Choice)", "second program"),
+    ("Current Region", "current region"),
+    ("Current Province", "current province"),
+    ("Current City", "current city/municipality"),
+    ("Permanent Country", "permanent country"),
+    ("Permanent Region", "permanent region"),
+    ("Permanent Province", "permanent province"),
+    ("Permanent City", "permanent city/municipality"),
+    ("Student Type", "student type"),
+    ("School Type", "school type"),
+]
+
+def training_vocab(cols):
+    # feature -> set of one-hot tokens it was trained with
+    vocab = {}
+    for c in cols:
+        prefix, token = split_training_column(str(c))
+        if prefix is not None: vocab.setdefault(prefix, set()).add(token)
+    return {f: frozenset(v) for f, v in vocab.items()}
+
+def oov_mask(row, models=None):
+    # a token the model never saw one-hot encodes to an all-zero group; empty values are not flagged
+    vocab = (MODELS if models is None else models)["vocab"] or {}
+    mask = 0
+    for bit, (feat, _) in enumerate(OOV_FIELDS):
+        val = row.get(feat)
+        if val and feat in vocab and val not in vocab[feat]:
+            mask |= 1 << bit
+    return mask
+
+def oov_names(mask):
+    return [key for bit, (_, key) in enumerate(OOV_FIELDS) if mask & (1 << bit)]
+
+def encode_matrix(rows, models=None):
+    models = MODELS if models is None else models
+    enc = models["encoder"]
+    if enc is None:
+        return encode_row_to_training(pd.DataFrame(rows), models).to_numpy(dtype=float)
+    X = np.zeros((len(rows), enc["width"]))
+    for r, row in enumerate(rows):
+        for feat, val in row.items():
+            if isinstance(val, str):
+                j = enc["onehot"].get((feat, val))
+                if j is not None: X[r, j] = 1.0
+            else:
+                j = enc["names"].get(feat)
+                if j is not None: X[r, j] = val
+    return X
+
+def encode_rows(rows, models=None):
+    models = MODELS if models is None else models
+    enc = models["encoder"]
+    if enc is None:
+        return encode_row_to_training(pd.DataFrame(rows), models)
+    return pd.DataFrame(encode_matrix(rows, models), columns=enc["columns"], copy=False)
+
+def predict_with_stack_batch(df_encoded, models=None):
+    models = MODELS if models is None else models
+    with stage("rf"): p1 = models["rf"].predict_proba(df_encoded)[:,1]
+    with stage("lr"): p2 = models["lr"].predict_proba(df_encoded)[:,1]
+    with stage("xg"): p3 = models["xg"].predict_proba(df_encoded.to_numpy())[:,1]
     stacked = np.column_stack([p1,p2,p3])
-    meta_probs = MODELS["meta"].predict_proba(stacked)[0]
-    prob_pos = float(meta_probs[1])
-    confidence = float(max(meta_probs))
+    with stage("meta"): meta_probs = models["meta"].predict_proba(stacked)
+    return meta_probs[:,1], meta_probs.max(axis=1)
+
+def predict_with_stack(df_encoded, models=None):
+    probs, confs = predict_with_stack_batch(df_encoded, models)
+    prob_pos = float(probs[0])
+    confidence = float(confs[0])
     return prob_pos, confidence
 
-def load_training_tokens_from_columns(cols):
-    buckets = {k:set() for k in CACHED_TOKEN_OPTIONS.keys()}
+def row_cache_key(row, models):
+    # build_feature_row always emits the same keys in the same order, so the values identify the row
+    return (models["version"], tuple(row.values()))
+
+def predict_rows(rows, oov=None):
+    # memoized scoring: only rows not seen under the current model version go through the ensemble.
+    # The ensemble is read once, so a hot reload mid-request cannot mix two model versions.
+    # oov: optional list, extended with each row's oov_mask against that same ensemble
+    models = MODELS
+    if oov is not None:
+        oov.extend(oov_mask(r, models) for r in rows)
+    keys = [row_cache_key(r, models) for r in rows]
+    found, todo = {}, {}
+    for i, k in enumerate(keys):
+        if k in found or k in todo: continue
+        hit = PREDICTION_CACHE.get(k)
+        if hit is None: todo[k] = i
+        else: found[k] = hit
+    if todo:
+        batch = [rows[i] for i in todo.values()]
+        if models["compiled"] is not None:
+            with stage("encode"): X = encode_matrix(batch, models)
+            with stage("compiled"): p, c = models["compiled"].predict(X)
+        else:
+            with stage("encode"): X = encode_rows(batch, models)
+            p, c = predict_with_stack_batch(X, models)
+        for k, pi, ci in zip(todo, p, c):
+            found[k] = (float(pi), float(ci))
+            PREDICTION_CACHE.put(k, found[k])
+    return [found[k][0] for k in keys], [found[k][1] for k in keys], models["version"]
+
+BATCHER = None  # MicroBatcher when MICROBATCH=1
+
+def score_rows(rows, oov=None):
+    # /api/predict: coalesced with concurrent requests into one ensemble call when micro-batching is on
+    if BATCHER is None:
+        return predict_rows(rows, oov)
+    with stage("batch"):
+        return BATCHER.submit(rows, oov)
+
+def models_not_ready():
+    # 503 + Retry-After while the first load is still running, so clients and balancers back off
+    body = {"error":"models_not_ready","message":"Models are still loading; retry shortly.","startup":STARTUP}
+    return jsonify(body), 503, {"Retry-After": "2"}
+
+def init_batcher():
+    global BATCHER
+    if os.getenv("MICROBATCH", "0") != "1":
+        return
+    BATCHER = MicroBatcher(predict_rows, max_rows=int(os.getenv("MICROBATCH_MAX_ROWS", "32")),
+                           max_wait=float(os.getenv("MICROBATCH_WAIT_MS", "2")) / 1000)
+
+def record_fields(row_dict, dob):
+    return dict(
+        first_program=row_dict["Program (First Choice)"],
+        second_program=row_dict["Program (Second Choice)"],
+        curr_region=row_dict["Current Region"],
+        curr_province=row_dict["Current Province"],
+        curr_city=row_dict["Current City"],
+        per_country=row_dict["Permanent Country"],
+        per_region=row_dict["Permanent Region"],
+        per_province=row_dict["Permanent Province"],
+        per_city=row_dict["Permanent City"],
+        student_type=row_dict["Student Type"],
+        school_type=row_dict["School Type"],
+        date_of_birth=dob,
+        age_years=row_dict["Age"],
+        local_or_foreign=row_dict["LocalOrForeign"],
+        same_region=row_dict["SameRegion"],
+        same_province=row_dict["SameProvince"],
+        same_city=row_dict["SameCity"],
+    )
+
+def _cell(v):
+    if v is None: return ""
+    if isinstance(v, float) and np.isnan(v): return ""
+    if isinstance(v, (datetime, date, pd.Timestamp)): return v.strftime("%Y-%m-%d")
+    return str(v).strip()
+
+def read_batch_payload(req):
+    # JSON array (or {"rows": [...]}) or a CSV/XLSX upload in the "file" field
+    f = req.files.get("file")
+    if f is not None:
+        name = (f.filename or "").lower()
+        if name.endswith(".csv"):
+            frame = pd.read_csv(f, dtype=str, keep_default_na=False)
+        elif name.endswith((".xlsx", ".xls")):
+            frame = pd.read_excel(f)
+        else:
+            return None, {"error":"unsupported_file","message":"Upload a .csv or .xlsx file."}
+        frame.columns = [_lower(c) for c in frame.columns]
+        return [{k: _cell(v) for k, v in rec.items()} for rec in frame.to_dict(orient="records")], None
+    body = req.get_json(force=True, silent=True)
+    if isinstance(body, dict): body = body.get("rows")
+    if not isinstance(body, list):
+        return None, {"error":"bad_payload","message":"Expected a JSON array of applicants or a file upload."}
+    return [r if isinstance(r, dict) else {} for r in body], None
+
+def training_tokens(cols):
+    # input key -> sorted tokens the model was trained with (keys without any are left out)
+    buckets = {k:set() for k in DEFAULT_TOKEN_OPTIONS.keys()}
     mapping = {
         "program (first choice)":"first program",
         "program (second choice)":"second program",
@@ -219,13 +485,28 @@ def load_training_tokens_from_columns(cols):
         "school type":"school type",
     }
     for c in cols:
-        if "_" not in c: continue
-        prefix, token = c.split("_",1)
+        prefix, token = split_training_column(str(c))
+        if prefix is None: continue
         pref = prefix.strip().lower()
         if pref in mapping:
             buckets[mapping[pref]].add(token.lower())
-    for k in buckets:
-        if buckets[k]: CACHED_TOKEN_OPTIONS[k] = sorted(list(buckets[k]))
+    return {k: sorted(v) for k, v in buckets.items() if v}
+
+def token_options(tokens):
+    # the defaults, with every field the model was trained on replaced by its tokens
+    return {**{k: list(v) for k, v in DEFAULT_TOKEN_OPTIONS.items()}, **tokens}
+
+def set_training_tokens(models):
+    # the serving ensemble's options, with fuzzy indexes over the trained vocabulary
+    # (prebuilt by build_ensemble; fields left at their defaults get one built here). Rebound rather
+    # than updated, so no field keeps the previous model's vocabulary
+    global CACHED_TOKEN_OPTIONS, TOKEN_INDEX
+    options = token_options(models["tokens"])
+    built = models["token_index"] or {}
+    TOKEN_INDEX = {k: built.get(k) or FuzzyIndex(v) for k, v in options.items() if v}
+    CACHED_TOKEN_OPTIONS = options
+
+TOKEN_INDEX = {}
 
 def _finalize_default_options():
     # Ensure non-empty defaults so the UI never shows empty dropdowns
@@ -310,26 +591,803 @@ def ensure_psgc_data(app):
     with open(os.path.join(data_dir,"psgc_barangays.json"),"w",encoding="utf-8") as f: json.dump(sample_barangays,f,ensure_ascii=False,indent=2)
 
 # ---------------- Models ----------------
+MODEL_FILES = ["meta_model.pkl", "rf.pkl", "lr.pkl", "xg.pkl", "training_columns.pkl"]
+
+def artifacts_version(base):
+    # cheap fingerprint of the artifacts on disk (name, size, mtime); changes whenever a model file is replaced
+    h = hashlib.sha1()
+    for name in MODEL_FILES:
+        st = os.stat(os.path.join(base, name))
+        h.update(f"{name}:{st.st_size}:{st.st_mtime_ns};".encode())
+    return h.hexdigest()[:12]
+
+# artifacts the serving path needs are loaded up front; the rest only when something asks for them
+ARTIFACT_FILES = {
+    "meta": "meta_model.pkl",
+    "rf": "rf.pkl",
+    "lr": "lr.pkl",
+    "xg": "xg.pkl",
+    "training_columns": "training_columns.pkl",
+    "X_train_encoded": "X_train_encoded.pkl",
+}
+LAZY_ARTIFACTS = {"X_train_encoded"}
+ARTIFACT_STATS = {}
+_artifact_lock = threading.Lock()
+
+def current_rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except Exception:
+        try:
+            import resource
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # peak, KiB on Linux
+        except Exception:
+            return None
+
+def load_artifact(base, name):
+    # MODEL_MMAP=1 memory-maps the numpy arrays inside uncompressed joblib files (tree node arrays,
+    # DataFrame blocks), so pre-forked workers share those pages instead of each holding a copy
+    mmap = os.getenv("MODEL_MMAP", "0") == "1"
+    rss0, t0 = current_rss_mb(), time.perf_counter()
+    obj = joblib.load(os.path.join(base, ARTIFACT_FILES[name]), mmap_mode="r" if mmap else None)
+    rss1 = current_rss_mb()
+    ARTIFACT_STATS[name] = {
+        "seconds": round(time.perf_counter() - t0, 4),
+        "rss_delta_mb": round(rss1 - rss0, 1) if rss0 is not None and rss1 is not None else None,
+        "mmap": mmap,
+    }
+    return obj
+
+def get_artifact(name, models=None):
+    # on-demand access for lazy artifacts such as the training matrix
+    models = MODELS if models is None else models
+    if models.get(name) is None and name in LAZY_ARTIFACTS and models.get("dir"):
+        with _artifact_lock:
+            if models.get(name) is None:
+                models[name] = load_artifact(models["dir"], name)
+    return models.get(name)
+
+# Model directory layout (MODELS_DIR, default app/AIMODEL):
+#   flat:      AIMODEL/meta_model.pkl ...            version = fingerprint of the files
+#   versioned: AIMODEL/<version>/meta_model.pkl ...  version = directory name; AIMODEL/CURRENT names
+#              the active one. Without CURRENT, flat files at the root keep being served (so staging a
+#              version directory next to them changes nothing); only a root with no flat files falls
+#              back to the latest version by name
+def model_root(app):
+    return os.getenv("MODELS_DIR") or os.path.join(app.root_path, "AIMODEL")
+
+def list_model_versions(root):
+    try:
+        names = os.listdir(root)
+    except OSError:
+        return []
+    return sorted(n for n in names if os.path.isfile(os.path.join(root, n, ARTIFACT_FILES["meta"])))
+
+def resolve_model_dir(root, version=None):
+    if not version:
+        try:
+            with open(os.path.join(root, "CURRENT"), encoding="utf-8") as f:
+                version = f.read().strip() or None
+        except OSError:
+            if os.path.isfile(os.path.join(root, ARTIFACT_FILES["meta"])):
+                return root, None
+            versions = list_model_versions(root)
+            version = versions[-1] if versions else None
+    if version:
+        return os.path.join(root, version), version
+    return root, None
+
+def activate_model_version(root, version):
+    # point CURRENT at an existing version; written atomically so watchers never see a partial file
+    missing = [f for f in MODEL_FILES if not os.path.isfile(os.path.join(root, version, f))]
+    if missing:
+        raise ValueError(f"model version {version!r} is missing {', '.join(missing)}")
+    tmp = os.path.join(root, f".CURRENT.{os.getpid()}")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(version + "\n")
+    os.replace(tmp, os.path.join(root, "CURRENT"))
+
+# ---------------- Startup snapshots ----------------
+# structures derived from the artifacts alone (see app/snapshot.py); bump SNAPSHOT_FORMAT when their shape changes
+SNAPSHOT_FORMAT = 2
+SNAPSHOT_FIELDS = ("encoder", "vocab", "kernels", "tokens", "token_index", "checks")
+SNAPSHOT_DIR = None
+
+def init_snapshots(app):
+    global SNAPSHOT_DIR
+    if os.getenv("STARTUP_SNAPSHOT", "1") == "0":
+        SNAPSHOT_DIR = None
+    else:
+        SNAPSHOT_DIR = os.getenv("STARTUP_SNAPSHOT_DIR") or os.path.join(app.instance_path, "snapshots")
+
+def ensemble_snapshot_key(base):
+    import sklearn, xgboost
+    return snapshot_key(SNAPSHOT_FORMAT, artifacts_version(base), inference_mode(),
+                        np.__version__, sklearn.__version__, xgboost.__version__)
+
+def save_ensemble_snapshot(models):
+    # only after warm_ensemble has recorded its checks, and only for what was built rather than loaded
+    snap = models["snapshot"]
+    if SNAPSHOT_DIR is None or not snap or snap["hit"] or models["checks"] is None:
+        return
+    try:
+        save_snapshot(SNAPSHOT_DIR, snap["key"], {k: models[k] for k in SNAPSHOT_FIELDS})
+    except Exception as e:
+        print(f"[Snapshot] not saved: {e}")
+
+def build_ensemble(base, version=None):
+    t0 = time.perf_counter()
+    models = {k: None for k in MODELS}
+    for name in ARTIFACT_FILES:
+        if name not in LAZY_ARTIFACTS:
+            models[name] = load_artifact(base, name)
+    models["dir"] = base
+    models["version"] = version or artifacts_version(base)
+    key = ensemble_snapshot_key(base) if SNAPSHOT_DIR else None
+    snap = load_snapshot(SNAPSHOT_DIR, key) if key else None
+    if snap is not None:
+        models.update({k: snap[k] for k in SNAPSHOT_FIELDS})
+    else:
+        cols = models["training_columns"]
+        models["encoder"] = compile_encoder(cols)
+        models["vocab"] = training_vocab(cols)
+        models["tokens"] = training_tokens(cols)
+        models["token_index"] = {k: FuzzyIndex(v) for k, v in models["tokens"].items()}
+        try:
+            models["kernels"] = compile_ensemble(models)
+        except Exception as e:
+            print(f"[Compile] {e}")
+    models["snapshot"] = {"key": key, "hit": snap is not None}
+    if inference_mode() == "compiled":
+        if models["kernels"] is None:
+            print("[Compile] no compiled kernels; using library predict_proba")
+        models["compiled"] = models["kernels"]
+    try:
+        models["explainer"] = Explainer(models)
+    except Exception as e:
+        print(f"[Explain] {e}; explanations disabled")
+    METRICS.observe("admissions_model_load_duration_seconds", time.perf_counter() - t0)
+    return models
+
+def inference_mode():
+    return os.getenv("INFERENCE_MODE", "library").strip().lower()
+
 def load_models(app):
-    global MODELS_LOADED
+    # first load of the process: build, warm, then publish (a reload goes through reload_models instead)
+    global MODELS, MODELS_LOADED
     try:
-        base = os.path.join(app.root_path, "AIMODEL")
-        MODELS["meta"] = joblib.load(os.path.join(base, "meta_model.pkl"))
-        MODELS["rf"]   = joblib.load(os.path.join(base, "rf.pkl"))
-        MODELS["lr"]   = joblib.load(os.path.join(base, "lr.pkl"))
-        MODELS["xg"]   = joblib.load(os.path.join(base, "xg.pkl"))
-        MODELS["training_columns"] = joblib.load(os.path.join(base, "training_columns.pkl"))
-        MODELS["X_train_encoded"]  = joblib.load(os.path.join(base, "X_train_encoded.pkl"))
+        base, version = resolve_model_dir(model_root(app))
+        models = build_ensemble(base, version)
+        set_training_tokens(models)
+        try:
+            if not warm_ensemble(models):
+                print("[Model Load] warm-up prediction failed")
+        except Exception as e:
+            print(f"[Model Load] warm-up failed: {e}")
+        MODELS = models
+        PREDICTION_CACHE.clear()
         MODELS_LOADED = True
-        load_training_tokens_from_columns(MODELS["training_columns"])
+        save_ensemble_snapshot(models)
+        METRICS.inc("admissions_model_loads_total", result="ok")
     except Exception as e:
         MODELS_LOADED = False
+        STARTUP["error"] = str(e)
+        METRICS.inc("admissions_model_loads_total", result="error")
         print(f"[Model Load Error] {e}")
 
-def smoke_test_prediction(app):
-    if not MODELS_LOADED:
+# ---------------- Startup ----------------
+# liveness is immediate; readiness waits for the first load (in a "model-load" thread unless MODEL_LOAD_BACKGROUND=0)
+STARTUP = {"state": "starting", "background": None, "seconds": None, "snapshot": None, "error": None}
+STARTUP_DONE = threading.Event()
+
+def startup_models(app):
+    t0 = time.perf_counter()
+    STARTUP["state"] = "loading"
+    try:
+        with _reload_lock:  # a watcher or admin reload must not race the first load
+            load_models(app)
+    finally:
+        snap = MODELS["snapshot"]
+        STARTUP.update(state="ready" if MODELS_LOADED else "failed", seconds=round(time.perf_counter() - t0, 3),
+                       snapshot=("off" if not SNAPSHOT_DIR else "hit" if snap and snap["hit"] else "miss"))
+        STARTUP_DONE.set()
+        print(f"[Startup] models {STARTUP['state']} in {STARTUP['seconds']}s (snapshot {STARTUP['snapshot']})")
+
+def start_models(app):
+    STARTUP_DONE.clear()  # create_app may run more than once per process (benchmarks, CLI)
+    STARTUP.update(state="starting", background=os.getenv("MODEL_LOAD_BACKGROUND", "1") == "1", seconds=None,
+                   snapshot=None, error=None)
+    if STARTUP["background"]:
+        threading.Thread(target=startup_models, args=(app,), daemon=True, name="model-load").start()
+    else:
+        startup_models(app)
+
+def wait_for_models(timeout=None):
+    STARTUP_DONE.wait(timeout)
+    return MODELS_LOADED
+
+# ---------------- Hot reload ----------------
+RELOAD_STATE = {"state": "idle", "version": None, "error": None, "at": None}
+_reload_lock = threading.Lock()
+_watcher_pid = None
+
+def reload_models(app, version=None):
+    """Build, warm and atomically swap in a new ensemble. Returns False if a reload is already running."""
+    global MODELS, MODELS_LOADED
+    if not _reload_lock.acquire(blocking=False):
+        return False
+    try:
+        RELOAD_STATE.update(state="loading", version=version, error=None, at=datetime.utcnow().isoformat())
+        base, v = resolve_model_dir(model_root(app), version)
+        new = build_ensemble(base, v)
+        if not warm_ensemble(new):
+            raise RuntimeError("warm-up prediction failed")
+        # a single rebind: requests already inside predict_rows keep the ensemble they started with
+        MODELS = new
+        MODELS_LOADED = True
+        set_training_tokens(new)
+        save_ensemble_snapshot(new)
+        METRICS.inc("admissions_model_loads_total", result="ok")
+        RELOAD_STATE.update(state="ok", version=new["version"], at=datetime.utcnow().isoformat())
+        print(f"[Model Reload] now serving {new['version']}")
+    except Exception as e:
+        METRICS.inc("admissions_model_loads_total", result="error")
+        RELOAD_STATE.update(state="failed", error=str(e), at=datetime.utcnow().isoformat())
+        print(f"[Model Reload Error] {e}")
+    finally:
+        _reload_lock.release()
+    return True
+
+def start_reload(app, version=None):
+    threading.Thread(target=reload_models, args=(app, version), daemon=True, name="model-reload").start()
+
+def ensure_model_watcher(app):
+    # one watcher thread per worker process (threads do not survive gunicorn's fork, so start it lazily)
+    global _watcher_pid
+    interval = float(os.getenv("MODEL_WATCH_INTERVAL", "10"))
+    if interval <= 0 or _watcher_pid == os.getpid():
         return
-    tokens = {k:(v[0] if isinstance(v,list) and v else '') for k,v in CACHED_TOKEN_OPTIONS.items()}
+    _watcher_pid = os.getpid()
+    threading.Thread(target=_watch_models, args=(app, interval), daemon=True, name="model-watch").start()
+
+def _watch_models(app, interval):
+    # every worker converges on whatever CURRENT (or the flat files' fingerprint) says, without a restart
+    failed = None
+    while True:
+        time.sleep(interval)
+        try:
+            base, v = resolve_model_dir(model_root(app))
+            want = v or artifacts_version(base)
+            if want != MODELS.get("version") and want != failed:
+                reload_models(app)
+                failed = want if RELOAD_STATE["state"] == "failed" else None
+        except Exception:
+            pass
+
+# ---------------- Schema upgrades ----------------
+ADDED_RECORD_COLUMNS = [("priority", "FLOAT"), ("model_version", "VARCHAR(64)"), ("oov_mask", "INTEGER")]
+
+def migrate_schema():
+    # create_all() never alters existing tables: add columns/indexes introduced after a database was created
+    insp = db.inspect(db.engine)
+    cols = {c["name"] for c in insp.get_columns("records")}
+    for name, ddl in ADDED_RECORD_COLUMNS:
+        if name not in cols:
+            db.session.execute(db.text(f"ALTER TABLE records ADD COLUMN {name} {ddl}"))
+    db.session.execute(db.update(Record).where(Record.priority.is_(None))
+                       .values(priority=Record.prob_enroll_pct * Record.confidence))
+    db.session.commit()
+    for ix in Record.__table__.indexes:
+        ix.create(bind=db.engine, checkfirst=True)
+    # the rollup used to be keyed by (prob bin, conf bin) as well: recreate it empty, startup then rebuilds it
+    if "conf_bin" in {c["name"] for c in insp.get_columns("record_daily_rollup")}:
+        RecordDailyRollup.__table__.drop(bind=db.engine)
+        RecordDailyRollup.__table__.create(bind=db.engine)
+
+# ---------------- Admin queries ----------------
+def filtered_records(days, program, region, bucket, min_conf, HIGH_T, MED_T, since=None):
+    if since is None: since = datetime.utcnow() - timedelta(days=days)
+    q = Record.query.filter(Record.created_at >= since)
+    if program: q = q.filter(Record.first_program == program)
+    if region:  q = q.filter(Record.curr_region == region)
+    if min_conf > 0: q = q.filter(Record.confidence >= min_conf)
+    if bucket == "H":
+        q = q.filter(Record.prob_enroll_pct >= HIGH_T)
+    elif bucket == "M":
+        q = q.filter(Record.prob_enroll_pct >= MED_T, Record.prob_enroll_pct < HIGH_T)
+    elif bucket == "L":
+        q = q.filter(Record.prob_enroll_pct < MED_T)
+    return q
+
+def table_order(sort, direction):
+    # shared by the lead table and the export; id breaks ties so pages and cursors are stable
+    sort_map = {
+        "priority": Record.priority,
+        "prob": Record.prob_enroll_pct,
+        "conf": Record.confidence,
+        "created_at": Record.created_at,
+    }
+    if sort not in sort_map: sort = "priority"
+    direction = "desc" if direction == "desc" else "asc"
+    col = sort_map[sort]
+    # records without a score sort last either way (asc would otherwise put them first on SQLite)
+    order = (col.desc().nulls_last(), Record.id.desc()) if direction == "desc" else (col.asc().nulls_last(), Record.id.asc())
+    return sort, direction, col, order
+
+CURSOR_FIELDS = {"priority": "priority", "prob": "prob_enroll_pct", "conf": "confidence", "created_at": "created_at"}
+
+def encode_cursor(row, sort, direction):
+    v = getattr(row, CURSOR_FIELDS[sort])
+    if isinstance(v, datetime): v = v.isoformat()
+    raw = json.dumps([sort, direction, v, row.id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(token, sort, direction):
+    # returns (sort value, id) or None if the token is malformed or was issued for another sort
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        c_sort, c_dir, v, rid = json.loads(raw)
+        if (c_sort, c_dir) != (sort, direction): return None
+        if v is None: pass  # the previous page ended inside the NULL tail
+        elif sort == "created_at": v = datetime.fromisoformat(v)
+        else: v = float(v)
+        return v, int(rid)
+    except Exception:
+        return None
+
+def keyset_page(cols, col, cursor, direction, limit):
+    # next page under (col NULLS LAST, id): seek on the (col, id) index among non-NULL values, then go on into the NULL tail
+    v, rid = cursor
+    rows = []
+    if v is not None:
+        key, seek = db.tuple_(col, Record.id), db.tuple_(v, rid)
+        rows = cols.filter(key < seek if direction == "desc" else key > seek).limit(limit).all()
+        rid = None
+    if len(rows) < limit:
+        tail = cols.filter(col.is_(None))
+        if rid is not None: tail = tail.filter(Record.id < rid if direction == "desc" else Record.id > rid)
+        rows += tail.limit(limit - len(rows)).all()
+    return rows
+
+def bin_expr(col, bins):
+    # same as min(int(v*bins), bins-1) in Python, but portable SQL (no floor/cast differences between engines)
+    return db.case(*[(col * bins >= k, k) for k in range(bins-1, 0, -1)], (col.isnot(None), 0), else_=None)
+
+def bucket_expr(HIGH_T, MED_T):
+    return db.case((Record.prob_enroll_pct >= HIGH_T, "H"), (Record.prob_enroll_pct >= MED_T, "M"), else_="L")
+
+def empty_aggregates():
+    return {"n": 0, "sp": 0.0, "np": 0, "sc": 0.0, "nc": 0, "high": 0, "med": 0,
+            "hist_prob": [0]*20, "hist_conf": [0]*20, "heat": {}}
+
+def raw_aggregates(q, HIGH_T, MED_T):
+    # 1) Summary, buckets, histograms and heat grid from one GROUP BY over (prob bin, conf bin, bucket)
+    pbin, cbin = bin_expr(Record.prob_enroll_pct, 20), bin_expr(Record.confidence, 20)
+    bucket_col = bucket_expr(HIGH_T, MED_T)
+    grid_rows = (q.with_entities(
+        pbin.label("pb"), cbin.label("cb"), bucket_col.label("bk"),
+        func.count(Record.id).label("n"),
+        func.sum(Record.prob_enroll_pct).label("sp"), func.count(Record.prob_enroll_pct).label("np"),
+        func.sum(Record.confidence).label("sc"), func.count(Record.confidence).label("nc"),
+    ).group_by(pbin, cbin, bucket_col).all())
+    agg = empty_aggregates()
+    for r in grid_rows:
+        n = int(r.n)
+        agg["n"] += n
+        agg["sp"] += float(r.sp or 0); agg["np"] += int(r.np)
+        agg["sc"] += float(r.sc or 0); agg["nc"] += int(r.nc)
+        if r.bk == "H": agg["high"] += n
+        if r.bk == "M": agg["med"] += n
+        # histograms skip NULLs; the heat grid counts a NULL as 0
+        if r.pb is not None: agg["hist_prob"][r.pb] += n
+        if r.cb is not None: agg["hist_conf"][r.cb] += n
+        cell = ((r.pb or 0) // 2, (r.cb or 0) // 2)
+        agg["heat"][cell] = agg["heat"].get(cell, 0) + n
+
+    # 2) Trend, programs, regions, student type and local/foreign in one UNION ALL of small GROUP BYs
+    def dim(kind, col):
+        return q.with_entities(
+            db.literal(kind).label("kind"), col.label("key"),
+            func.count(Record.id).label("n"),
+            func.sum(Record.prob_enroll_pct).label("sp"), func.count(Record.prob_enroll_pct).label("np"),
+            func.sum(Record.confidence).label("sc"), func.count(Record.confidence).label("nc"),
+        ).group_by(col)
+    dim_rows = dim("trend", func.date(Record.created_at)).union_all(
+        dim("program", Record.first_program), dim("region", Record.curr_region),
+        dim("student_type", Record.student_type), dim("local_foreign", Record.local_or_foreign),
+    ).all()
+    return agg, dim_rows
+
+# ---------------- Daily rollup ----------------
+def rollup_enabled():
+    return os.getenv("METRICS_ROLLUP", "1") == "1"
+
+def _threshold_bin(x, bins=20):
+    # thresholds must fall on a rollup bin edge, e.g. 0.75 -> 15; None if they don't
+    k = round(x * bins)
+    return k if abs(x * bins - k) < 1e-9 and 0 <= k < bins else None
+
+def rollup_compatible(bucket, min_conf, HIGH_T, MED_T):
+    # the rollup has no joint prob x conf breakdown per dimension, so bucket / min_conf filters read raw records
+    return (bucket not in ("H", "M", "L") and not min_conf > 0
+            and all(_threshold_bin(x) is not None for x in (HIGH_T, MED_T)))
+
+def value_bin(v, bins=20):
+    # Python twin of bin_expr; -1 stands for NULL
+    if v is None: return -1
+    return min(max(int(v * bins), 0), bins-1)
+
+def heat_bins(b):
+    # 20-bin values (-1 = NULL, counted as 0) that land in each of the 10 heat rows/columns
+    return [(2*i, 2*i+1) + ((-1,) if i == 0 else ()) for i in range(10)][b]
+
+def rollup_add(mappings):
+    # fold freshly scored records into record_daily_rollup (same transaction as the records themselves)
+    groups = {}
+    for m in mappings:
+        prob, conf = m.get("prob_enroll_pct"), m.get("confidence")
+        pb, cb = value_bin(prob), value_bin(conf)
+        key = ((m.get("created_at") or datetime.utcnow()).date(), *((m.get(k) or "") for k in ROLLUP_KEYS))
+        g = groups.setdefault(key, {"n": 0, "n_prob": 0, "sum_prob": 0.0, "n_conf": 0, "sum_conf": 0.0})
+        g["n"] += 1
+        if pb >= 0: g["n_prob"] += 1; g["sum_prob"] += prob; g[f"p{pb}"] = g.get(f"p{pb}", 0) + 1
+        if cb >= 0: g["n_conf"] += 1; g["sum_conf"] += conf; g[f"c{cb}"] = g.get(f"c{cb}", 0) + 1
+        cell = f"h{max(pb, 0) // 2}_{max(cb, 0) // 2}"
+        g[cell] = g.get(cell, 0) + 1
+    R = RecordDailyRollup
+    for key, g in groups.items():
+        cond = dict(zip(("day", *ROLLUP_KEYS), key))
+        inc = {getattr(R, c): getattr(R, c) + v for c, v in g.items()}
+        if R.query.filter_by(**cond).update(inc, synchronize_session=False):
+            continue
+        try:
+            with db.session.begin_nested():
+                db.session.add(R(**cond, **g))
+        except IntegrityError:
+            # another worker created the row first
+            R.query.filter_by(**cond).update(inc, synchronize_session=False)
+
+def rebuild_rollup():
+    R = RecordDailyRollup
+    # per (day, dimensions, prob bin, conf bin) first, then one row per day x dimensions with the bins as columns
+    keys = [func.date(Record.created_at).label("day")] + [func.coalesce(getattr(Record, k), "").label(k) for k in ROLLUP_KEYS]
+    pbin = func.coalesce(bin_expr(Record.prob_enroll_pct, 20), -1)
+    cbin = func.coalesce(bin_expr(Record.confidence, 20), -1)
+    grid = (db.select(*keys, pbin.label("pb"), cbin.label("cb"), func.count(Record.id).label("n"),
+                      func.coalesce(func.sum(Record.prob_enroll_pct), 0.0).label("sp"),
+                      func.coalesce(func.sum(Record.confidence), 0.0).label("sc"))
+            .where(Record.created_at.isnot(None)).group_by(*keys, pbin, cbin).subquery())
+    def count_if(cond):
+        return func.sum(db.case((cond, grid.c.n), else_=0))
+    day_keys = [grid.c.day] + [grid.c[k] for k in ROLLUP_KEYS]
+    sel = db.select(
+        *day_keys, func.sum(grid.c.n), count_if(grid.c.pb >= 0), func.sum(grid.c.sp),
+        count_if(grid.c.cb >= 0), func.sum(grid.c.sc),
+        *[count_if(grid.c.pb == k) for k in range(20)], *[count_if(grid.c.cb == k) for k in range(20)],
+        *[count_if(grid.c.pb.in_(heat_bins(i)) & grid.c.cb.in_(heat_bins(j))) for i in range(10) for j in range(10)],
+    ).group_by(*day_keys)
+    R.query.delete()
+    db.session.execute(db.insert(R).from_select(
+        ["day", *ROLLUP_KEYS, "n", "n_prob", "sum_prob", "n_conf", "sum_conf", *PROB_HIST, *CONF_HIST, *HEAT_CELLS], sel))
+    db.session.commit()
+    return R.query.count()
+
+def rollup_aggregates(since_day, program, region, HIGH_T, MED_T):
+    R = RecordDailyRollup
+    hb, mb = _threshold_bin(HIGH_T), _threshold_bin(MED_T)
+    q = R.query.filter(R.day >= since_day)
+    if program: q = q.filter(R.first_program == program)
+    if region:  q = q.filter(R.curr_region == region)
+
+    # 1) Summary, histograms and heat grid: column sums over the window
+    cols = PROB_HIST + CONF_HIST + HEAT_CELLS
+    sums = q.with_entities(func.sum(R.n), func.sum(R.sum_prob), func.sum(R.n_prob), func.sum(R.sum_conf), func.sum(R.n_conf),
+                           *[func.sum(getattr(R, c)) for c in cols]).one()
+    agg = empty_aggregates()
+    agg.update(n=int(sums[0] or 0), sp=float(sums[1] or 0), np=int(sums[2] or 0), sc=float(sums[3] or 0), nc=int(sums[4] or 0))
+    counts = dict(zip(cols, (int(v or 0) for v in sums[5:])))
+    agg["hist_prob"] = [counts[c] for c in PROB_HIST]
+    agg["hist_conf"] = [counts[c] for c in CONF_HIST]
+    agg["high"] = sum(agg["hist_prob"][hb:])
+    agg["med"] = sum(agg["hist_prob"][mb:hb])
+    agg["heat"] = {(i, j): counts[f"h{i}_{j}"] for i in range(10) for j in range(10) if counts[f"h{i}_{j}"]}
+
+    # 2) Trend, programs, regions, student type and local/foreign
+    def dim(kind, col):
+        return q.with_entities(
+            db.literal(kind).label("kind"), col.label("key"),
+            func.sum(R.n).label("n"), func.sum(R.sum_prob).label("sp"), func.sum(R.n_prob).label("np"),
+            func.sum(R.sum_conf).label("sc"), func.sum(R.n_conf).label("nc"),
+        ).group_by(col)
+    dim_rows = dim("trend", db.cast(R.day, db.String)).union_all(
+        dim("program", R.first_program), dim("region", R.curr_region),
+        dim("student_type", R.student_type), dim("local_foreign", R.local_or_foreign),
+    ).all()
+    return agg, dim_rows
+
+# ---------------- Record persistence ----------------
+WRITER = None  # RecordWriter when WRITE_BEHIND=1
+
+def save_records(mappings):
+    # one transaction: the records and their rollup increments
+    with stage("db_commit"):
+        db.session.bulk_insert_mappings(Record, mappings)
+        rollup_add(mappings)
+        db.session.commit()
+    ADMIN_CACHE.invalidate()
+    if FEED is not None: FEED.poke()
+
+def persist_records(mappings):
+    with stage("persist"):
+        if WRITER is not None:
+            mappings = WRITER.enqueue(mappings)  # whatever did not fit in the queue is written inline
+            if not mappings: return
+        save_records(mappings)
+
+def init_writer(app):
+    global WRITER
+    if os.getenv("WRITE_BEHIND", "0") != "1":
+        return
+    WRITER = RecordWriter(
+        app, save_records,
+        spool_dir=os.getenv("WRITE_SPOOL_DIR") or os.path.join(app.instance_path, "spool"),
+        batch_size=int(os.getenv("WRITE_BATCH_SIZE", "200")),
+        interval=float(os.getenv("WRITE_FLUSH_INTERVAL", "0.5")),
+        maxsize=int(os.getenv("WRITE_QUEUE_SIZE", "10000")),
+        put_timeout=float(os.getenv("WRITE_QUEUE_TIMEOUT", "2")),
+        fsync=os.getenv("WRITE_SPOOL_FSYNC", "0") == "1",
+    )
+    try:
+        n = WRITER.replay_orphans()
+        if n: print(f"[Write-behind] replayed {n} spooled records")
+    except Exception as e:
+        print(f"[Write-behind] spool replay failed: {e}")
+
+# ---------------- Re-scoring ----------------
+# input key -> stored Record column, for rebuilding the feature row of a stored record
+RESCORE_FIELDS = [
+    ("first program", "first_program"),
+    ("second program", "second_program"),
+    ("current region", "curr_region"),
+    ("current province", "curr_province"),
+    ("current city/municipality", "curr_city"),
+    ("permanent country", "per_country"),
+    ("permanent region", "per_region"),
+    ("permanent province", "per_province"),
+    ("permanent city/municipality", "per_city"),
+    ("student type", "student_type"),
+    ("school type", "school_type"),
+    ("dateofbirth", "date_of_birth"),
+]
+
+def stored_feature_row(payload, age):
+    # feature row of a stored record; age as it was when the applicant was first scored, not today
+    row, err = build_feature_row(payload)
+    if row is not None and age is not None:
+        row["Age"] = age
+    return row
+
+def record_payload(rec):
+    return {k: getattr(rec, col) or "" for k, col in RESCORE_FIELDS}
+
+def rescore_chunk(chunk):
+    """Score [(id, payload, age_years)] with the loaded ensemble; returns (update mappings, unscorable count).
+
+    Runs in pool workers forked after the models loaded, so MODELS is the parent's ensemble.
+    """
+    models = MODELS
+    ids, rows = [], []
+    for rid, payload, age in chunk:
+        row = stored_feature_row(payload, age)
+        if row is None: continue
+        ids.append(rid); rows.append(row)
+    if not rows:
+        return [], len(chunk)
+    if models["compiled"] is not None:
+        p, c = models["compiled"].predict(encode_matrix(rows, models))
+    else:
+        p, c = predict_with_stack_batch(encode_rows(rows, models), models)
+    out = [{"id": rid, "prob_enroll_pct": float(pi), "confidence": float(ci), "priority": float(pi * ci),
+            "model_version": models["version"], "oov_mask": oov_mask(row, models)}
+           for rid, row, pi, ci in zip(ids, rows, p, c)]
+    return out, len(chunk) - len(rows)
+
+def rescore_records(checkpoint, chunk=5000, workers=1, stale_only=False, restart=False, log=print):
+    """Re-score stored records with the serving ensemble in id order, resumably.
+
+    Chunks are read by keyset on id, scored in a process pool (workers > 1) and written back with
+    one bulk UPDATE per chunk; the checkpoint file records the last id written, so an interrupted
+    run continues where it stopped. The rollup is rebuilt at the end.
+    """
+    version = MODELS["version"]
+    state = {"version": version, "last_id": 0, "done": 0, "failed": 0, "finished": False}
+    if not restart and os.path.exists(checkpoint):
+        with open(checkpoint, encoding="utf-8") as f:
+            saved = json.load(f)
+        if saved.get("version") == version:
+            state = saved
+    if state["finished"]:
+        log(f"records already re-scored with {version} (use --restart to run again)")
+        return state
+
+    def select(q):
+        q = q.filter(Record.id > state["last_id"])
+        if stale_only:
+            q = q.filter(db.or_(Record.model_version.is_(None), Record.model_version != version))
+        return q
+
+    def save_state():
+        tmp = checkpoint + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp, checkpoint)
+
+    todo = select(Record.query).count()
+    cols = [Record.id, Record.age_years] + [getattr(Record, col) for _, col in RESCORE_FIELDS]
+    log(f"re-scoring {todo} records with {version} ({workers} workers, chunks of {chunk}); resuming after id {state['last_id']}"
+        if state["last_id"] else f"re-scoring {todo} records with {version} ({workers} workers, chunks of {chunk})")
+
+    def read_chunks():
+        last = state["last_id"]
+        while True:
+            q = select(Record.query.with_entities(*cols)).filter(Record.id > last)
+            rows = q.order_by(Record.id).limit(chunk).all()
+            if not rows: return
+            last = rows[-1][0]
+            yield last, [(r[0], {k: r[i + 2] or "" for i, (k, _) in enumerate(RESCORE_FIELDS)}, r[1]) for r in rows]
+
+    def write(last_id, result):
+        mappings, failed = result
+        if mappings:
+            db.session.execute(db.update(Record), mappings)
+        db.session.commit()
+        state.update(last_id=last_id, done=state["done"] + len(mappings), failed=state["failed"] + failed)
+        save_state()
+
+    t0, n0 = time.perf_counter(), state["done"] + state["failed"]
+    def progress():
+        n = state["done"] + state["failed"] - n0
+        rate = n / max(time.perf_counter() - t0, 1e-9)
+        log(f"  {n}/{todo} records, {rate:,.0f} rows/s, last id {state['last_id']}")
+        return rate
+
+    os.makedirs(os.path.dirname(checkpoint) or ".", exist_ok=True)
+    if workers <= 1:
+        for last_id, rows in read_chunks():
+            write(last_id, rescore_chunk(rows))
+            progress()
+    else:
+        # keep a few chunks in flight; results are written oldest first so the checkpoint only ever moves forward
+        with multiprocessing.get_context("fork").Pool(workers) as pool:
+            pending = deque()
+            for last_id, rows in read_chunks():
+                pending.append((last_id, pool.apply_async(rescore_chunk, (rows,))))
+                if len(pending) >= workers * 2:
+                    last, res = pending.popleft()
+                    write(last, res.get())
+                    progress()
+            while pending:
+                last, res = pending.popleft()
+                write(last, res.get())
+                progress()
+
+    state["finished"] = True
+    state["rows_per_s"] = round((state["done"] + state["failed"] - n0) / max(time.perf_counter() - t0, 1e-9), 1)
+    save_state()
+    rebuild_rollup()
+    ADMIN_CACHE.invalidate()
+    log(f"done: {state['done']} re-scored, {state['failed']} without a usable feature row, {state['rows_per_s']:,} rows/s")
+    return state
+
+# ---------------- Live feed ----------------
+FEED = None
+
+THRESHOLDS = (0.75, 0.50)  # (HIGH_THRESHOLD, MEDIUM_THRESHOLD), parsed once by init_thresholds
+
+def init_thresholds():
+    # a malformed value stops startup instead of failing every dashboard request
+    global THRESHOLDS
+    try:
+        THRESHOLDS = (float(os.getenv("HIGH_THRESHOLD", "0.75")), float(os.getenv("MEDIUM_THRESHOLD", "0.50")))
+    except ValueError as e:
+        raise RuntimeError(f"HIGH_THRESHOLD / MEDIUM_THRESHOLD must be numbers: {e}")
+
+def queue_of(prob, conf, HIGH_T, MED_T):
+    # same rules as the queues in /api/admin/metrics
+    if prob is None: return None
+    if prob >= HIGH_T and (conf or 0) >= 0.8: return "call_now"
+    if prob >= MED_T and prob < HIGH_T: return "warm"
+    if prob < MED_T: return "nurture"
+    return None
+
+def feed_fetch(after_id, limit=500):
+    HIGH_T, MED_T = THRESHOLDS
+    rows = (Record.query.with_entities(
+                Record.id, Record.first_program, Record.student_type, Record.curr_region,
+                Record.prob_enroll_pct, Record.confidence, Record.model_version, Record.created_at)
+            .filter(Record.id > after_id).order_by(Record.id).limit(limit).all())
+    out = []
+    for r in rows:
+        prob, conf = float(r.prob_enroll_pct or 0), float(r.confidence or 0)
+        out.append({
+            "id": r.id, "first_program": r.first_program, "student_type": r.student_type,
+            "curr_region": r.curr_region, "prob": prob, "conf": conf, "priority": prob * conf,
+            "bucket": "H" if prob >= HIGH_T else "M" if prob >= MED_T else "L",
+            "queue": queue_of(r.prob_enroll_pct, r.confidence, HIGH_T, MED_T),
+            "model_version": r.model_version,
+            "created_at": r.created_at.isoformat() if r.created_at else None,
+        })
+    return out
+
+def feed_latest_id():
+    return db.session.query(func.max(Record.id)).scalar() or 0
+
+def feed_delta(records):
+    # increments for the dashboard's summary cards, bucket counts and review queue sizes
+    # (each record also carries its "queue", for clients that merge it into the queue lists by priority)
+    return {
+        "n": len(records),
+        "sum_prob": sum(r["prob"] for r in records),
+        "sum_conf": sum(r["conf"] for r in records),
+        "high": sum(r["bucket"] == "H" for r in records),
+        "med": sum(r["bucket"] == "M" for r in records),
+        "low": sum(r["bucket"] == "L" for r in records),
+        "queues": {q: sum(r["queue"] == q for r in records) for q in ("call_now", "warm", "nurture")},
+    }
+
+def sse_max_clients():
+    # each stream pins a gunicorn thread for up to SSE_MAX_SECONDS; always leave one for /api/predict
+    ceiling = max(int(os.getenv("GUNICORN_THREADS", "4")) - 1, 0)
+    return min(int(os.getenv("SSE_MAX_CLIENTS") or ceiling), ceiling)
+
+def init_feed(app):
+    global FEED
+    FEED = LiveFeed(app, feed_fetch, feed_latest_id,
+                    poll_interval=float(os.getenv("SSE_POLL_INTERVAL", "1")),
+                    heartbeat=float(os.getenv("SSE_HEARTBEAT", "15")))
+
+# ---------------- Metrics ----------------
+def runtime_metrics():
+    # read at scrape time: cache counters, artifact load times, queue depths
+    out = []
+    for name, cache in (("admin", ADMIN_CACHE), ("prediction", PREDICTION_CACHE)):
+        st = cache.stats()
+        out += [("counter", "admissions_cache_hits_total", {"cache": name}, st["hits"]),
+                ("counter", "admissions_cache_misses_total", {"cache": name}, st["misses"]),
+                ("gauge", "admissions_cache_entries", {"cache": name}, st["size"])]
+    for name, st in ARTIFACT_STATS.items():
+        out.append(("gauge", "admissions_model_artifact_load_seconds", {"artifact": name}, st["seconds"]))
+    out.append(("gauge", "admissions_models_loaded", {}, MODELS_LOADED))
+    if WRITER is not None:
+        out.append(("gauge", "admissions_write_queue_depth", {}, WRITER.pending()))
+    if FEED is not None:
+        out.append(("gauge", "admissions_live_feed_subscribers", {}, FEED.subscribers))
+    if BATCHER is not None:
+        out.append(("gauge", "admissions_predict_batch_queue_depth", {}, BATCHER.queue.qsize()))
+    return out
+
+METRICS.collectors.append(runtime_metrics)
+METRICS.describe("admissions_cache_hits_total", "counter", "Cache hits.")
+METRICS.describe("admissions_cache_misses_total", "counter", "Cache misses.")
+METRICS.describe("admissions_cache_entries", "gauge", "Entries held by this worker's cache.")
+METRICS.describe("admissions_model_artifact_load_seconds", "gauge", "Time the last load of each model artifact took.")
+METRICS.describe("admissions_models_loaded", "gauge", "1 when this worker has an ensemble to serve.")
+METRICS.describe("admissions_write_queue_depth", "gauge", "Records waiting in this worker's write-behind queue.")
+METRICS.describe("admissions_live_feed_subscribers", "gauge", "Open /api/admin/stream connections in this worker.")
+METRICS.describe("admissions_predict_batch_queue_depth", "gauge", "/api/predict calls waiting for the micro-batcher.")
+
+def metrics_dir():
+    return os.getenv("METRICS_DIR") or None
+
+def cached_json(key, payload):
+    ADMIN_CACHE.put(key, payload)
+    return jsonify(payload)
+
+def warm_ensemble(models):
+    # test rows come from this ensemble's own tokens, not from the ones currently served
+    options = token_options(models["tokens"] or {})
+    tokens = {k:(v[0] if isinstance(v,list) and v else '') for k,v in options.items()}
     payload = {
         "first program": tokens.get("first program","bsit"),
         "second program": tokens.get("second program",""),
@@ -344,20 +1402,89 @@ def smoke_test_prediction(app):
         "school type": "public",
         "dateofbirth": "2005-01-01",
     }
-    try:
+    row, err = build_feature_row(payload)
+    if err: return False
+    # parity verdicts depend only on the artifacts; a startup snapshot carries them, so only missing ones are rerun
+    checks = dict(models["checks"] or {})
+    if "encoder" not in checks:
+        # the compiled encoder must match the get_dummies reference exactly, else fall back to it
+        checks["encoder"] = models["encoder"] is None or encoder_matches(models, [row, unseen_row(row)] + parity_rows(options))
+    if not checks["encoder"] and models["encoder"] is not None:
+        print("[Encoder] compiled encoder disagrees with get_dummies; using reference path")
+        models["encoder"] = None
+    prob, conf = predict_with_stack(encode_rows([row], models), models)
+    if "compiled" not in checks:
+        checks["compiled"] = models["compiled"] is None or bool(compiled_matches(models, [row] + parity_rows(options)))
+    if not checks["compiled"] and models["compiled"] is not None:
+        print("[Compile] compiled kernel disagrees with predict_proba; using library path")
+        models["compiled"] = None
+    if "explainer" not in checks:
+        checks["explainer"] = models["explainer"] is None or explainer_matches(models, [row] + parity_rows(options, 8))
+    if not checks["explainer"] and models["explainer"] is not None:
+        print("[Explain] attributions do not add up to the served probability; explanations disabled")
+        models["explainer"] = None
+    models["checks"] = checks
+    return 0 <= prob <= 1 and 0 <= conf <= 1
+
+def parity_rows(options, n=32):
+    # deterministic spread over the known tokens so the trees are exercised beyond the smoke row
+    rows = []
+    for i in range(n):
+        payload = {k: (v[(i * 7 + j) % len(v)] if isinstance(v, list) and v else '')
+                   for j, (k, v) in enumerate(options.items())}
+        payload["dateofbirth"] = f"{1995 + i % 12}-0{1 + i % 9}-15"
         row, err = build_feature_row(payload)
-        if err: return
-        enc = encode_row_to_training(pd.DataFrame([row]))
-        prob, conf = predict_with_stack(enc)
-        assert 0 <= prob <= 1 and 0 <= conf <= 1
-    except Exception:
-        pass
-    
+        if not err: rows.append(row)
+    return rows
+
+def unseen_row(row):
+    # every categorical field out of vocabulary, so each one-hot group encodes to all zeros
+    return {k: (f"unseen {k.lower()}" if isinstance(v, str) else v) for k, v in row.items()}
+
+def encoder_matches(models, rows):
+    ref = encode_row_to_training(pd.DataFrame(rows), models)
+    return bool(np.array_equal(encode_matrix(rows, models), ref.to_numpy(dtype=float)))
+
+def compiled_matches(models, rows, tol=1e-6):
+    X = encode_matrix(rows, models)
+    p_ref, c_ref = predict_with_stack_batch(pd.DataFrame(X, columns=pd.Index(models["training_columns"])), models)
+    p, c = models["compiled"].predict(X)
+    return np.allclose(p, p_ref, rtol=0, atol=tol) and np.allclose(c, c_ref, rtol=0, atol=tol)
+
+def explainer_matches(models, rows, tol=1e-6):
+    # the explanation must describe the probability we serve: baseline + all contributions = prob
+    X = encode_matrix(rows, models)
+    p_ref, _ = predict_with_stack_batch(pd.DataFrame(X, columns=pd.Index(models["training_columns"])), models)
+    explainer = models["explainer"]
+    for x, p in zip(X, p_ref):
+        e = explainer.explain(x, top=len(explainer.features))
+        if abs(e["prob"] - p) > tol or abs(e["baseline"] + sum(t["contribution"] for t in e["top"]) - p) > tol:
+            return False
+    return True
+
+def explain_row(row, top=5):
+    models = MODELS
+    if models["explainer"] is None:
+        return None
+    key = (row_cache_key(row, models), top)
+    hit = EXPLAIN_CACHE.get(key)
+    if hit is None:
+        with stage("explain"):
+            hit = models["explainer"].explain(encode_matrix([row], models)[0], row, top)
+        hit["model_version"] = models["version"]
+        EXPLAIN_CACHE.put(key, hit)
+    return hit
+
+def admin_authorized():
+    # a logged-in admin session, or X-Admin-Token matching ADMIN_API_TOKEN for scripts
+    token = os.getenv("ADMIN_API_TOKEN")
+    return bool(session.get("is_admin") or (token and request.headers.get("X-Admin-Token") == token))
+
+def register_admin_routes(app):
     @app.get("/api/admin/metrics")
     def admin_metrics():
         
-        HIGH_T = float(os.getenv("HIGH_THRESHOLD", "0.75"))
-        MED_T  = float(os.getenv("MEDIUM_THRESHOLD", "0.50"))
+        HIGH_T, MED_T = THRESHOLDS
 
         try:
             days     = int(request.args.get("days", 30))
@@ -369,23 +1496,23 @@ def smoke_test_prediction(app):
         except Exception:
             return jsonify({"ok": False, "error": "bad_params"}), 400
 
-        since = datetime.utcnow() - timedelta(days=days)
-
-        q = Record.query.filter(Record.created_at >= since)
-        if program:  q = q.filter(Record.first_program == program)
-        if region:   q = q.filter(Record.curr_region == region)
-        if min_conf > 0: q = q.filter(Record.confidence >= min_conf)
-
-        if bucket == "H":
-            q = q.filter(Record.prob_enroll_pct >= HIGH_T)
-        elif bucket == "M":
-            q = q.filter(Record.prob_enroll_pct >= MED_T, Record.prob_enroll_pct < HIGH_T)
-        elif bucket == "L":
-            q = q.filter(Record.prob_enroll_pct < MED_T)
-
-        total = q.count()
+        cache_key = ("metrics", days, program, region, bucket, min_conf, sampleN, HIGH_T, MED_T)
+        hit = ADMIN_CACHE.get(cache_key)
+        if hit is not None:
+            return jsonify(hit)
+
+        # Aggregates come from the daily rollup when the filters line up with its bins, else from raw records
+        if rollup_enabled() and rollup_compatible(bucket, min_conf, HIGH_T, MED_T):
+            since = datetime.combine((datetime.utcnow() - timedelta(days=days)).date(), datetime.min.time())
+            agg, dim_rows = rollup_aggregates(since.date(), program, region, HIGH_T, MED_T)
+        else:
+            since = None
+            agg, dim_rows = raw_aggregates(filtered_records(days, program, region, bucket, min_conf, HIGH_T, MED_T), HIGH_T, MED_T)
+        q = filtered_records(days, program, region, bucket, min_conf, HIGH_T, MED_T, since=since)
+
+        total = agg["n"]
         if total == 0:
-            return jsonify({
+            return cached_json(cache_key, {
                 "ok": True,
                 "summary": {"n": 0, "avg_prob": 0, "avg_conf": 0, "high": 0, "med": 0, "low": 0},
                 "trend": [],
@@ -403,78 +1530,34 @@ def smoke_test_prediction(app):
                 "thresholds": {"high": HIGH_T, "medium": MED_T},
             })
 
-        # Summary
-        avg_prob = float(q.with_entities(func.avg(Record.prob_enroll_pct)).scalar() or 0)
-        avg_conf = float(q.with_entities(func.avg(Record.confidence)).scalar() or 0)
-        high = q.filter(Record.prob_enroll_pct >= HIGH_T).count()
-        med  = q.filter(Record.prob_enroll_pct >= MED_T, Record.prob_enroll_pct < HIGH_T).count()
+        avg_prob = agg["sp"] / agg["np"] if agg["np"] else 0.0
+        avg_conf = agg["sc"] / agg["nc"] if agg["nc"] else 0.0
+        high, med = agg["high"], agg["med"]
         low  = total - high - med
 
-        # Trend by date
-        trend_rows = (q.with_entities(
-            func.date(Record.created_at).label("d"),
-            func.avg(Record.prob_enroll_pct).label("avg_prob"),
-            func.avg(Record.confidence).label("avg_conf"),
-            func.count(Record.id).label("n"),
-        ).group_by(func.date(Record.created_at)).order_by(func.date(Record.created_at)).all())
-        trend = [{"date": str(r.d), "avg_prob": float(r.avg_prob or 0), "avg_conf": float(r.avg_conf or 0), "count": int(r.n)} for r in trend_rows]
-
-        # Programs breakdown (first choice)
-        prog_rows = (q.with_entities(
-            Record.first_program,
-            func.count(Record.id).label("n"),
-            func.avg(Record.prob_enroll_pct).label("avg_prob"),
-            func.avg(Record.confidence).label("avg_conf"),
-        ).group_by(Record.first_program).order_by(desc("n")).limit(50).all())
-        programs = [{"program": r.first_program, "count": int(r.n), "avg_prob": float(r.avg_prob or 0), "avg_conf": float(r.avg_conf or 0)} for r in prog_rows]
-
-        # Regions breakdown (current)
-        reg_rows = (q.with_entities(
-            Record.curr_region,
-            func.count(Record.id).label("n")
-        ).group_by(Record.curr_region).order_by(desc("n")).limit(25).all())
-        regions = [{"region": r.curr_region, "count": int(r.n)} for r in reg_rows]
-
-        # Student type / Local-foreign splits
-        st_rows = (q.with_entities(Record.student_type, func.count(Record.id))).group_by(Record.student_type).all()
-        lf_rows = (q.with_entities(Record.local_or_foreign, func.count(Record.id))).group_by(Record.local_or_foreign).all()
-        student_type = [{"type": (a or "unknown"), "count": int(b)} for a, b in st_rows]
-        local_foreign = [{"type": (a or "unknown"), "count": int(b)} for a, b in lf_rows]
-
-        # Pull small set of columns for histograms & heatmap & queues
-        rows = q.with_entities(
-            Record.prob_enroll_pct, Record.confidence, Record.first_program,
-            Record.student_type, Record.curr_region, Record.created_at
-        ).all()
-
-        # Histograms (20 bins)
-        def hist(vals, bins=20):
-            out = [0]*bins
-            for v in vals:
-                if v is None: continue
-                i = int(v * bins)
-                if i == bins: i = bins-1
-                out[i] += 1
-            return out
-
-        hist_prob = hist([r.prob_enroll_pct for r in rows], 20)
-        hist_conf = hist([r.confidence for r in rows], 20)
-
-        # Heatmap as bubble points on 10x10 grid (size ~ count)
-        grid = {}
-        for r in rows:
-            p = r.prob_enroll_pct or 0.0
-            c = r.confidence or 0.0
-            i = min(int(p * 10), 9)
-            j = min(int(c * 10), 9)
-            grid[(i, j)] = grid.get((i, j), 0) + 1
-        heat = [{"x": (i+0.5)*10, "y": (j+0.5)*10, "count": cnt} for (i, j), cnt in grid.items()]  # 0..100 axes
-
-        # Prioritized list (topN by prob*conf)
+        # Histograms (20 bins; NULLs skipped) and heatmap as bubble points on 10x10 grid (NULL counts as 0)
+        hist_prob, hist_conf = agg["hist_prob"], agg["hist_conf"]
+        heat = [{"x": (i+0.5)*10, "y": (j+0.5)*10, "count": cnt} for (i, j), cnt in sorted(agg["heat"].items())]  # 0..100 axes
+
+        by_kind = {}
+        for r in dim_rows:
+            by_kind.setdefault(r.kind, []).append(r)
+        def avg(total_, n): return float(total_ or 0) / int(n) if n else 0.0
+
+        trend = [{"date": str(r.key), "avg_prob": avg(r.sp, r.np), "avg_conf": avg(r.sc, r.nc), "count": int(r.n)}
+                 for r in sorted(by_kind.get("trend", []), key=lambda r: str(r.key))]
+        prog_rows = sorted(by_kind.get("program", []), key=lambda r: -int(r.n))[:50]
+        programs = [{"program": r.key or None, "count": int(r.n), "avg_prob": avg(r.sp, r.np), "avg_conf": avg(r.sc, r.nc)} for r in prog_rows]
+        reg_rows = sorted(by_kind.get("region", []), key=lambda r: -int(r.n))[:25]
+        regions = [{"region": r.key or None, "count": int(r.n)} for r in reg_rows]
+        student_type = [{"type": (r.key or "unknown"), "count": int(r.n)} for r in by_kind.get("student_type", [])]
+        local_foreign = [{"type": (r.key or "unknown"), "count": int(r.n)} for r in by_kind.get("local_foreign", [])]
+
+        # 3) Prioritized list (topN by prob*conf), read down ix_records_priority_id
         top_rows = (q.with_entities(
             Record.id, Record.first_program, Record.student_type, Record.curr_region,
             Record.prob_enroll_pct, Record.confidence, Record.created_at
-        ).order_by(desc(Record.prob_enroll_pct * Record.confidence)).limit(sampleN).all())
+        ).order_by(desc(Record.priority), desc(Record.id)).limit(sampleN).all())
         top = [{
             "id": r.id,
             "first_program": r.first_program,
@@ -486,30 +1569,31 @@ def smoke_test_prediction(app):
             "created_at": r.created_at.isoformat() if r.created_at else None,
         } for r in top_rows]
 
-        # Queues
-        call_now_rows = (q.filter(Record.prob_enroll_pct >= HIGH_T, Record.confidence >= 0.8)
-                        .order_by(desc(Record.prob_enroll_pct * Record.confidence)).limit(10).all())
-        warm_rows = (q.filter(Record.prob_enroll_pct >= MED_T, Record.prob_enroll_pct < HIGH_T)
-                        .order_by(desc(Record.prob_enroll_pct)).limit(10).all())
-        nurture_rows = (q.filter(Record.prob_enroll_pct < MED_T)
-                        .order_by(desc(Record.prob_enroll_pct)).limit(10).all())
+        # 4) Queues: first 10 of each queue, each an index-ordered LIMIT 10 (priority for call_now, prob for the others)
+        queue_filters = {
+            "call_now": ((Record.prob_enroll_pct >= HIGH_T, Record.confidence >= 0.8), Record.priority),
+            "warm": ((Record.prob_enroll_pct >= MED_T, Record.prob_enroll_pct < HIGH_T), Record.prob_enroll_pct),
+            "nurture": ((Record.prob_enroll_pct < MED_T,), Record.prob_enroll_pct),
+        }
         def row_min(r):
             return {
                 "first_program": r.first_program, "student_type": r.student_type,
                 "curr_region": r.curr_region, "prob": float(r.prob_enroll_pct or 0),
                 "conf": float(r.confidence or 0), "created_at": r.created_at.isoformat() if r.created_at else None
             }
-        queues = {
-            "call_now":   [row_min(r) for r in call_now_rows],
-            "warm":       [row_min(r) for r in warm_rows],
-            "nurture":    [row_min(r) for r in nurture_rows],
-        }
+        queues = {}
+        for name, (conds, rank_col) in queue_filters.items():
+            rows = (q.filter(*conds).with_entities(
+                Record.first_program, Record.student_type, Record.curr_region,
+                Record.prob_enroll_pct, Record.confidence, Record.created_at,
+            ).order_by(desc(rank_col), desc(Record.id)).limit(10).all())
+            queues[name] = [row_min(r) for r in rows]
 
         # Tokens (for filter dropdowns)
         program_tokens = [p["program"] for p in programs]
         region_tokens  = [r["region"] for r in regions]
 
-        return jsonify({
+        return cached_json(cache_key, {
             "ok": True,
             "summary": {"n": total, "avg_prob": avg_prob, "avg_conf": avg_conf, "high": high, "med": med, "low": low},
             "trend": trend,
@@ -528,11 +1612,90 @@ def smoke_test_prediction(app):
         })
 
 
+    @app.get("/api/admin/stream")
+    def admin_stream():
+        # text/event-stream of newly scored records matching the dashboard filters, with summary deltas
+        try:
+            program  = (request.args.get("program") or "").strip().lower()
+            region   = (request.args.get("region") or "").strip().lower()
+            bucket   = (request.args.get("bucket") or "").strip().upper()
+            min_conf = float(request.args.get("min_conf", 0.0))
+            last = request.headers.get("Last-Event-ID") or request.args.get("last_id")
+            cursor = int(last) if last else None
+        except Exception:
+            return jsonify({"ok": False, "error": "bad_params"}), 400
+        if FEED.subscribers >= sse_max_clients():
+            # each stream holds a worker thread; EventSource retries on its own
+            return jsonify({"ok": False, "error": "too_many_streams"}), 503, {"Retry-After": "10"}
+
+        def match(r):
+            return ((not program or r["first_program"] == program) and (not region or r["curr_region"] == region)
+                    and (not bucket or r["bucket"] == bucket) and r["conf"] >= min_conf)
+
+        frames = FEED.stream(cursor, match, feed_delta, max_seconds=float(os.getenv("SSE_MAX_SECONDS", "300")))
+        return Response(frames, mimetype="text/event-stream",
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+    @app.get("/api/admin/record/<int:record_id>")
+    def admin_record(record_id):
+        # details for the dashboard drawer, with the top contributing features under the serving ensemble
+        if not admin_authorized():
+            return jsonify({"ok": False, "error": "forbidden"}), 403
+        rec = db.session.get(Record, record_id)
+        if rec is None:
+            return jsonify({"ok": False, "error": "not_found"}), 404
+        row = stored_feature_row(record_payload(rec), rec.age_years)
+        return jsonify({"ok": True, "record": {
+            "id": rec.id, "first_program": rec.first_program, "second_program": rec.second_program,
+            "student_type": rec.student_type, "school_type": rec.school_type, "curr_region": rec.curr_region,
+            "curr_province": rec.curr_province, "curr_city": rec.curr_city,
+            "prob": rec.prob_enroll_pct, "conf": rec.confidence, "priority": rec.priority,
+            "model_version": rec.model_version, "oov": oov_names(rec.oov_mask or 0),
+            "created_at": rec.created_at.isoformat() if rec.created_at else None,
+            "explanation": explain_row(row) if row is not None else None,
+        }})
+
+    @app.get("/api/admin/oov")
+    def admin_oov():
+        # out-of-vocabulary rate per input field and day, from the flags stored at prediction time
+        try:
+            days = int(request.args.get("days", 30))
+        except Exception:
+            return jsonify({"ok": False, "error": "bad_params"}), 400
+        cache_key = ("oov", days)
+        hit = ADMIN_CACHE.get(cache_key)
+        if hit is not None:
+            return jsonify(hit)
+
+        day = func.date(Record.created_at)
+        cols = [day.label("day"), func.count(Record.id).label("n"), func.count(Record.oov_mask).label("checked")]
+        cols += [func.sum(db.case((Record.oov_mask.op("&")(1 << bit) != 0, 1), else_=0)).label(f"f{bit}")
+                 for bit in range(len(OOV_FIELDS))]
+        since = datetime.utcnow() - timedelta(days=days)
+        rows = db.session.query(*cols).filter(Record.created_at >= since).group_by(day).order_by(day).all()
+
+        keys = [key for _, key in OOV_FIELDS]
+        by_day, totals, checked = [], [0] * len(keys), 0
+        for r in rows:
+            counts = [int(getattr(r, f"f{bit}") or 0) for bit in range(len(keys))]
+            by_day.append({"date": str(r.day), "n": int(r.n), "checked": int(r.checked),
+                           "oov": {k: c for k, c in zip(keys, counts) if c},
+                           "oov_rate": {k: (c / int(r.checked) if r.checked else 0.0) for k, c in zip(keys, counts)}})
+            totals = [t + c for t, c in zip(totals, counts)]
+            checked += int(r.checked)
+        return cached_json(cache_key, {
+            "ok": True,
+            "days": days,
+            "fields": keys,
+            "checked": checked,
+            "totals": {k: {"count": c, "rate": (c / checked if checked else 0.0)} for k, c in zip(keys, totals)},
+            "by_day": by_day,
+        })
+
     @app.get("/api/admin/table")
     def admin_table():
     
-        HIGH_T = float(os.getenv("HIGH_THRESHOLD", "0.75"))
-        MED_T  = float(os.getenv("MEDIUM_THRESHOLD", "0.50"))
+        HIGH_T, MED_T = THRESHOLDS
 
         try:
             days = int(request.args.get("days", 30))
@@ -544,37 +1707,33 @@ def smoke_test_prediction(app):
             page_size = min(max(int(request.args.get("page_size", 25)), 1), 200)
             sort = (request.args.get("sort") or "priority").strip().lower()
             direction = (request.args.get("dir") or "desc").strip().lower()
+            after = request.args.get("after") or ""
         except Exception:
             return jsonify({"ok": False, "error": "bad_params"}), 400
 
-        since = datetime.utcnow() - timedelta(days=days)
-        q = Record.query.filter(Record.created_at >= since)
-        if program: q = q.filter(Record.first_program == program)
-        if region:  q = q.filter(Record.curr_region == region)
-        if min_conf > 0: q = q.filter(Record.confidence >= min_conf)
-        if bucket == "H":
-            q = q.filter(Record.prob_enroll_pct >= HIGH_T)
-        elif bucket == "M":
-            q = q.filter(Record.prob_enroll_pct >= MED_T, Record.prob_enroll_pct < HIGH_T)
-        elif bucket == "L":
-            q = q.filter(Record.prob_enroll_pct < MED_T)
-
-        # Sorting
-        sort_map = {
-            "priority": Record.prob_enroll_pct * Record.confidence,
-            "prob": Record.prob_enroll_pct,
-            "conf": Record.confidence,
-            "created_at": Record.created_at,
-        }
-        col = sort_map.get(sort, sort_map["priority"])
-        col = col.desc() if direction == "desc" else col.asc()
+        cache_key = ("table", days, program, region, bucket, min_conf, page, page_size, sort, direction, after, HIGH_T, MED_T)
+        hit = ADMIN_CACHE.get(cache_key)
+        if hit is not None:
+            return jsonify(hit)
 
-        total = q.count()
-        rows = (q.with_entities(
+        q = filtered_records(days, program, region, bucket, min_conf, HIGH_T, MED_T)
+
+        sort, direction, col, order = table_order(sort, direction)
+
+        cols = q.with_entities(
             Record.id, Record.first_program, Record.student_type, Record.curr_region,
-            Record.prob_enroll_pct, Record.confidence, Record.created_at
-        ).order_by(col)
-        .offset((page-1)*page_size).limit(page_size).all())
+            Record.prob_enroll_pct, Record.confidence, Record.priority, Record.created_at
+        ).order_by(*order)
+        if after:
+            # keyset mode: seek past the cursor on the (sort column, id) index; no COUNT, no OFFSET
+            cursor = decode_cursor(after, sort, direction)
+            if cursor is None:
+                return jsonify({"ok": False, "error": "bad_cursor"}), 400
+            rows = keyset_page(cols, col, cursor, direction, page_size)
+            total = None
+        else:
+            total = q.count()
+            rows = cols.offset((page-1)*page_size).limit(page_size).all()
 
         out = [{
             "id": r.id,
@@ -587,7 +1746,101 @@ def smoke_test_prediction(app):
             "created_at": r.created_at.isoformat() if r.created_at else None,
         } for r in rows]
 
-        return jsonify({"ok": True, "total": total, "page": page, "page_size": page_size, "rows": out})
+        next_cursor = encode_cursor(rows[-1], sort, direction) if len(rows) == page_size else None
+        if after:
+            return cached_json(cache_key, {"ok": True, "page_size": page_size, "rows": out, "next": next_cursor})
+        return cached_json(cache_key, {"ok": True, "total": total, "page": page, "page_size": page_size, "rows": out, "next": next_cursor})
+
+    @app.get("/api/admin/export")
+    @app.get("/api/admin/export.<fmt>")
+    def admin_export(fmt=None):
+        # same filters and sort as /api/admin/table, streamed in yield_per chunks so memory stays flat
+        if not admin_authorized():
+            return jsonify({"ok": False, "error": "forbidden"}), 403
+        HIGH_T, MED_T = THRESHOLDS
+        try:
+            days = int(request.args.get("days", 30))
+            program = (request.args.get("program") or "").strip().lower()
+            region  = (request.args.get("region") or "").strip().lower()
+            bucket  = (request.args.get("bucket") or "").strip().upper()
+            min_conf = float(request.args.get("min_conf", 0.0))
+            sort = (request.args.get("sort") or "priority").strip().lower()
+            direction = (request.args.get("dir") or "desc").strip().lower()
+            fmt = (fmt or request.args.get("format") or "csv").strip().lower()
+        except Exception:
+            return jsonify({"ok": False, "error": "bad_params"}), 400
+        if fmt not in ("csv", "parquet"):
+            return jsonify({"ok": False, "error": "bad_format", "message": "format must be csv or parquet"}), 400
+        if fmt == "parquet" and pq is None:
+            return jsonify({"ok": False, "error": "parquet_unavailable", "message": "install pyarrow for Parquet export"}), 501
+
+        _, _, _, order = table_order(sort, direction)
+        q = (filtered_records(days, program, region, bucket, min_conf, HIGH_T, MED_T)
+             .with_entities(*[getattr(Record, c) for c in EXPORT_COLUMNS])
+             .order_by(*order)
+             .yield_per(EXPORT_CHUNK))
+        chunks = export_csv(q) if fmt == "csv" else export_parquet(q)
+        name = f"records-{datetime.utcnow():%Y%m%d-%H%M%S}.{fmt}"
+        mimetype = "text/csv" if fmt == "csv" else "application/vnd.apache.parquet"
+        return Response(stream_with_context(chunks), mimetype=mimetype,
+                        headers={"Content-Disposition": f'attachment; filename="{name}"', "Cache-Control": "no-store"})
+
+# --------------- Export ---------------
+EXPORT_COLUMNS = [
+    "id", "created_at", "first_program", "second_program", "curr_region", "curr_province", "curr_city",
+    "per_country", "per_region", "per_province", "per_city", "student_type", "school_type", "age_years",
+    "local_or_foreign", "prob_enroll_pct", "confidence", "priority", "model_version",
+]
+EXPORT_CHUNK = int(os.getenv("EXPORT_CHUNK", "2000"))
+EXPORT_SCHEMA = pa.schema([
+    (c, pa.int64() if c in ("id", "age_years") else pa.float64() if c in ("prob_enroll_pct", "confidence", "priority")
+     else pa.timestamp("us") if c == "created_at" else pa.string())
+    for c in EXPORT_COLUMNS
+]) if pa is not None else None
+
+def _batches(rows, size):
+    batch = []
+    for r in rows:
+        batch.append(r)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch: yield batch
+
+def export_csv(q):
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    w.writerow(EXPORT_COLUMNS)
+    for batch in _batches(q, EXPORT_CHUNK):
+        w.writerows([v.isoformat() if isinstance(v, datetime) else v for v in r] for r in batch)
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0); buf.truncate()
+    if buf.tell(): yield buf.getvalue().encode("utf-8")
+
+class _ChunkSink:
+    # write-only file object for ParquetWriter; the bytes written so far are taken out after every row group
+    closed = False
+    def __init__(self): self.parts, self.pos = [], 0
+    def write(self, b): self.parts.append(bytes(b)); self.pos += len(b); return len(b)
+    def tell(self): return self.pos
+    def flush(self): pass
+    def close(self): self.closed = True
+    def writable(self): return True
+    def take(self):
+        out, self.parts = b"".join(self.parts), []
+        return out
+
+def export_parquet(q):
+    sink = _ChunkSink()
+    writer = None
+    for batch in _batches(q, EXPORT_CHUNK):
+        table = pa.Table.from_pylist([dict(zip(EXPORT_COLUMNS, r)) for r in batch], schema=EXPORT_SCHEMA)
+        if writer is None: writer = pq.ParquetWriter(sink, EXPORT_SCHEMA, compression="zstd")
+        writer.write_table(table)
+        yield sink.take()
+    if writer is None: writer = pq.ParquetWriter(sink, EXPORT_SCHEMA, compression="zstd")
+    writer.close()
+    yield sink.take()
 
 # --------------- App Factory ---------------
 def create_app():
@@ -598,11 +1851,14 @@ def create_app():
     app.config["SECRET_KEY"] = os.getenv("SECRET_KEY","nu-lipa-secret")
     app.config["SQLALCHEMY_DATABASE_URI"] = os.getenv("DATABASE_URL","sqlite:///database.db")
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = sqlite_engine_options(app.config["SQLALCHEMY_DATABASE_URI"])
     app.config["SESSION_TYPE"] = "filesystem"
 
     Session(app)
     db.init_app(app)
     with app.app_context():
+        install_sqlite_profile(db.engine)
+        install_query_timer(db.engine)
         db.create_all()
 
         # seed admin
@@ -617,12 +1873,148 @@ def create_app():
                 u.set_password(pwd)
                 db.session.add(u); db.session.commit()
 
+        migrate_schema()
+
+        # databases created before the rollup existed: build it once from the raw records
+        if RecordDailyRollup.query.first() is None and Record.query.first() is not None:
+            rebuild_rollup()
+
+    # records spooled by a write-behind process that died before flushing them are inserted here
+    init_writer(app)
+    init_feed(app)
+    init_batcher()
+    init_snapshots(app)
+    init_thresholds()
+
+    @app.cli.command("models-list")
+    def models_list_command():
+        """List versioned model directories and the active one."""
+        root = model_root(app)
+        _, current = resolve_model_dir(root)
+        for v in list_model_versions(root):
+            print(("* " if v == current else "  ") + v)
+
+    @app.cli.command("models-activate")
+    @click.argument("version")
+    def models_activate_command(version):
+        """Point CURRENT at VERSION; running workers hot-swap to it within MODEL_WATCH_INTERVAL."""
+        activate_model_version(model_root(app), version)
+        print(f"CURRENT -> {version}")
+
+    @app.cli.command("rescore")
+    @click.option("--chunk", default=5000, show_default=True, help="Records per scoring task.")
+    @click.option("--workers", default=0, help="Scoring processes (default: one per CPU).")
+    @click.option("--stale-only", is_flag=True, help="Only records scored by another model version.")
+    @click.option("--restart", is_flag=True, help="Ignore the checkpoint and start from the first record.")
+    @click.option("--checkpoint", default=None, help="Checkpoint file (default: instance/rescore-<version>.json).")
+    def rescore_command(chunk, workers, stale_only, restart, checkpoint):
+        """Re-score stored records with the serving ensemble; rerun to resume after an interruption."""
+        if not wait_for_models():
+            raise click.ClickException("models are not loaded")
+        checkpoint = checkpoint or os.path.join(app.instance_path, f"rescore-{MODELS['version']}.json")
+        rescore_records(checkpoint, chunk=chunk, workers=workers or os.cpu_count() or 1,
+                        stale_only=stale_only, restart=restart)
+
+    @app.cli.command("train")
+    @click.option("--data", default=None, help="Training xlsx (default: AI Trainings/cleaned (4).xlsx).")
+    @click.option("--version", default=None, help="Version directory name (default: current date and time).")
+    @click.option("--activate", is_flag=True, help="Point CURRENT at the new version when done.")
+    @click.option("--jobs", default=-1, show_default=True, help="Parallel fits (-1: one per CPU).")
+    @click.option("--folds", default=5, show_default=True, help="Stacking CV folds.")
+    @click.option("--search", default=0, show_default=True, help="RandomizedSearchCV iterations per model (0: fixed parameters).")
+    @click.option("--seed", default=42, show_default=True)
+    @click.option("--cache-dir", default=None, help="Parsed/encoded dataset cache (default: instance/train-cache).")
+    def train_command(data, version, activate, jobs, folds, search, seed, cache_dir):
+        """Retrain the stacked ensemble into MODELS_DIR/<version>/."""
+        from .training import train
+        try:
+            train(app, model_root(app), data_path=data, version=version, cache_dir=cache_dir, jobs=jobs,
+                  folds=folds, search=search, seed=seed, activate=activate)
+        except (OSError, ValueError) as e:
+            raise click.ClickException(str(e))
+
+    @app.cli.command("rebuild-rollup")
+    def rebuild_rollup_command():
+        """Recompute record_daily_rollup from the records table."""
+        print(f"record_daily_rollup rebuilt: {rebuild_rollup()} rows")
+
     ensure_psgc_data(app)
-    load_models(app)
+
+    @app.get("/health/live")
+    def health_live():
+        # the process is up and answering; says nothing about the models
+        return jsonify({"ok": True, "pid": os.getpid()})
+
+    @app.get("/health/ready")
+    def health_ready():
+        # route traffic here only once the first ensemble is loaded and warmed
+        ready = MODELS_LOADED and STARTUP_DONE.is_set()
+        return jsonify({"ok": ready, "models_loaded": MODELS_LOADED, "model_version": MODELS["version"],
+                        "startup": STARTUP, "pid": os.getpid()}), 200 if ready else 503
 
     @app.get("/health")
     def health():
-        return jsonify({"ok": True, "models_loaded": MODELS_LOADED, "has_training_columns": MODELS["training_columns"] is not None})
+        return jsonify({"ok": True, "models_loaded": MODELS_LOADED, "startup": STARTUP, "has_training_columns": MODELS["training_columns"] is not None,
+                        "model_version": MODELS["version"],
+                        "inference": "compiled" if MODELS["compiled"] is not None else "library",
+                        "artifacts": ARTIFACT_STATS, "rss_mb": current_rss_mb(), "pid": os.getpid(),
+                        "admin_cache": ADMIN_CACHE.stats(), "prediction_cache": PREDICTION_CACHE.stats(),
+                        "write_behind": WRITER.snapshot() if WRITER is not None else None,
+                        "sqlite": sqlite_status(db.engine), "live_feed": FEED.snapshot(),
+                        "micro_batch": BATCHER.snapshot() if BATCHER is not None else None})
+
+    @app.before_request
+    def _start_model_watcher():
+        ensure_model_watcher(app)
+
+    @app.before_request
+    def _start_timer():
+        g.request_t0 = time.perf_counter()
+        g.server_timing = {} if server_timing_requested() else None
+
+    @app.after_request
+    def _record_request(resp):
+        t0 = g.get("request_t0")
+        if t0 is None: return resp
+        dt = time.perf_counter() - t0
+        endpoint = request.endpoint or "none"  # unmatched URLs share one series
+        METRICS.observe("admissions_http_request_duration_seconds", dt, endpoint=endpoint, method=request.method)
+        METRICS.inc("admissions_http_requests_total", endpoint=endpoint, method=request.method, status=str(resp.status_code))
+        if g.get("server_timing") is not None:
+            resp.headers["Server-Timing"] = server_timing_header(g.server_timing, dt)
+        if metrics_dir():
+            METRICS.dump(metrics_dir())
+        return resp
+
+    @app.get("/metrics")
+    def metrics():
+        token = os.getenv("METRICS_TOKEN")
+        if token and request.headers.get("Authorization") != f"Bearer {token}":
+            return jsonify({"ok": False, "error": "forbidden"}), 403
+        if request.args.get("format") == "json":
+            return jsonify(METRICS.summary(metrics_dir()))
+        return Response(METRICS.render(metrics_dir()), mimetype="text/plain; version=0.0.4")
+
+    @app.get("/api/admin/models")
+    def api_admin_models():
+        root = model_root(app)
+        return jsonify({"ok": True, "serving": MODELS["version"], "available": list_model_versions(root),
+                        "active": resolve_model_dir(root)[1], "reload": RELOAD_STATE})
+
+    @app.post("/api/admin/models/reload")
+    def api_admin_models_reload():
+        if not admin_authorized():
+            return jsonify({"ok": False, "error": "forbidden"}), 403
+        version = ((request.get_json(silent=True) or {}).get("version") or "").strip() or None
+        if version:
+            try:
+                activate_model_version(model_root(app), version)
+            except ValueError as e:
+                return jsonify({"ok": False, "error": "bad_version", "message": str(e)}), 400
+        if RELOAD_STATE["state"] == "loading":
+            return jsonify({"ok": False, "error": "reload_in_progress", "reload": RELOAD_STATE}), 409
+        start_reload(app, version)
+        return jsonify({"ok": True, "reload": RELOAD_STATE}), 202
 
     @app.get("/api/admin/latest")
     def api_admin_latest():
@@ -646,56 +2038,103 @@ def create_app():
         _finalize_default_options()
         return jsonify({"tokens": CACHED_TOKEN_OPTIONS})
 
+    @app.get("/api/suggest")
+    def api_suggest():
+        # typeahead over a model field (e.g. "current city/municipality") or a PSGC level (e.g. "barangays")
+        field = (request.args.get("field") or "").strip().lower()
+        q = _lower(request.args.get("q"))
+        try:
+            k = max(1, min(int(request.args.get("k", 10) or 10), 50))
+        except ValueError:
+            return jsonify({"error": "bad_params", "message": "k must be an integer"}), 400
+        index = TOKEN_INDEX.get(field) or psgc_token_index(field)
+        if index is None:
+            return jsonify({"error": "unknown_field", "message": "field must be a model input key or a PSGC level",
+                            "fields": sorted(TOKEN_INDEX) + list(PSGC_LEVELS)}), 400
+        return jsonify({"field": field, "q": q, "items": index.suggest(q, k) if q else []})
+
     @app.post("/api/predict")
     def api_predict():
+        if not MODELS_LOADED:
+            return models_not_ready()
         payload = request.get_json(force=True, silent=True) or {}
-        row_dict, err = build_feature_row(payload)
+        suggestions = {}
+        with stage("features"):
+            row_dict, err = build_feature_row(payload, suggestions)
         if err:
             return jsonify(err), 400
-        import pandas as pd
+        oov = []
         try:
-            df_enc = encode_row_to_training(pd.DataFrame([row_dict]))
-            prob, conf = predict_with_stack(df_enc)
+            (prob,), (conf,), version = score_rows([row_dict], oov)
         except Exception as e:
             return jsonify({"error":"prediction_failed","message":str(e)}), 500
 
         # save record (use the global Record class directly)
-        rec = Record(
-            first_program=row_dict["Program (First Choice)"],
-            second_program=row_dict["Program (Second Choice)"],
-            curr_region=row_dict["Current Region"],
-            curr_province=row_dict["Current Province"],
-            curr_city=row_dict["Current City"],
-            per_country=row_dict["Permanent Country"],
-            per_region=row_dict["Permanent Region"],
-            per_province=row_dict["Permanent Province"],
-            per_city=row_dict["Permanent City"],
-            student_type=row_dict["Student Type"],
-            school_type=row_dict["School Type"],
-            date_of_birth=payload.get("dateofbirth"),
-            age_years=row_dict["Age"],
-            local_or_foreign=row_dict["LocalOrForeign"],
-            same_region=row_dict["SameRegion"],
-            same_province=row_dict["SameProvince"],
-            same_city=row_dict["SameCity"],
-            prob_enroll_pct=prob,
-            confidence=conf,
-        )
-        db.session.add(rec)
-        db.session.commit()
-
-        return jsonify({"prob_enroll_pct": prob, "confidence": conf})
+        fields = {**record_fields(row_dict, payload.get("dateofbirth")),
+                  "prob_enroll_pct": prob, "confidence": conf, "priority": prob * conf,
+                  "model_version": version, "oov_mask": oov[0], "created_at": datetime.utcnow()}
+        persist_records([fields])
+
+        out = {"prob_enroll_pct": prob, "confidence": conf, "model_version": version, "oov": oov_names(oov[0])}
+        if suggestions: out["suggestions"] = suggestions
+        if request.args.get("explain") == "1":
+            out["explanation"] = explain_row(row_dict)
+        return jsonify(out)
+
+    @app.post("/api/predict/batch")
+    def api_predict_batch():
+        if not MODELS_LOADED:
+            return models_not_ready()
+        items, err = read_batch_payload(request)
+        if err:
+            return jsonify(err), 400
+        max_rows = int(os.getenv("PREDICT_BATCH_MAX", "5000"))
+        if len(items) > max_rows:
+            return jsonify({"error":"batch_too_large","message":f"At most {max_rows} rows per batch.","rows":len(items)}), 413
+
+        rows, idx, errors = [], [], []
+        with stage("features"):
+            for i, payload in enumerate(items):
+                row_dict, err = build_feature_row(payload)
+                if err:
+                    errors.append({"index": i, **err})
+                    continue
+                rows.append((row_dict, payload.get("dateofbirth")))
+                idx.append(i)
+
+        results, oov = [], []
+        if rows:
+            try:
+                probs, confs, version = predict_rows([r for r, _ in rows], oov)
+            except Exception as e:
+                return jsonify({"error":"prediction_failed","message":str(e)}), 500
+
+            mappings, now = [], datetime.utcnow()
+            for i, (row_dict, dob), prob, conf, mask in zip(idx, rows, probs, confs, oov):
+                prob, conf = float(prob), float(conf)
+                mappings.append({**record_fields(row_dict, dob), "prob_enroll_pct": prob, "confidence": conf,
+                                 "priority": prob * conf, "model_version": version, "oov_mask": mask, "created_at": now})
+                results.append({"index": i, "prob_enroll_pct": prob, "confidence": conf, "oov": oov_names(mask)})
+            persist_records(mappings)
+
+        return jsonify({"ok": True, "n": len(items), "scored": len(results), "failed": len(errors),
+                        "model_version": version if rows else None,
+                        "results": results, "errors": errors})
 
 
 
     # Register simple page blueprints (these reference templates already included)
     from .view import view_bp
     from .auth import auth_bp
+    from .psgc import psgc_bp, load_psgc
     app.register_blueprint(view_bp)
     app.register_blueprint(auth_bp)
+    app.register_blueprint(psgc_bp)
+    # indexed once here so preloaded gunicorn workers share it
+    load_psgc(app)
 
-    try: smoke_test_prediction(app)
-    except Exception: pass
+    register_admin_routes(app)
+    start_models(app)
 
     return app
 
@@ -0,0 +1,122 @@
+"""Micro-batching of concurrent /api/predict calls (MICROBATCH=1).
+
+Most of the cost of scoring one applicant is per call, not per row: encoding
+setup and one predict_proba per base model plus the meta model. Request
+threads hand their rows to submit() and block; one batcher thread per
+process takes the first waiting request, keeps collecting until
+MICROBATCH_MAX_ROWS rows are in or MICROBATCH_WAIT_MS has passed since that
+request arrived, scores everything with a single run() call and hands each
+caller its own slice of the result.
+
+MICROBATCH_WAIT_MS=0 adds no wait at all: a batch is whatever queued up
+while the previous one was running. Requests only overlap when a worker
+serves several at once (GUNICORN_THREADS), so that is the upper bound on
+useful batch sizes per worker.
+
+Rows per batch and queue wait go to the admissions_predict_batch_rows and
+admissions_predict_batch_wait_seconds histograms.
+"""
+import os
+import time
+import queue
+import threading
+
+from .metrics import METRICS
+
+
+class _Pending:
+    __slots__ = ("rows", "t0", "done", "result", "error")
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.t0 = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    def __init__(self, run, max_rows=32, max_wait=0.002, timeout=30.0):
+        self.run = run              # run(rows, oov) -> (probs, confs, version), as predict_rows
+        self.max_rows = max_rows
+        self.max_wait = max_wait
+        self.timeout = timeout
+        self.queue = queue.Queue()
+        self.stats = {"requests": 0, "rows": 0, "batches": 0, "max_rows_seen": 0, "errors": 0}
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def _ensure_started(self):
+        # one batcher thread per process; threads do not survive gunicorn's fork
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # _pid goes last: until then concurrent submits wait on the lock instead of
+            # putting into the parent's queue, which nothing reads in this process
+            q = queue.Queue()
+            threading.Thread(target=self._loop, args=(q,), daemon=True, name="micro-batcher").start()
+            self.queue = q
+            self._pid = os.getpid()
+
+    def submit(self, rows, oov=None):
+        """Score rows together with whatever other requests are waiting; same return as run()."""
+        self._ensure_started()
+        p = _Pending(rows)
+        self.queue.put(p)
+        if not p.done.wait(self.timeout):
+            raise TimeoutError(f"micro-batch not scored within {self.timeout:.0f}s")
+        if p.error is not None:
+            raise p.error
+        probs, confs, version, masks = p.result
+        if oov is not None:
+            oov.extend(masks)
+        return probs, confs, version
+
+    def _collect(self, q):
+        batch = [q.get()]
+        n = len(batch[0].rows)
+        deadline = batch[0].t0 + self.max_wait
+        while n < self.max_rows:
+            try:
+                left = deadline - time.perf_counter()
+                p = q.get(timeout=left) if left > 0 else q.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(p)
+            n += len(p.rows)
+        return batch, n
+
+    def _loop(self, q):
+        while True:
+            batch, n = self._collect(q)
+            start = time.perf_counter()
+            for p in batch:
+                METRICS.observe("admissions_predict_batch_wait_seconds", start - p.t0)
+            METRICS.observe("admissions_predict_batch_rows", n)
+            rows = [r for p in batch for r in p.rows]
+            try:
+                oov = []
+                probs, confs, version = self.run(rows, oov)
+                i = 0
+                for p in batch:
+                    j = i + len(p.rows)
+                    p.result = (probs[i:j], confs[i:j], version, oov[i:j])
+                    i = j
+            except Exception as e:
+                self.stats["errors"] += 1
+                for p in batch:
+                    p.error = e
+            self.stats["requests"] += len(batch)
+            self.stats["rows"] += n
+            self.stats["batches"] += 1
+            self.stats["max_rows_seen"] = max(self.stats["max_rows_seen"], n)
+            for p in batch:
+                p.done.set()
+
+    def snapshot(self):
+        s = dict(self.stats)
+        s.update(pending=self.queue.qsize(), max_rows=self.max_rows, max_wait_ms=self.max_wait * 1000,
+                 avg_rows=round(s["rows"] / s["batches"], 2) if s["batches"] else None)
+        return s
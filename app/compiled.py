@@ -0,0 +1,207 @@
+"""NumPy re-implementation of the stacked ensemble's predict_proba.
+
+compile_ensemble() flattens the fitted models once at load time: logistic
+regressions become a weight vector and an intercept, random forests and
+XGBoost boosters become packed node arrays. Scoring a batch of encoded rows is
+then a handful of vectorized gathers instead of four library predict_proba
+calls with their DataFrame conversion and input validation.
+
+The library path in app/__init__.py stays the reference; warm_ensemble checks
+the two agree before the compiled kernel is used.
+"""
+import json
+
+import numpy as np
+
+
+def _sigmoid(z):
+    return 1.0 / (1.0 + np.exp(-z))
+
+
+class LinearKernel:
+    # binary LogisticRegression: p = sigmoid(X @ w + b)
+    def __init__(self, est):
+        coef = np.asarray(est.coef_, dtype=np.float64)
+        if coef.shape[0] != 1:
+            raise ValueError("only binary logistic regression can be compiled")
+        self.w = coef[0]
+        self.b = float(np.asarray(est.intercept_, dtype=np.float64)[0])
+
+    def predict_pos(self, X):
+        return _sigmoid(X @ self.w + self.b)
+
+
+class TreeKernel:
+    """Many binary trees packed into flat arrays and walked level by level for all rows at once.
+
+    Leaves point at themselves with an infinite threshold, so after max_depth
+    steps every (row, tree) cursor sits on its leaf regardless of path length.
+    """
+
+    def __init__(self, trees, strict, dtype):
+        # trees: list of (left, right, feature, threshold, leaf_value, default_left), leaves have left == -1
+        self.strict = strict  # XGBoost goes left on x < t, sklearn on x <= t
+        self.dtype = dtype    # both libraries compare float32 inputs
+        lefts, rights, feats, thrs, vals, defl, roots = [], [], [], [], [], [], []
+        offset, depth = 0, 0
+        for left, right, feat, thr, val, dleft in trees:
+            n = len(left)
+            idx = np.arange(n) + offset
+            leaf = left < 0
+            lefts.append(np.where(leaf, idx, left + offset))
+            rights.append(np.where(leaf, idx, right + offset))
+            feats.append(np.where(leaf, 0, feat))
+            thrs.append(np.where(leaf, np.inf, thr))
+            vals.append(val)
+            defl.append(dleft)
+            roots.append(offset)
+            depth = max(depth, _tree_depth(left, right))
+            offset += n
+        self.left = np.concatenate(lefts).astype(np.int64)
+        self.right = np.concatenate(rights).astype(np.int64)
+        self.feature = np.concatenate(feats).astype(np.int64)
+        self.threshold = np.concatenate(thrs)
+        self.value = np.concatenate(vals).astype(np.float64)
+        self.default_left = np.concatenate(defl).astype(bool)
+        self.roots = np.asarray(roots, dtype=np.int64)
+        self.depth = depth
+
+    def _step(self, X, rows, node):
+        x = X[rows, self.feature[node]]
+        t = self.threshold[node]
+        go_left = (x < t) if self.strict else (x <= t)
+        go_left = np.where(np.isnan(x), self.default_left[node], go_left)
+        return np.where(go_left, self.left[node], self.right[node])
+
+    def leaves(self, X):
+        X = np.asarray(X, dtype=self.dtype)
+        rows = np.arange(X.shape[0])[:, None]
+        node = np.broadcast_to(self.roots, (X.shape[0], len(self.roots))).copy()
+        for _ in range(self.depth):
+            node = self._step(X, rows, node)
+        return self.value[node]
+
+    def contributions(self, X):
+        """Path attributions: each split credits value(child) - value(node) to its feature.
+
+        Returns (sum of root values, rows x features array); per row the two add up to the
+        sum of the leaf values. Needs node values on internal nodes as well as leaves.
+        """
+        X = np.asarray(X, dtype=self.dtype)
+        n, width = X.shape
+        rows = np.arange(n)[:, None]
+        node = np.broadcast_to(self.roots, (n, len(self.roots))).copy()
+        idx, delta = [], []
+        for _ in range(self.depth):
+            nxt = self._step(X, rows, node)
+            idx.append(rows * width + self.feature[node])  # leaves loop on themselves: delta 0
+            delta.append(self.value[nxt] - self.value[node])
+            node = nxt
+        out = np.bincount(np.concatenate(idx, axis=None), weights=np.concatenate(delta, axis=None),
+                          minlength=n * width) if idx else np.zeros(n * width)
+        return float(self.value[self.roots].sum()), out.reshape(n, width)
+
+
+def _tree_depth(left, right):
+    depth, frontier = 0, [0]
+    while True:
+        nxt = [c for i in frontier for c in (left[i], right[i]) if left[i] >= 0]
+        if not nxt:
+            return depth
+        depth, frontier = depth + 1, nxt
+
+
+class ForestKernel:
+    # sklearn RandomForestClassifier: mean over trees of the leaf's positive-class fraction
+    def __init__(self, est):
+        if len(est.classes_) != 2:
+            raise ValueError("only binary forests can be compiled")
+        trees = []
+        for tree in est.estimators_:
+            t = tree.tree_
+            v = t.value[:, 0, :]
+            frac = v[:, 1] / v.sum(axis=1)
+            trees.append((t.children_left, t.children_right, t.feature, t.threshold, frac,
+                          np.zeros(t.node_count, dtype=bool)))
+        self.trees = TreeKernel(trees, strict=False, dtype=np.float32)
+
+    def predict_pos(self, X):
+        return self.trees.leaves(X).mean(axis=1)
+
+
+class BoosterKernel:
+    # XGBoost binary:logistic: sigmoid(base margin + sum of leaf weights)
+    def __init__(self, est):
+        booster = est.get_booster() if hasattr(est, "get_booster") else est
+        model = json.loads(booster.save_raw("json"))["learner"]
+        if model["objective"]["name"] != "binary:logistic":
+            raise ValueError(f"unsupported objective {model['objective']['name']}")
+        base = float(model["learner_model_param"]["base_score"])
+        self.base_margin = float(np.log(base / (1.0 - base)))
+        gbm = model["gradient_booster"]["model"]
+        trees = gbm["trees"]
+        best = getattr(est, "best_iteration", None)
+        if best is not None:
+            trees = trees[:gbm["iteration_indptr"][best + 1]]
+        packed = []
+        for t in trees:
+            if any(t.get("split_type", [])):
+                raise ValueError("categorical splits are not supported")
+            left = np.asarray(t["left_children"], dtype=np.int64)
+            right = np.asarray(t["right_children"], dtype=np.int64)
+            cond = np.asarray(t["split_conditions"], dtype=np.float32)
+            # for leaves XGBoost stores the leaf weight in split_conditions; internal nodes get the
+            # hessian-weighted mean of their children (only used by contributions())
+            value = _internal_means(left, right, np.where(left < 0, cond, 0.0).astype(np.float64),
+                                    np.asarray(t["sum_hessian"], dtype=np.float64))
+            packed.append((left, right, np.asarray(t["split_indices"], dtype=np.int64), cond,
+                           value, np.asarray(t["default_left"], dtype=bool)))
+        self.trees = TreeKernel(packed, strict=True, dtype=np.float32)
+
+    def predict_pos(self, X):
+        return _sigmoid(self.base_margin + self.trees.leaves(X).astype(np.float32).sum(axis=1, dtype=np.float32))
+
+
+def _internal_means(left, right, value, weight):
+    order, i = [0], 0
+    while i < len(order):
+        if left[order[i]] >= 0:
+            order += [left[order[i]], right[order[i]]]
+        i += 1
+    value = value.copy()
+    for node in reversed(order):
+        l, r = left[node], right[node]
+        if l >= 0:
+            w = weight[l] + weight[r]
+            value[node] = (weight[l] * value[l] + weight[r] * value[r]) / w if w > 0 else 0.5 * (value[l] + value[r])
+    return value
+
+
+def compile_model(est):
+    name = type(est).__name__
+    if name == "LogisticRegression":
+        return LinearKernel(est)
+    if name == "RandomForestClassifier":
+        return ForestKernel(est)
+    if name in ("XGBClassifier", "Booster"):
+        return BoosterKernel(est)
+    raise ValueError(f"cannot compile {name}")
+
+
+class CompiledEnsemble:
+    def __init__(self, models):
+        self.rf = compile_model(models["rf"])
+        self.lr = compile_model(models["lr"])
+        self.xg = compile_model(models["xg"])
+        self.meta = compile_model(models["meta"])
+
+    def predict(self, X):
+        # same outputs as predict_with_stack_batch: (positive-class probability, confidence)
+        X = np.asarray(X, dtype=np.float64)
+        stacked = np.column_stack([self.rf.predict_pos(X), self.lr.predict_pos(X), self.xg.predict_pos(X)])
+        p = self.meta.predict_pos(stacked)
+        return p, np.maximum(p, 1.0 - p)
+
+
+def compile_ensemble(models):
+    return CompiledEnsemble(models)
@@ -0,0 +1,119 @@
+"""Per-prediction feature attributions for the stacked ensemble, without LIME.
+
+LIME scores thousands of perturbed rows per applicant. Here every base model
+is explained from its own structure, in one pass over one row:
+
+    LR    coefficient x value on the active one-hot columns (logit space)
+    RF    path attributions: walking each tree from root to leaf, the change in
+          the node's positive-class fraction is credited to the split feature
+    XGB   the same on margins, internal nodes valued by their hessian-weighted
+          children
+
+The three are combined through the meta model. Each base model's change
+against its baseline output (intercept, mean root value, base margin) is
+turned into a change of the meta logit, using the meta LR's coefficients or
+secant slopes for other meta models. The result is then scaled so that the
+per-column terms add up exactly to the served probability minus the
+baseline probability. Columns are summed per model feature, so a city shows
+up as "Current City", not as one of a thousand one-hot columns.
+
+The tree arrays are the packed kernels from app/compiled.py, built once per
+ensemble (models["kernels"], restored from the startup snapshot when there
+is one) and shared with INFERENCE_MODE=compiled.
+"""
+import numpy as np
+
+from .compiled import BoosterKernel, ForestKernel, LinearKernel
+
+
+def _sigmoid(z):
+    return 1.0 / (1.0 + np.exp(-z))
+
+
+def _logit(p):
+    p = min(max(p, 1e-12), 1 - 1e-12)
+    return float(np.log(p / (1 - p)))
+
+
+def _to_prob(terms, z0, z):
+    # scale logit-space terms so they add up to sigmoid(z) - sigmoid(z0)
+    if abs(z - z0) > 1e-9:
+        return terms * ((_sigmoid(z) - _sigmoid(z0)) / (z - z0))
+    s = _sigmoid(z)
+    return terms * (s * (1 - s))
+
+
+class Explainer:
+    def __init__(self, models):
+        cols = [str(c) for c in models["training_columns"]]
+        self.width = len(cols)
+        self.features = []
+        group = []
+        for c in cols:
+            feat = c.split("_", 1)[0] if "_" in c else c
+            if feat not in self.features:
+                self.features.append(feat)
+            group.append(self.features.index(feat))
+        self.group = np.asarray(group)
+
+        compiled = models.get("kernels")
+        self.lr = compiled.lr if compiled is not None else LinearKernel(models["lr"])
+        self.rf = compiled.rf if compiled is not None else ForestKernel(models["rf"])
+        self.xg = compiled.xg if compiled is not None else BoosterKernel(models["xg"])
+        self.n_trees = len(self.rf.trees.roots)
+        self.meta = models["meta"]
+        coef = getattr(self.meta, "coef_", None)
+        self.meta_coef = np.asarray(coef, dtype=np.float64)[0] if coef is not None and np.shape(coef) == (1, 3) else None
+
+        # baseline: every base model at its own prior (no evidence from any column)
+        self.lr_z0 = self.lr.b
+        self.rf_p0 = float(self.rf.trees.value[self.rf.trees.roots].mean())
+        self.xg_z0 = self.xg.base_margin + float(self.xg.trees.value[self.xg.trees.roots].sum())
+        self.stack0 = np.array([self.rf_p0, _sigmoid(self.lr_z0), _sigmoid(self.xg_z0)])
+        self.p0 = self._meta_prob(self.stack0)
+
+    def _meta_prob(self, stack):
+        return float(self.meta.predict_proba(np.asarray(stack, dtype=np.float64).reshape(1, 3))[0, 1])
+
+    def _meta_slopes(self, stack, z, z0):
+        # d(meta logit) / d(base probability): exact for a logistic meta model, secants otherwise
+        if self.meta_coef is not None:
+            return self.meta_coef
+        slopes = np.zeros(3)
+        for i in range(3):
+            if abs(stack[i] - self.stack0[i]) > 1e-9:
+                probe = self.stack0.copy()
+                probe[i] = stack[i]
+                slopes[i] = (_logit(self._meta_prob(probe)) - z0) / (stack[i] - self.stack0[i])
+        return slopes
+
+    def explain(self, x, row=None, top=5):
+        """x: one encoded row (training column order); row: the feature row, for display values."""
+        x = np.asarray(x, dtype=np.float64).reshape(1, self.width)
+        lr_terms = self.lr.w * x[0]
+        lr_z = self.lr_z0 + lr_terms.sum()
+        _, rf_terms = self.rf.trees.contributions(x)
+        rf_terms = rf_terms[0] / self.n_trees
+        _, xg_terms = self.xg.trees.contributions(x)
+        xg_terms = xg_terms[0]
+        xg_z = self.xg_z0 + xg_terms.sum()
+
+        stack = np.array([self.rf_p0 + rf_terms.sum(), _sigmoid(lr_z), _sigmoid(xg_z)])
+        p = self._meta_prob(stack)
+        z, z0 = _logit(p), _logit(self.p0)
+        a = self._meta_slopes(stack, z, z0)
+        meta_terms = (a[0] * rf_terms + a[1] * _to_prob(lr_terms, self.lr_z0, lr_z)
+                      + a[2] * _to_prob(xg_terms, self.xg_z0, xg_z))
+        total = meta_terms.sum()
+        if self.meta_coef is None and abs(total) > 1e-12:
+            meta_terms *= (z - z0) / total  # secant slopes are approximate: make the terms add up
+        per_feature = np.bincount(self.group, weights=_to_prob(meta_terms, z0, z), minlength=len(self.features))
+
+        order = np.argsort(-np.abs(per_feature))[:top]
+        return {
+            "prob": p,
+            "baseline": self.p0,
+            "base_models": {"rf": float(stack[0]), "lr": float(stack[1]), "xg": float(stack[2])},
+            "top": [{"feature": self.features[i], "value": (row or {}).get(self.features[i]),
+                     "contribution": float(per_feature[i])} for i in order if per_feature[i] != 0],
+        }
@@ -0,0 +1,73 @@
+import heapq
+from bisect import bisect_left
+from difflib import SequenceMatcher
+
+import numpy as np
+
+
+class FuzzyIndex:
+    """difflib.get_close_matches over a fixed token list without its O(N) SequenceMatcher scan.
+
+    Every token is stored as a character-count profile. One vectorized pass
+    over the profiles gives SequenceMatcher.quick_ratio() for all tokens,
+    an upper bound on ratio(); candidates are then scored best bound first
+    and the scan stops as soon as no remaining bound can enter the top k.
+    Results, cutoff and ordering are exactly those of get_close_matches.
+    """
+
+    def __init__(self, choices):
+        self.choices = sorted({c for c in choices if c})
+        alphabet = sorted({ch for c in self.choices for ch in c})
+        self._col = {ch: i for i, ch in enumerate(alphabet)}
+        self._profiles = np.zeros((len(self.choices), len(alphabet)), dtype=np.int16)
+        for i, c in enumerate(self.choices):
+            for ch in c:
+                self._profiles[i, self._col[ch]] += 1
+        self._lens = np.fromiter((len(c) for c in self.choices), dtype=np.int32, count=len(self.choices))
+        self._set = set(self.choices)
+
+    def __contains__(self, token):
+        return token in self._set
+
+    def __len__(self):
+        return len(self.choices)
+
+    def search(self, query, k=3, cutoff=0.6):
+        if not query or not self.choices:
+            return []
+        q = np.zeros(self._profiles.shape[1], dtype=np.int16)
+        for ch in query:
+            j = self._col.get(ch)
+            if j is not None: q[j] += 1
+        matches = np.minimum(self._profiles, q).sum(axis=1)
+        bound = 2.0 * matches / (self._lens + len(query))
+        order = np.flatnonzero(bound >= cutoff)
+        order = order[np.argsort(-bound[order], kind="stable")]
+        s = SequenceMatcher()
+        s.set_seq2(query)
+        best = []  # min-heap of (ratio, token), same key get_close_matches ranks by
+        for i in order:
+            if len(best) == k and best[0][0] > bound[i]:
+                break
+            c = self.choices[i]
+            s.set_seq1(c)
+            r = s.ratio()
+            if r >= cutoff:
+                if len(best) < k: heapq.heappush(best, (r, c))
+                elif (r, c) > best[0]: heapq.heapreplace(best, (r, c))
+        return [c for _, c in sorted(best, reverse=True)]
+
+    def complete(self, prefix, k=10):
+        out = []
+        i = bisect_left(self.choices, prefix)
+        while i < len(self.choices) and len(out) < k and self.choices[i].startswith(prefix):
+            out.append(self.choices[i])
+            i += 1
+        return out
+
+    def suggest(self, query, k=10, cutoff=0.6):
+        # typeahead: prefix completions first, fuzzy matches fill the rest
+        out = self.complete(query, k)
+        if len(out) < k:
+            out += [c for c in self.search(query, k, cutoff) if c not in out][:k - len(out)]
+        return out
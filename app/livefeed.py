@@ -0,0 +1,142 @@
+"""Server-Sent Events feed of newly scored records (/api/admin/stream).
+
+One poller thread per process reads records with id > last seen id and
+keeps the recent batches in memory; every open stream in that process is
+served from that buffer, so the database sees one indexed query per
+SSE_POLL_INTERVAL per worker however many dashboards are open, and none at
+all while no dashboard is connected. Commits made in the same process call
+poke() so their records go out immediately; other workers' commits are
+picked up on the next poll.
+
+Streams end after SSE_MAX_SECONDS; EventSource reconnects with
+Last-Event-ID and resumes from the buffer (or the database, if the buffer
+has moved on).
+"""
+import os
+import json
+import time
+import threading
+from collections import deque
+
+
+class LiveFeed:
+    def __init__(self, app, fetch, latest_id, poll_interval=1.0, heartbeat=15.0, backlog=200):
+        self.app = app
+        self.fetch = fetch          # fetch(after_id) -> records with id > after_id, oldest first
+        self.latest_id = latest_id  # latest_id() -> current max record id
+        self.poll_interval = poll_interval
+        self.heartbeat = heartbeat
+        self.batches = deque(maxlen=backlog)  # (last id, [records])
+        self.last_id = None
+        self.subscribers = 0
+        self.polls = 0
+        self._cond = threading.Condition()
+        self._poked = False
+        self._pid = None
+
+    def _ensure_started(self):
+        # one poller per process; threads do not survive gunicorn's fork
+        if self._pid == os.getpid():
+            return
+        with self._cond:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self.batches.clear()
+            self.last_id = None
+            self.subscribers = 0
+            threading.Thread(target=self._run, daemon=True, name="live-feed").start()
+
+    def poke(self):
+        # called after a local commit: poll now instead of at the next interval
+        if self._pid != os.getpid():
+            return
+        with self._cond:
+            self._poked = True
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if self.subscribers == 0:
+                    # idle: no queries while nobody is listening. The buffer goes stale meanwhile, so drop it
+                    # and start again from the newest id when the next dashboard connects
+                    self.batches.clear()
+                    self.last_id = None
+                    while self.subscribers == 0:
+                        self._cond.wait()
+                if not self._poked:
+                    self._cond.wait(self.poll_interval)
+                self._poked = False
+                after = self.last_id
+            try:
+                with self.app.app_context():
+                    if after is None:
+                        after = self.latest_id()
+                        new = []
+                    else:
+                        new = self.fetch(after)
+                self.polls += 1
+            except Exception:
+                time.sleep(self.poll_interval)
+                continue
+            with self._cond:
+                if new:
+                    self.batches.append((new[-1]["id"], new))
+                    after = new[-1]["id"]
+                self.last_id = after
+                self._cond.notify_all()
+
+    def _after(self, cursor):
+        # records newer than cursor, from the buffer when it still covers the cursor
+        if self.batches and cursor is not None and cursor >= self.batches[0][1][0]["id"] - 1:
+            return [r for _, recs in self.batches for r in recs if r["id"] > cursor]
+        return None
+
+    def stream(self, cursor, match, summarize, max_seconds=300):
+        """Generator of SSE frames. cursor: Last-Event-ID (None = only records committed after connecting)."""
+        self._ensure_started()
+        if cursor is None:
+            # "from now on" means after the newest committed record, not after whatever the poller saw last
+            with self.app.app_context():
+                cursor = self.latest_id()
+        with self._cond:
+            self.subscribers += 1
+            self._cond.notify_all()
+        deadline = time.monotonic() + max_seconds
+        sent = time.monotonic()
+        try:
+            yield "retry: 2000\n\n"
+            while time.monotonic() < deadline:
+                with self._cond:
+                    if self.last_id is None or (cursor is not None and cursor >= self.last_id):
+                        self._cond.wait(min(self.heartbeat, max(0.0, deadline - time.monotonic())))
+                    head = self.last_id
+                    new = self._after(cursor) if head is not None and cursor is not None and cursor < head else []
+                if head is None:
+                    continue
+                if new is None:
+                    # fell behind the buffer (long disconnect): catch up from the database
+                    with self.app.app_context():
+                        new = self.fetch(cursor)
+                if not new:
+                    # polls without new records are silent; proxies only need a comment every heartbeat
+                    if time.monotonic() - sent >= self.heartbeat:
+                        sent = time.monotonic()
+                        yield ": keep-alive\n\n"
+                    continue
+                cursor = new[-1]["id"]
+                sent = time.monotonic()
+                mine = [r for r in new if match(r)]
+                if mine:
+                    payload = {"records": mine, "delta": summarize(mine)}
+                    yield f"id: {cursor}\nevent: records\ndata: {json.dumps(payload)}\n\n"
+                else:
+                    yield f"id: {cursor}\n: filtered\n\n"
+        finally:
+            with self._cond:
+                self.subscribers -= 1
+
+    def snapshot(self):
+        return {"subscribers": self.subscribers, "last_id": self.last_id, "buffered_batches": len(self.batches),
+                "polls": self.polls, "poll_interval": self.poll_interval}
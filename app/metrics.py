@@ -0,0 +1,263 @@
+"""Latency histograms and counters for /metrics (Prometheus text format).
+
+Observations are recorded in-process: counters and fixed-bucket histograms
+behind one lock, a couple of microseconds each. Stages of the prediction
+path are timed with ``with stage("encode"):``, which also feeds the
+per-request Server-Timing header when the request opted in (see
+server_timing_requested).
+
+Each gunicorn worker has its own registry. With METRICS_DIR set, workers
+write their counters and histograms to METRICS_DIR/metrics-<pid>.json (at
+most every METRICS_FLUSH_INTERVAL seconds) and /metrics adds up all files,
+so a scrape covers the whole server whichever worker answers it. Without
+it, a scrape reports the worker that served it.
+"""
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+# seconds: 100 µs .. 10 s
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+class Metrics:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.help = {}        # name -> (type, help text)
+        self.bucket_sets = {}  # histogram name -> its own bucket bounds (default: self.buckets, seconds)
+        self.counters = {}    # (name, labels) -> value
+        self.gauges = {}
+        self.histograms = {}  # (name, labels) -> [bucket counts (+Inf last), sum]
+        self.collectors = []  # fn() -> [(type, name, labels dict, value)], read at scrape time
+        self._lock = threading.Lock()
+        self._dumped = 0.0
+
+    def describe(self, name, kind, text, buckets=None):
+        self.help[name] = (kind, text)
+        if buckets is not None:
+            self.bucket_sets[name] = tuple(buckets)
+
+    def buckets_of(self, name):
+        return self.bucket_sets.get(name, self.buckets)
+
+    def inc(self, name, value=1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self.gauges[_key(name, labels)] = value
+
+    def observe(self, name, seconds, **labels):
+        # seconds, or whatever unit the histogram's own buckets are in (see describe)
+        key = _key(name, labels)
+        buckets = self.buckets_of(name)
+        i = bisect.bisect_left(buckets, seconds)  # first bucket with le >= seconds
+        with self._lock:
+            h = self.histograms.get(key)
+            if h is None:
+                h = self.histograms[key] = [[0] * (len(buckets) + 1), 0.0]
+            h[0][i] += 1
+            h[1] += seconds
+
+    def snapshot(self):
+        with self._lock:
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+            hists = {k: (list(v[0]), v[1]) for k, v in self.histograms.items()}
+        for fn in self.collectors:
+            try:
+                for kind, name, labels, value in fn():
+                    (counters if kind == "counter" else gauges)[_key(name, labels)] = value
+            except Exception:
+                pass
+        return counters, gauges, hists
+
+    # ---- multi-worker aggregation ----
+    def dump(self, directory, force=False):
+        now = time.monotonic()
+        if not force and now - self._dumped < float(os.getenv("METRICS_FLUSH_INTERVAL", "5")):
+            return
+        self._dumped = now
+        counters, _, hists = self.snapshot()
+        data = {"counters": [[n, l, v] for (n, l), v in counters.items()],
+                "histograms": [[n, l, c, s] for (n, l), (c, s) in hists.items()]}
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"metrics-{os.getpid()}.json")
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(path + ".tmp", path)
+
+    def collect(self, directory=None):
+        """(counters, gauges, histograms) of this process, or summed over METRICS_DIR."""
+        counters, gauges, hists = self.snapshot()
+        if not directory:
+            return counters, gauges, hists
+        self.dump(directory, force=True)
+        counters, hists = {}, {}
+        for path in glob.glob(os.path.join(directory, "metrics-*.json")):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for n, l, v in data["counters"]:
+                key = (n, tuple(map(tuple, l)))
+                counters[key] = counters.get(key, 0) + v
+            for n, l, c, s in data["histograms"]:
+                key = (n, tuple(map(tuple, l)))
+                if key in hists:
+                    old = hists[key]
+                    hists[key] = ([a + b for a, b in zip(old[0], c)], old[1] + s)
+                else:
+                    hists[key] = (c, s)
+        # gauges (model load times, queue depth) describe this worker only
+        return counters, gauges, hists
+
+    # ---- output ----
+    def render(self, directory=None):
+        counters, gauges, hists = self.collect(directory)
+        series = {}
+        for (name, labels), v in sorted(counters.items()):
+            series.setdefault(name, []).append(f"{name}{_labels(labels)} {_num(v)}")
+        for (name, labels), v in sorted(gauges.items()):
+            if v is not None:
+                series.setdefault(name, []).append(f"{name}{_labels(labels)} {_num(v)}")
+        for (name, labels), (counts, total) in sorted(hists.items()):
+            lines, cum = series.setdefault(name, []), 0
+            for le, c in zip(self.buckets_of(name) + ("+Inf",), counts):
+                cum += c
+                lines.append(f"{name}_bucket{_labels(labels + (('le', _num(le)),))} {cum}")
+            lines.append(f"{name}_sum{_labels(labels)} {_num(total)}")
+            lines.append(f"{name}_count{_labels(labels)} {cum}")
+        out = []
+        for name in sorted(series):
+            kind, text = self.help.get(name, ("untyped", ""))
+            out += [f"# HELP {name} {text}", f"# TYPE {name} {kind}"] + series[name]
+        return "\n".join(out) + "\n"
+
+    def summary(self, directory=None):
+        # JSON view with estimated p50/p95/p99 per histogram series
+        counters, gauges, hists = self.collect(directory)
+        out = {"counters": [], "gauges": [], "histograms": []}
+        for (name, labels), v in sorted(counters.items()):
+            out["counters"].append({"name": name, "labels": dict(labels), "value": v})
+        for (name, labels), v in sorted(gauges.items()):
+            out["gauges"].append({"name": name, "labels": dict(labels), "value": v})
+        for (name, labels), (counts, total) in sorted(hists.items()):
+            n = sum(counts)
+            out["histograms"].append({
+                "name": name, "labels": dict(labels), "count": n, "mean": total / n if n else None,
+                **{f"p{int(q * 100)}": quantile(self.buckets_of(name), counts, q) for q in (0.5, 0.95, 0.99)}})
+        return out
+
+
+def quantile(buckets, counts, q):
+    # linear interpolation inside the bucket, as Prometheus' histogram_quantile does
+    total = sum(counts)
+    if not total:
+        return None
+    rank, cum = q * total, 0
+    for i, c in enumerate(counts):
+        if c and cum + c >= rank:
+            if i == len(buckets):
+                return buckets[-1]
+            lo = buckets[i - 1] if i else 0.0
+            return lo + (buckets[i] - lo) * (rank - cum) / c
+        cum += c
+    return buckets[-1]
+
+
+def _num(v):
+    if isinstance(v, str):
+        return v
+    if isinstance(v, bool):
+        return "1" if v else "0"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    esc = lambda s: str(s).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in labels) + "}"
+
+
+METRICS = Metrics()
+METRICS.describe("admissions_http_requests_total", "counter", "HTTP requests by endpoint, method and status.")
+METRICS.describe("admissions_http_request_duration_seconds", "histogram",
+                 "Time to response headers by endpoint (streamed bodies excluded).")
+METRICS.describe("admissions_stage_duration_seconds", "histogram",
+                 "Prediction path stages: features, batch, encode, rf/lr/xg/meta or compiled, persist, db_commit.")
+METRICS.describe("admissions_db_query_duration_seconds", "histogram", "SQL statement time by endpoint.")
+METRICS.describe("admissions_model_loads_total", "counter", "Ensemble loads and reloads by result.")
+METRICS.describe("admissions_model_load_duration_seconds", "histogram", "Time to build an ensemble.")
+METRICS.describe("admissions_predict_batch_rows", "histogram", "Rows per micro-batch run through the ensemble.",
+                 buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256))
+METRICS.describe("admissions_predict_batch_wait_seconds", "histogram",
+                 "Time a /api/predict row waited in the micro-batch queue before its batch started.")
+
+
+# ---- per-request stage timing ----
+def server_timing_requested():
+    # opt-in per request: SERVER_TIMING=1 on the server, ?timing=1 or "X-Server-Timing: 1" on the request
+    return os.getenv("SERVER_TIMING", "0") == "1" and (
+        request.args.get("timing") == "1" or request.headers.get("X-Server-Timing") == "1")
+
+
+def _note(name, seconds):
+    if has_request_context():
+        timings = g.get("server_timing")
+        if timings is not None:
+            t = timings.setdefault(name, [0.0, 0])
+            t[0] += seconds
+            t[1] += 1
+
+
+@contextmanager
+def stage(name):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        dt = time.perf_counter() - t0
+        METRICS.observe("admissions_stage_duration_seconds", dt, stage=name)
+        _note(name, dt)
+
+
+def server_timing_header(timings, total):
+    parts = [f'{name};dur={sec * 1000:.3f}' + (f';desc="{n}x"' if n > 1 else "")
+             for name, (sec, n) in timings.items()]
+    return ", ".join(parts + [f"total;dur={total * 1000:.3f}"])
+
+
+def install_query_timer(engine):
+    """Time every SQL statement, labelled with the Flask endpoint that ran it."""
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_t0", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _stop(conn, cursor, statement, parameters, context, executemany):
+        dt = time.perf_counter() - conn.info["query_t0"].pop()
+        endpoint = (request.endpoint or "none") if has_request_context() else "background"
+        METRICS.observe("admissions_db_query_duration_seconds", dt, endpoint=endpoint)
+        _note("db", dt)
+
+    @event.listens_for(engine, "handle_error")
+    def _failed(ctx):
+        stack = ctx.connection.info.get("query_t0") if ctx.connection is not None else None
+        if stack:
+            stack.pop()
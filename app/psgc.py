@@ -0,0 +1,123 @@
+import os
+import json
+import gzip
+import hashlib
+import threading
+from flask import Blueprint, Response, current_app, jsonify, request
+from .fuzzy import FuzzyIndex
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+psgc_bp = Blueprint("psgc", __name__)
+
+# level -> (file stem, field holding the parent code); regions have no parent
+LEVELS = {
+    "regions": ("regions", None),
+    "provinces": ("provinces", "region_code"),
+    "cities": ("cities", "province_code"),
+    "barangays": ("barangays", "city_code"),
+}
+PSGC_MAX_AGE = int(os.getenv("PSGC_MAX_AGE", "86400"))
+
+PSGC = {"index": None, "version": None}
+_RESPONSES = {}
+_TOKEN_INDEX = {}
+_lock = threading.Lock()
+
+
+def _read_items(app, stem):
+    # static/psgc is the full dataset; app/data only has the samples ensure_psgc_data writes
+    for path in (os.path.join(app.static_folder, "psgc", f"{stem}.json"),
+                 os.path.join(app.root_path, "data", f"psgc_{stem}.json")):
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            return (data.get("items", []) if isinstance(data, dict) else data), path
+    return [], None
+
+
+def load_psgc(app):
+    """Read the four datasets once into {level: {parent code: [children]}}."""
+    index, stamp = {}, hashlib.sha1()
+    for level, (stem, parent_key) in LEVELS.items():
+        items, path = _read_items(app, stem)
+        if path:
+            st = os.stat(path)
+            stamp.update(f"{path}:{st.st_size}:{st.st_mtime_ns}".encode())
+        groups = {}
+        for it in items:
+            child = {k: it[k] for k in ("code", "name", "token") if k in it}
+            if "aliases" in it: child["aliases"] = it["aliases"]
+            groups.setdefault(it.get(parent_key, "") if parent_key else "", []).append(child)
+        index[level] = groups
+    with _lock:
+        PSGC["index"], PSGC["version"] = index, stamp.hexdigest()[:12]
+        _RESPONSES.clear()
+        _TOKEN_INDEX.clear()
+    return index
+
+
+def psgc_token_index(level):
+    # fuzzy index over every token of one level, built on first /api/suggest use
+    if level not in LEVELS or PSGC["index"] is None:
+        return None
+    index = _TOKEN_INDEX.get(level)
+    if index is None:
+        index = FuzzyIndex(it["token"] for items in PSGC["index"][level].values() for it in items if it.get("token"))
+        _TOKEN_INDEX[level] = index
+    return index
+
+
+def _encoded(level, parent):
+    # serialized and compressed once per (level, parent); later hits only pick an encoding
+    key = (level, parent)
+    hit = _RESPONSES.get(key)
+    if hit is not None:
+        return hit
+    items = PSGC["index"][level].get(parent)
+    if items is None:
+        return None
+    body = json.dumps({"level": level, "parent": parent or None, "items": items},
+                      ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    entry = {
+        "etag": '"%s-%s"' % (PSGC["version"], hashlib.sha1(body).hexdigest()[:16]),
+        "identity": body,
+        "gzip": gzip.compress(body, compresslevel=9, mtime=0),
+    }
+    if brotli is not None:
+        entry["br"] = brotli.compress(body, quality=11)
+    _RESPONSES[key] = entry
+    return entry
+
+
+def _pick_encoding(entry):
+    accepted = {p.split(";")[0].strip().lower() for p in request.headers.get("Accept-Encoding", "").split(",")}
+    for enc in ("br", "gzip"):
+        if enc in accepted and enc in entry:
+            return enc
+    return "identity"
+
+
+@psgc_bp.get("/api/psgc/<level>")
+def psgc_children(level):
+    if level not in LEVELS:
+        return jsonify({"error": "unknown_level", "message": f"Level must be one of {', '.join(LEVELS)}."}), 404
+    if PSGC["index"] is None:
+        load_psgc(current_app)
+    parent = "" if LEVELS[level][1] is None else request.args.get("parent", "").strip()
+    if LEVELS[level][1] and not parent:
+        return jsonify({"error": "missing_parent", "message": "Query parameter 'parent' (PSGC code) is required."}), 400
+    entry = _encoded(level, parent)
+    if entry is None:
+        return jsonify({"error": "not_found", "message": f"No {level} under {parent}."}), 404
+
+    headers = {"ETag": entry["etag"], "Cache-Control": f"public, max-age={PSGC_MAX_AGE}", "Vary": "Accept-Encoding"}
+    if entry["etag"] in [t.strip() for t in request.headers.get("If-None-Match", "").split(",")]:
+        return Response(status=304, headers=headers)
+    enc = _pick_encoding(entry)
+    if enc != "identity":
+        headers["Content-Encoding"] = enc
+    return Response(entry[enc], mimetype="application/json", headers=headers)
@@ -0,0 +1,55 @@
+"""Startup snapshots of structures derived from the model artifacts.
+
+Loading an ensemble also builds things that depend only on the artifacts:
+the compiled encoder's column index maps, the trained vocabulary, the token
+options with their fuzzy indexes, the packed tree kernels, and the results
+of the parity checks warm_ensemble runs against the library path. The first
+start with a given set of artifacts pickles them to
+STARTUP_SNAPSHOT_DIR/startup-<key>.pkl; later starts (restarts, new
+workers, hot reloads back to a known version) load that file instead.
+
+The key hashes the artifact fingerprints (artifacts_version), the inference
+mode, SNAPSHOT_FORMAT and the numpy / scikit-learn / xgboost versions, so a
+replaced artifact, a library upgrade or a format change never reuses a
+stale snapshot. Unreadable snapshots count as a miss.
+"""
+import os
+import glob
+import hashlib
+
+import joblib
+
+
+def snapshot_key(*parts):
+    return hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()[:16]
+
+
+def _path(directory, key):
+    return os.path.join(directory, f"startup-{key}.pkl")
+
+
+def load_snapshot(directory, key):
+    path = _path(directory, key)
+    if not os.path.exists(path):
+        return None
+    try:
+        return joblib.load(path)
+    except Exception as e:
+        print(f"[Snapshot] ignoring unreadable {path}: {e}")
+        return None
+
+
+def save_snapshot(directory, key, data, keep=4):
+    """Write atomically, then drop all but the `keep` most recent snapshots."""
+    os.makedirs(directory, exist_ok=True)
+    path = _path(directory, key)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    joblib.dump(data, tmp)
+    os.replace(tmp, path)
+    old = sorted(glob.glob(os.path.join(directory, "startup-*.pkl")), key=os.path.getmtime, reverse=True)[keep:]
+    for p in old:
+        try:
+            os.remove(p)
+        except OSError:
+            pass
+    return path
@@ -0,0 +1,77 @@
+"""SQLite settings for one server running several gunicorn workers (SQLITE_PROFILE).
+
+"performance" (default) puts the database in WAL mode, so dashboard reads no
+longer wait for /api/predict writes and vice versa, and sets per-connection
+pragmas through a connect-event hook:
+
+    journal_mode=WAL        readers and the single writer work concurrently
+    synchronous=NORMAL      fsync at checkpoints instead of every commit (WAL stays consistent;
+                            a power cut can lose the last commits, never corrupt the file)
+    busy_timeout            wait SQLITE_BUSY_TIMEOUT ms for the write lock instead of failing
+                            with "database is locked"
+    mmap_size, cache_size   SQLITE_MMAP_MB / SQLITE_CACHE_MB of memory-mapped I/O and page cache
+    temp_store=MEMORY       sorts and temp indexes of the admin queries stay off disk
+
+Each worker process gets its own small pool (SQLITE_POOL_SIZE); connections
+are never shared across gunicorn's fork (see post_fork in gunicorn.conf.py).
+
+"off" leaves SQLite's defaults (rollback journal, synchronous=FULL).
+The profile only applies to file-backed sqlite:// URLs.
+"""
+import os
+
+from sqlalchemy import event
+
+
+def sqlite_profile(uri):
+    if not uri.startswith("sqlite") or ":memory:" in uri or uri.split("?")[0] == "sqlite://":
+        return "off"
+    return os.getenv("SQLITE_PROFILE", "performance").strip().lower()
+
+
+def sqlite_engine_options(uri):
+    if sqlite_profile(uri) != "performance":
+        return {}
+    return {
+        "pool_size": int(os.getenv("SQLITE_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("SQLITE_POOL_OVERFLOW", "5")),
+        "pool_timeout": float(os.getenv("SQLITE_POOL_TIMEOUT", "30")),
+        # the driver's own lock wait, in seconds; busy_timeout below covers the same for pragma-level waits
+        "connect_args": {"timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000")) / 1000},
+    }
+
+
+def sqlite_pragmas():
+    return [
+        ("journal_mode", "WAL"),
+        ("synchronous", "NORMAL"),
+        ("busy_timeout", int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000"))),
+        ("mmap_size", int(float(os.getenv("SQLITE_MMAP_MB", "256")) * 1024 * 1024)),
+        ("cache_size", -int(float(os.getenv("SQLITE_CACHE_MB", "32")) * 1024)),  # negative = KiB
+        ("temp_store", "MEMORY"),
+    ]
+
+
+def install_sqlite_profile(engine):
+    """Register the pragma hook on an engine; call before its first connection."""
+    if sqlite_profile(str(engine.url)) != "performance":
+        return False
+    pragmas = sqlite_pragmas()
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_conn, _record):
+        cur = dbapi_conn.cursor()
+        for name, value in pragmas:
+            cur.execute(f"PRAGMA {name}={value}")
+        cur.close()
+
+    return True
+
+
+def sqlite_status(engine):
+    # current values as SQLite reports them, for /health
+    if not engine.url.drivername.startswith("sqlite"):
+        return None
+    with engine.connect() as conn:
+        return {name: conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+                for name in ("journal_mode", "synchronous", "busy_timeout", "mmap_size", "cache_size")}
@@ -150,48 +150,50 @@ async function initApply(){
   }
 
   // -------- PSGC cascade (Region → Province → City/Mun → Barangay) --------
-  const regionsResp   = await getJSON('/static/psgc/regions.json').catch(e=>{ console.warn('regions.json error', e); return []; });
-  const provincesResp = await getJSON('/static/psgc/provinces.json').catch(e=>{ console.warn('provinces.json error', e); return []; });
-  const citiesResp    = await getJSON('/static/psgc/cities.json').catch(e=>{ console.warn('cities.json error', e); return []; });
-  const barangaysResp = await getJSON('/static/psgc/barangays.json').catch(e=>{ console.warn('barangays.json error', e); return []; });
+  // Children are fetched per parent from /api/psgc/<level>; the browser revalidates them by ETag.
+  const psgcCache = new Map();
+  async function psgcChildren(level, parent){
+    const url = parent ? `/api/psgc/${level}?parent=${encodeURIComponent(parent)}` : `/api/psgc/${level}`;
+    if (!psgcCache.has(url)) {
+      psgcCache.set(url, getJSON(url).then(d => d.items || []).catch(e => { console.warn(`${level} error`, e); psgcCache.delete(url); return []; }));
+    }
+    return psgcCache.get(url);
+  }
+  // token -> code for the options currently shown in each select
+  const codeOf = new Map();
+  function fillPsgc(sel, items, placeholder, labelsMap){
+    codeOf.set(sel, Object.fromEntries(items.map(it => [it.token, it.code])));
+    fillSelect(sel, items.map(it => it.token), placeholder, labelsMap);
+  }
 
-  // Accept both shapes: {items:[...]} or flat [...]
-  const REG  = Array.isArray(regionsResp)   ? regionsResp   : (regionsResp.items   || []);
-  const PROV = Array.isArray(provincesResp) ? provincesResp : (provincesResp.items || []);
-  const CITY = Array.isArray(citiesResp)    ? citiesResp    : (citiesResp.items    || []);
-  const BRGY = Array.isArray(barangaysResp) ? barangaysResp : (barangaysResp.items || []);
+  const REG = await psgcChildren('regions');
 
   // Build label map for regions so UI shows numbers/acronyms from `name`
   const REG_LABELS = {};
   REG.forEach(r => { if (r && r.token && r.name) REG_LABELS[r.token] = r.name; });
 
-  const regTokens = REG.length ? REG.map(r=>r.token) : seedRegions;
-  fillSelect(currRegion, regTokens, 'Region', REG_LABELS);
-  fillSelect(perRegion,  regTokens, 'Region', REG_LABELS);
+  if (REG.length) {
+    fillPsgc(currRegion, REG, 'Region', REG_LABELS);
+    fillPsgc(perRegion,  REG, 'Region', REG_LABELS);
+  } else {
+    fillSelect(currRegion, seedRegions, 'Region');
+    fillSelect(perRegion,  seedRegions, 'Region');
+  }
 
-  function onRegionChange(srcSel, provSel, citySel, brgySel){
-    const regToken = srcSel.value;
-    const reg = REG.find(r=>r.token===regToken);
-    const regCode = reg ? reg.code : null;
-    const provTokens = PROV.filter(p=>p.region_code===regCode).map(p=>p.token);
-    fillSelect(provSel, provTokens, 'Province');
+  async function onRegionChange(srcSel, provSel, citySel, brgySel){
     citySel.disabled=true; brgySel.disabled=true;
     citySel.innerHTML = ''; brgySel.innerHTML = '';
+    const regCode = (codeOf.get(srcSel) || {})[srcSel.value];
+    fillPsgc(provSel, regCode ? await psgcChildren('provinces', regCode) : [], 'Province');
   }
-  function onProvinceChange(provSel, citySel, brgySel){
-    const provToken = provSel.value;
-    const prov = PROV.find(p=>p.token===provToken);
-    const provCode = prov ? prov.code : null;
-    const cityTokens = CITY.filter(c=>c.province_code===provCode).map(c=>c.token);
-    fillSelect(citySel, cityTokens, 'City/Municipality');
+  async function onProvinceChange(provSel, citySel, brgySel){
     brgySel.disabled=true; brgySel.innerHTML = '';
+    const provCode = (codeOf.get(provSel) || {})[provSel.value];
+    fillPsgc(citySel, provCode ? await psgcChildren('cities', provCode) : [], 'City/Municipality');
   }
-  function onCityChange(citySel, brgySel){
-    const cityToken = citySel.value;
-    const city = CITY.find(c=>c.token===cityToken);
-    const cityCode = city ? city.code : null;
-    const brgyTokens = BRGY.filter(b=>b.city_code===cityCode).map(b=>b.token);
-    fillSelect(brgySel, brgyTokens, 'Barangay');
+  async function onCityChange(citySel, brgySel){
+    const cityCode = (codeOf.get(citySel) || {})[citySel.value];
+    fillPsgc(brgySel, cityCode ? await psgcChildren('barangays', cityCode) : [], 'Barangay');
   }
 
   currRegion.addEventListener('change', ()=> onRegionChange(currRegion, currProvince, currCity, currBarangay));
@@ -202,15 +204,16 @@ async function initApply(){
   perCity.addEventListener('change',    ()=> onCityChange(perCity,   perBarangay));
 
   // -------- Same as current --------
-  sameAsCurrent.addEventListener('change', ()=>{
+  sameAsCurrent.addEventListener('change', async ()=>{
     if(!sameAsCurrent.checked) return;
     perCountry.value='philippines';
-    perRegion.value=currRegion.value; perRegion.dispatchEvent(new Event('change'));
-    setTimeout(()=>{ perProvince.value=currProvince.value; perProvince.dispatchEvent(new Event('change'));
-      setTimeout(()=>{ perCity.value=currCity.value; perCity.dispatchEvent(new Event('change'));
-        setTimeout(()=>{ perBarangay.value=currBarangay.value; },0);
-      },0);
-    },0);
+    perRegion.value=currRegion.value;
+    await onRegionChange(perRegion, perProvince, perCity, perBarangay);
+    perProvince.value=currProvince.value;
+    await onProvinceChange(perProvince, perCity, perBarangay);
+    perCity.value=currCity.value;
+    await onCityChange(perCity, perBarangay);
+    perBarangay.value=currBarangay.value;
   });
 
   // -------- Submit --------
@@ -0,0 +1,382 @@
+"""Offline retraining of the stacked ensemble (flask train), replacing the Colab notebooks.
+
+    flask --app wsgi train                        # AI Trainings/cleaned (4).xlsx -> MODELS_DIR/<version>/
+    flask --app wsgi train --activate --jobs 8    # and point CURRENT at it
+    flask --app wsgi train --search 20            # RandomizedSearchCV first (notebook search spaces)
+
+Steps, as in AI Trainings/PracticeTraining2.ipynb:
+  1. read the xlsx and build one feature row per applicant
+  2. one-hot encode, hold out 20% (random_state 42)
+  3. optionally tune RF / LR / XGBoost with RandomizedSearchCV
+  4. 5-fold out-of-fold predictions of the three base models -> meta LogisticRegression
+  5. refit the base models on the whole training split
+
+Rows are built with the serving normalizers (tokenize, PSGC region aliases,
+normalize_student_type / normalize_school_type, derive_engineered), and Age
+and the Same* flags stay numeric, so the one-hot columns are the ones
+build_feature_row + encode_matrix produce at request time. The stack is
+[rf, lr, xg], the order predict_with_stack_batch feeds the meta model.
+
+Steps 1-2 are cached under --cache-dir, keyed by the sha1 of the xlsx and
+PREP_VERSION: feature rows as Parquet (pickle without pyarrow) and the
+encoded matrix as a sparse .npz, so a rerun on the same file skips the
+Excel parse and get_dummies. The 15 fold fits and the 3 final fits are
+independent and run as one joblib pool of --jobs processes. RF and LR are
+fitted on the sparse matrix (about 16 non-zeros per row out of ~1900
+columns); XGBoost on the dense one, see fit_stack.
+
+The artifacts are written in the layout load_models reads (meta_model.pkl,
+rf.pkl, lr.pkl, xg.pkl, training_columns.pkl, X_train_encoded.pkl) plus
+training.json (scores, parameters, timings, input hash) into a temp dir that
+is renamed into place, so model watchers never see a partial version.
+"""
+import os
+import json
+import time
+import shutil
+import hashlib
+import platform
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from joblib import Parallel, delayed
+
+from . import (ARTIFACT_FILES, activate_model_version, derive_engineered, normalize_school_type,
+               normalize_student_type, resolve_model_dir, tokenize)
+
+try:
+    import pyarrow  # noqa: F401  (pandas' Parquet engine)
+except ImportError:  # optional: the row cache falls back to pickle
+    pyarrow = None
+
+# bump whenever feature_rows or the encoding changes, so stale caches are not reused
+PREP_VERSION = "2"
+TARGET = "Enrolled"
+
+# xlsx column -> model input key (the /api/predict field it corresponds to)
+INPUT_COLUMNS = {
+    "first program": "Program (First Choice)",
+    "second program": "Program (Second Choice)",
+    "current region": "Current Region",
+    "current province": "Current Province",
+    "current city/municipality": "City/Municipality",
+    "permanent country": "Permanent Country",
+    "permanent region": "Permanent Region",
+    "permanent province": "Permanent Province",
+    "permanent city/municipality": "Permanent City",
+    "student type": "Student Type",
+    "school type": "School Type",
+}
+
+# fixed hyperparameters used without --search
+DEFAULT_PARAMS = {
+    "rf": {"n_estimators": 300, "max_depth": 20, "min_samples_split": 5},
+    "lr": {"C": 1.0, "solver": "lbfgs"},
+    "xg": {"n_estimators": 300, "max_depth": 6, "learning_rate": 0.1},
+}
+
+
+def default_data_path(app):
+    return os.path.join(os.path.dirname(app.root_path), "AI Trainings", "cleaned (4).xlsx")
+
+
+def region_aliases(app):
+    # "region iv-a" -> "calabarzon": the dataset uses region numbers, the apply form sends PSGC tokens
+    path = os.path.join(app.static_folder, "psgc", "regions.json")
+    try:
+        with open(path, encoding="utf-8") as f:
+            items = json.load(f)["items"]
+    except (OSError, ValueError, KeyError):
+        return {}
+    return {a: it["token"] for it in items for a in it.get("aliases", [])}
+
+
+def _token(value, key, regions):
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return ""
+    v = tokenize(value)
+    if not v:
+        return ""
+    if key.endswith("region"):
+        return regions.get(v, v)
+    if key == "student type":
+        return normalize_student_type(v)
+    if key == "school type":
+        return normalize_school_type(v)
+    return v
+
+
+def feature_rows(df, regions):
+    """The rows build_feature_row would produce for each applicant.
+
+    Missing values become None, which get_dummies encodes as an all-zero group (as in the
+    notebooks); an "" column would otherwise show up as an empty choice in /api/options.
+    """
+    ages = pd.to_numeric(df["Age"], errors="coerce") if "Age" in df else pd.Series(np.nan, index=df.index)
+    fill = int(ages.median()) if ages.notna().any() else 0
+    rows = []
+    for rec, age in zip(df.to_dict("records"), ages):
+        ex = {key: _token(rec.get(col), key, regions) for key, col in INPUT_COLUMNS.items()}
+        local_or_foreign, same_region, same_province, same_city, _ = derive_engineered(ex)
+        # two missing values are not a match (NaN != NaN in the notebooks)
+        same_region = same_region if ex["current region"] else 0
+        same_province = same_province if ex["current province"] else 0
+        same_city = same_city if ex["current city/municipality"] else 0
+        rows.append({
+            "Program (First Choice)": ex["first program"] or None,
+            "Program (Second Choice)": ex["second program"] or None,
+            "Current Region": ex["current region"] or None,
+            "Current Province": ex["current province"] or None,
+            "Current City": ex["current city/municipality"] or None,
+            "Permanent Country": ex["permanent country"] or None,
+            "Permanent Region": ex["permanent region"] or None,
+            "Permanent Province": ex["permanent province"] or None,
+            "Permanent City": ex["permanent city/municipality"] or None,
+            "Student Type": ex["student type"] or None,
+            "School Type": ex["school type"] or None,
+            "LocalOrForeign": local_or_foreign,
+            "SameRegion": same_region,
+            "SameProvince": same_province,
+            "SameCity": same_city,
+            "Age": fill if np.isnan(age) else int(age),
+        })
+    return pd.DataFrame(rows)
+
+
+def file_sha1(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def load_dataset(app, path, cache_dir, log=print):
+    """(feature rows, encoded csr matrix, column names, labels, input sha1), from the cache when possible."""
+    digest = file_sha1(path)
+    key = hashlib.sha1(f"{digest}:{PREP_VERSION}".encode()).hexdigest()[:16]
+    rows_path = os.path.join(cache_dir, f"{key}.rows." + ("parquet" if pyarrow is not None else "pkl"))
+    matrix_path = os.path.join(cache_dir, f"{key}.encoded.npz")
+    meta_path = os.path.join(cache_dir, f"{key}.json")
+    if all(os.path.exists(p) for p in (rows_path, matrix_path, meta_path)):
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        rows = pd.read_parquet(rows_path) if rows_path.endswith(".parquet") else pd.read_pickle(rows_path)
+        log(f"[train] dataset cache hit {key} ({len(rows)} rows)")
+        return rows, sp.load_npz(matrix_path), meta["columns"], np.asarray(meta["y"]), digest
+
+    df = pd.read_excel(path)
+    if TARGET not in df.columns:
+        raise ValueError(f"{path} has no {TARGET!r} column")
+    rows = feature_rows(df, region_aliases(app))
+    y = df[TARGET].astype(int).to_numpy()
+    encoded = pd.get_dummies(rows)
+    columns = [str(c) for c in encoded.columns]
+    X = sp.csr_matrix(encoded.to_numpy(dtype=np.float32))
+
+    os.makedirs(cache_dir, exist_ok=True)
+    if rows_path.endswith(".parquet"):
+        rows.assign(**{TARGET: y}).to_parquet(rows_path, index=False)
+    else:
+        rows.assign(**{TARGET: y}).to_pickle(rows_path)
+    sp.save_npz(matrix_path, X)
+    with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"source": os.path.abspath(path), "sha1": digest, "prep_version": PREP_VERSION,
+                   "columns": columns, "y": y.tolist()}, f)
+    os.replace(meta_path + ".tmp", meta_path)  # written last: the cache entry is complete once it exists
+    log(f"[train] parsed {path}: {len(rows)} rows, {len(columns)} columns (cached as {key})")
+    return rows, X, columns, y, digest
+
+
+def make_model(name, params, seed):
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression
+    from xgboost import XGBClassifier
+    if name == "rf":
+        return RandomForestClassifier(random_state=seed, n_jobs=1, **params)
+    if name == "lr":
+        return LogisticRegression(max_iter=1000, **params)
+    return XGBClassifier(eval_metric="logloss", random_state=seed, n_jobs=1, **params)
+
+
+def search_spaces():
+    # the notebook's RandomizedSearchCV distributions
+    from scipy.stats import randint
+    return {
+        "rf": {"n_estimators": randint(low=100, high=500), "max_depth": [None, 10, 20, 30],
+               "min_samples_split": randint(low=2, high=20)},
+        "lr": {"C": [0.001, 0.01, 0.1, 1, 10, 100], "solver": ["liblinear", "lbfgs"]},
+        "xg": {"learning_rate": [0.01, 0.1, 0.2], "n_estimators": randint(low=100, high=500),
+               "max_depth": randint(low=3, high=10)},
+    }
+
+
+def tune(X, y, n_iter, folds, jobs, seed, log=print):
+    # X: csr matrix (dense for XGBoost, see fit_stack); only the best parameters are kept
+    from sklearn.model_selection import RandomizedSearchCV
+    params, scores = {}, {}
+    for name, space in search_spaces().items():
+        t0 = time.perf_counter()
+        search = RandomizedSearchCV(make_model(name, {}, seed), space, n_iter=n_iter, cv=folds, scoring="f1",
+                                    n_jobs=jobs, random_state=seed)
+        search.fit(X.toarray() if name == "xg" else X, y)
+        params[name] = {k: (v.item() if isinstance(v, np.generic) else v) for k, v in search.best_params_.items()}
+        scores[name] = float(search.best_score_)
+        log(f"[train] search {name}: f1 {search.best_score_:.4f} {params[name]} ({time.perf_counter() - t0:.1f}s)")
+    return params, scores
+
+
+def _fit(name, params, seed, X, y, columns, predict_on=None):
+    # one pool task: fit one base model, optionally score a validation block
+    if sp.issparse(X):
+        # RF and LR fit on a sparse frame: same trees/coefficients as dense, several times faster,
+        # and they keep the feature names the library path predicts with
+        X = pd.DataFrame.sparse.from_spmatrix(X, columns=columns)
+        if predict_on is not None:
+            predict_on = pd.DataFrame.sparse.from_spmatrix(predict_on, columns=columns)
+    t0 = time.perf_counter()
+    model = make_model(name, params, seed).fit(X, y)
+    proba = model.predict_proba(predict_on)[:, 1] if predict_on is not None else None
+    return model, proba, time.perf_counter() - t0
+
+
+STACK_ORDER = ["rf", "lr", "xg"]  # meta model input columns, as in predict_with_stack_batch
+
+
+def fit_stack(X, y, columns, params, folds, jobs, seed, log=print):
+    """Out-of-fold stack + meta model + base models refit on all of X, all base fits in one pool.
+
+    X is the csr matrix; XGBoost gets it dense because it reads entries missing from a sparse
+    matrix as missing values rather than zeros, which would not match the dense rows it is served.
+    """
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.metrics import f1_score
+    from sklearn.model_selection import StratifiedKFold
+
+    data = {"rf": X, "lr": X, "xg": X.toarray()}
+    splits = list(StratifiedKFold(n_splits=folds, shuffle=True, random_state=seed).split(data["xg"], y))
+
+    tasks = [(name, None) for name in STACK_ORDER]  # final fits first: the longest tasks start early
+    tasks += [(name, k) for k in range(folds) for name in STACK_ORDER]
+    jobs_ = [delayed(_fit)(name, params[name], seed, data[name], y, columns) if k is None else
+             delayed(_fit)(name, params[name], seed, data[name][splits[k][0]], y[splits[k][0]], columns,
+                           data[name][splits[k][1]])
+             for name, k in tasks]
+    t0 = time.perf_counter()
+    results = Parallel(n_jobs=jobs)(jobs_)
+    fit_seconds = sum(r[2] for r in results)
+    log(f"[train] {len(tasks)} base-model fits in {time.perf_counter() - t0:.1f}s "
+        f"({fit_seconds:.1f}s of fitting, jobs={jobs})")
+
+    stack = np.zeros((len(y), len(STACK_ORDER)))
+    final, oof_f1 = {}, {name: [] for name in STACK_ORDER}
+    for (name, k), (model, proba, _) in zip(tasks, results):
+        col = STACK_ORDER.index(name)
+        if k is None:
+            final[name] = model
+        else:
+            val = splits[k][1]
+            stack[val, col] = proba
+            oof_f1[name].append(f1_score(y[val], (proba > 0.5).astype(int)))
+    meta = LogisticRegression(random_state=seed).fit(stack, y)
+    return final, meta, {name: float(np.mean(v)) for name, v in oof_f1.items()}
+
+
+def evaluate(final, meta, X, columns, y):
+    from sklearn.metrics import accuracy_score, f1_score, roc_auc_score
+    frame = pd.DataFrame(X, columns=columns, copy=False)
+    stack = np.column_stack([final["rf"].predict_proba(frame)[:, 1], final["lr"].predict_proba(frame)[:, 1],
+                             final["xg"].predict_proba(X)[:, 1]])
+    prob = meta.predict_proba(stack)[:, 1]
+    pred = (prob > 0.5).astype(int)
+    return {"accuracy": float(accuracy_score(y, pred)), "f1": float(f1_score(y, pred)),
+            "roc_auc": float(roc_auc_score(y, prob)), "n": int(len(y))}
+
+
+def write_version(root, version, artifacts, report):
+    # everything goes to a hidden temp dir first; the rename makes the version appear complete
+    final_dir = os.path.join(root, version)
+    if os.path.exists(final_dir):
+        raise ValueError(f"model version {version!r} already exists in {root}")
+    tmp = os.path.join(root, f".{version}.tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    for name, obj in artifacts.items():
+        joblib.dump(obj, os.path.join(tmp, ARTIFACT_FILES[name]))
+    with open(os.path.join(tmp, "training.json"), "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp, final_dir)
+    return final_dir
+
+
+def train(app, root, data_path=None, version=None, cache_dir=None, jobs=-1, folds=5, search=0, seed=42,
+          test_size=0.2, activate=False, log=print):
+    """Train and write MODELS_DIR/<version>/; returns the version name."""
+    import sklearn
+    import xgboost
+    from sklearn.model_selection import train_test_split
+
+    t_start = time.perf_counter()
+    data_path = data_path or default_data_path(app)
+    cache_dir = cache_dir or os.path.join(app.instance_path, "train-cache")
+    version = version or datetime.now().strftime("%Y-%m-%d-%H%M%S")
+    if os.path.exists(os.path.join(root, version)):
+        raise ValueError(f"model version {version!r} already exists in {root}")
+    timings = {}
+
+    t0 = time.perf_counter()
+    _, X_sparse, columns, y, digest = load_dataset(app, data_path, cache_dir, log=log)
+    idx_train, idx_test = train_test_split(np.arange(len(y)), test_size=test_size, random_state=seed)
+    X_train, X_test = X_sparse[idx_train], X_sparse[idx_test].toarray()
+    y_train, y_test = y[idx_train], y[idx_test]
+    timings["dataset"] = time.perf_counter() - t0
+
+    params, search_scores = {k: dict(v) for k, v in DEFAULT_PARAMS.items()}, None
+    if search:
+        t0 = time.perf_counter()
+        params, search_scores = tune(X_train, y_train, search, folds, jobs, seed, log=log)
+        timings["search"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    final, meta, oof_f1 = fit_stack(X_train, y_train, columns, params, folds, jobs, seed, log=log)
+    timings["stack"] = time.perf_counter() - t0
+    test = evaluate(final, meta, X_test, columns, y_test) if len(y_test) else None
+
+    t0 = time.perf_counter()
+    # the training matrix as the notebooks saved it; one byte per cell when every value fits
+    dense = X_train.toarray()
+    compact = dense.astype(np.uint8)
+    X_train_encoded = pd.DataFrame(compact if np.array_equal(compact, dense) else dense, columns=columns)
+    report = {
+        "version": version, "created_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "data": {"path": os.path.abspath(data_path), "sha1": digest, "rows": int(len(y)),
+                 "train_rows": int(len(y_train)), "test_rows": int(len(y_test)), "columns": len(columns)},
+        "params": params, "search_f1": search_scores, "oof_f1": oof_f1, "test": test,
+        "folds": folds, "seed": seed, "jobs": jobs, "stack_order": STACK_ORDER,
+        "timings": {k: round(v, 2) for k, v in timings.items()},
+        "versions": {"python": platform.python_version(), "sklearn": sklearn.__version__,
+                     "xgboost": xgboost.__version__, "numpy": np.__version__, "pandas": pd.__version__},
+    }
+    os.makedirs(root, exist_ok=True)
+    out = write_version(root, version, {
+        "meta": meta, "rf": final["rf"], "lr": final["lr"], "xg": final["xg"],
+        "training_columns": X_train_encoded.columns, "X_train_encoded": X_train_encoded,
+    }, report)
+    log(f"[train] saved artifacts in {time.perf_counter() - t0:.1f}s")
+
+    log("[train] oof f1 " + ", ".join(f"{k} {v:.4f}" for k, v in oof_f1.items()))
+    if test:
+        log(f"[train] held-out stack: accuracy {test['accuracy']:.4f}, f1 {test['f1']:.4f}, "
+            f"roc_auc {test['roc_auc']:.4f}")
+    log(f"[train] wrote {out} in {time.perf_counter() - t_start:.1f}s")
+    if activate:
+        activate_model_version(root, version)
+        log(f"[train] CURRENT -> {version}")
+    elif resolve_model_dir(root)[1] == version:
+        log(f"[train] note: {root} has no CURRENT file and no flat artifacts, so the newest version ({version}) is served")
+    else:
+        log(f"[train] not activated; run `flask models-activate {version}` to serve it")
+    return version
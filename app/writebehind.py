@@ -0,0 +1,232 @@
+"""Write-behind queue for prediction records (WRITE_BEHIND=1).
+
+Request handlers enqueue record mappings and return; one writer thread per
+process drains the queue and hands batches of up to WRITE_BATCH_SIZE records
+(or whatever arrived within WRITE_FLUSH_INTERVAL seconds) to a flush function
+that inserts them in a single transaction.
+
+Every enqueued record is first appended to a per-process spool file
+(WRITE_SPOOL_DIR/records-<pid>.jsonl). After each committed batch the writer
+appends a {"committed": n} marker, and truncates the file once nothing is
+pending. The file is flock'ed while its process lives; at startup, and before
+a process opens its own spool, any spool without a live owner is replayed from
+its last marker and removed. Delivery
+is at-least-once: a crash between a commit and its marker replays that batch.
+
+When the queue is full, enqueue() waits up to WRITE_QUEUE_TIMEOUT seconds and
+then hands the records it could not take back to the caller, which writes
+them inline: under sustained overload requests slow down to synchronous
+speed instead of growing memory or losing records.
+"""
+import os
+import json
+import glob
+import time
+import queue
+import atexit
+import fcntl
+import threading
+from datetime import datetime
+
+
+def _dump(m):
+    return json.dumps({k: (v.isoformat() if isinstance(v, datetime) else v) for k, v in m.items()})
+
+
+def _load(line):
+    m = json.loads(line)
+    if isinstance(m.get("created_at"), str):
+        m["created_at"] = datetime.fromisoformat(m["created_at"])
+    return m
+
+
+class RecordWriter:
+    def __init__(self, app, flush, spool_dir, batch_size=200, interval=0.5, maxsize=10000, put_timeout=2.0, fsync=False):
+        self.app = app
+        self.flush = flush
+        self.spool_dir = spool_dir
+        self.batch_size = batch_size
+        self.interval = interval
+        self.put_timeout = put_timeout
+        self.fsync = fsync
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.stats = {"enqueued": 0, "written": 0, "batches": 0, "rejected": 0, "replayed": 0,
+                      "last_flush_ms": None, "last_error": None}
+        self._lock = threading.Lock()
+        self._room = threading.Condition()  # notified when the writer takes records off the queue
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._spool = None
+        self._appended = 0
+        self._committed = 0
+
+    # ---- producer side ----
+    def _ensure_started(self):
+        # threads and file locks do not survive gunicorn's fork: (re)open per process
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            os.makedirs(self.spool_dir, exist_ok=True)
+            try:
+                self.replay_orphans()
+            except Exception as e:
+                self.stats["last_error"] = f"replay: {type(e).__name__}: {e}"
+            self._spool = open(os.path.join(self.spool_dir, f"records-{os.getpid()}.jsonl"), "a+", encoding="utf-8")
+            fcntl.flock(self._spool, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            self._appended = self._committed = 0
+            self.queue = queue.Queue(maxsize=self.queue.maxsize)
+            self._pid = os.getpid()
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, daemon=True, name="record-writer")
+            self._thread.start()
+            atexit.register(self.drain)
+
+    def enqueue(self, mappings):
+        """Queue records for the writer; returns the ones that did not fit (write those inline)."""
+        self._ensure_started()
+        deadline = time.monotonic() + self.put_timeout
+        i = 0
+        while True:
+            with self._lock:
+                # queue order and spool order must agree, so each put and its spool line happen under the
+                # lock; it is never held while waiting for room, since the writer needs it after every flush
+                while i < len(mappings):
+                    try:
+                        self.queue.put_nowait(mappings[i])
+                    except queue.Full:
+                        break
+                    self._spool.write(_dump(mappings[i]) + "\n")
+                    self._appended += 1
+                    self.stats["enqueued"] += 1
+                    i += 1
+                self._spool.flush()
+                if self.fsync:
+                    os.fsync(self._spool.fileno())
+            left = deadline - time.monotonic()
+            if i == len(mappings) or left <= 0:
+                break
+            with self._room:
+                self._room.wait(min(left, 0.05))
+        self.stats["rejected"] += len(mappings) - i
+        return mappings[i:]
+
+    # ---- writer side ----
+    def _next_batch(self, block=True):
+        batch = self._collect(block)
+        if batch:
+            with self._room:
+                self._room.notify_all()
+        return batch
+
+    def _collect(self, block):
+        batch = []
+        try:
+            batch.append(self.queue.get(timeout=self.interval if block else 0.001))
+        except queue.Empty:
+            return batch
+        deadline = time.monotonic() + self.interval
+        while len(batch) < self.batch_size:
+            left = deadline - time.monotonic()
+            if left <= 0 or not block:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+                continue
+            try:
+                batch.append(self.queue.get(timeout=left))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        while True:
+            t = time.perf_counter()
+            try:
+                with self.app.app_context():
+                    self.flush(batch)
+                break
+            except Exception as e:
+                # keep the batch (it is still in the spool) and retry after a pause
+                self.stats["last_error"] = f"{type(e).__name__}: {e}"
+                time.sleep(max(self.interval, 1.0))
+        self.stats["last_flush_ms"] = round((time.perf_counter() - t) * 1000, 2)
+        self.stats["written"] += len(batch)
+        self.stats["batches"] += 1
+        with self._lock:
+            self._committed += len(batch)
+            if self._committed == self._appended:
+                self._spool.seek(0)
+                self._spool.truncate()
+                self._appended = self._committed = 0
+            else:
+                self._spool.write(json.dumps({"committed": self._committed}) + "\n")
+            self._spool.flush()
+
+    def _run(self):
+        while True:
+            batch = self._next_batch(block=not self._stop.is_set())
+            if batch:
+                self._write(batch)
+            elif self._stop.is_set():
+                return
+
+    def drain(self, timeout=30):
+        # at shutdown: let the writer flush what it holds and empty the queue, then stop.
+        # Anything it cannot finish in time is replayed from the spool on the next start.
+        if self._pid != os.getpid():
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def pending(self):
+        return self.queue.qsize()
+
+    # ---- recovery ----
+    def replay_orphans(self):
+        """Insert records from spools whose process is gone, then delete those files."""
+        total = 0
+        for path in sorted(glob.glob(os.path.join(self.spool_dir, "records-*.jsonl"))):
+            try:
+                f = open(path, "r+", encoding="utf-8")
+            except FileNotFoundError:
+                continue
+            with f:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    if os.stat(path).st_ino != os.fstat(f.fileno()).st_ino:
+                        continue  # another process replayed and removed it meanwhile
+                except OSError:
+                    continue  # owner still running
+                records, done = [], 0
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        m = json.loads(line)
+                    except ValueError:
+                        break  # torn last line from the crash
+                    if set(m) == {"committed"}:
+                        done = m["committed"]
+                    else:
+                        records.append(line)
+                todo = [_load(line) for line in records[done:]]
+                f.seek(0, os.SEEK_END)
+                for i in range(0, len(todo), self.batch_size):
+                    with self.app.app_context():
+                        self.flush(todo[i:i + self.batch_size])
+                    # progress marker, so a replay that fails part-way resumes instead of repeating
+                    f.write(json.dumps({"committed": done + min(i + self.batch_size, len(todo))}) + "\n")
+                    f.flush()
+                total += len(todo)
+                os.remove(path)
+        self.stats["replayed"] += total
+        return total
+
+    def snapshot(self):
+        return {**self.stats, "queued": self.pending(), "maxsize": self.queue.maxsize,
+                "batch_size": self.batch_size, "interval": self.interval}
@@ -0,0 +1,83 @@
+"""difflib.get_close_matches vs. the indexed matcher (app/fuzzy.py) on the PSGC city list.
+
+    python benchmarks/fuzzy.py
+    python benchmarks/fuzzy.py --level barangays --queries 300
+
+Queries are real tokens with one or two random typos (drop, swap, replace).
+Reports per-lookup latency of both and how often the index returns exactly
+the same top-3 as difflib. Results are printed as JSON.
+"""
+import argparse
+import difflib
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.fuzzy import FuzzyIndex  # noqa: E402
+
+
+def typo(rng, s):
+    s = list(s)
+    for _ in range(rng.randint(1, 2)):
+        if len(s) < 3:
+            break
+        i = rng.randrange(len(s) - 1)
+        op = rng.choice("dsr")
+        if op == "d":
+            del s[i]
+        elif op == "s":
+            s[i], s[i + 1] = s[i + 1], s[i]
+        else:
+            s[i] = rng.choice("abcdefghijklmnopqrstuvwxyz")
+    return "".join(s)
+
+
+def timed(fn, queries):
+    out, times = [], []
+    for q in queries:
+        t = time.perf_counter()
+        out.append(fn(q))
+        times.append((time.perf_counter() - t) * 1000)
+    return out, times
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--level", default="cities", choices=["regions", "provinces", "cities", "barangays"])
+    ap.add_argument("--queries", type=int, default=500)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    with open(os.path.join(ROOT, "app", "static", "psgc", f"{args.level}.json"), encoding="utf-8") as f:
+        data = json.load(f)
+    tokens = sorted({it["token"] for it in data["items"] if it.get("token")})
+
+    t = time.perf_counter()
+    index = FuzzyIndex(tokens)
+    build_ms = (time.perf_counter() - t) * 1000
+
+    rng = random.Random(args.seed)
+    queries = [typo(rng, rng.choice(tokens)) for _ in range(args.queries)]
+    ref, ref_t = timed(lambda q: difflib.get_close_matches(q, tokens, n=3, cutoff=0.6), queries)
+    got, got_t = timed(lambda q: index.search(q, k=3, cutoff=0.6), queries)
+
+    print(json.dumps({
+        "level": args.level,
+        "vocabulary": len(tokens),
+        "queries": len(queries),
+        "index_build_ms": round(build_ms, 1),
+        "difflib_ms": {"median": round(statistics.median(ref_t), 3), "p95": round(sorted(ref_t)[int(len(ref_t) * 0.95)], 3)},
+        "index_ms": {"median": round(statistics.median(got_t), 3), "p95": round(sorted(got_t)[int(len(got_t) * 0.95)], 3)},
+        "same_top3": sum(a == b for a, b in zip(ref, got)) / len(queries),
+        "same_top1": sum(a[:1] == b[:1] for a, b in zip(ref, got)) / len(queries),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
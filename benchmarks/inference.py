@@ -0,0 +1,87 @@
+"""Library predict_proba vs. the compiled NumPy kernel (app/compiled.py).
+
+    python benchmarks/inference.py                  # model dir from MODELS_DIR / app/AIMODEL
+    python benchmarks/inference.py --rows 2000 --batch 1 32 512
+
+Scores random rows built from the training tokens through both paths,
+reports the largest probability difference and the median latency per batch
+size. Results are printed as JSON.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def random_rows(app_module, n, seed):
+    rng = random.Random(seed)
+    rows = []
+    while len(rows) < n:
+        payload = {k: (rng.choice(v) if v else "") for k, v in app_module.CACHED_TOKEN_OPTIONS.items()}
+        payload["dateofbirth"] = f"{rng.randint(1985, 2010)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        row, err = app_module.build_feature_row(payload)
+        if not err:
+            rows.append(row)
+    return rows
+
+
+def median_ms(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=1000)
+    ap.add_argument("--batch", type=int, nargs="+", default=[1, 32, 512])
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    import app as A
+    from app.compiled import compile_ensemble
+
+    A.create_app()
+    if not A.wait_for_models():
+        sys.exit("models did not load")
+    models = A.MODELS
+    t = time.perf_counter()
+    kernel = compile_ensemble(models)
+    compile_ms = (time.perf_counter() - t) * 1000
+
+    rows = random_rows(A, args.rows, args.seed)
+    X = A.encode_matrix(rows, models)
+    df = A.encode_rows(rows, models)
+    p_lib, c_lib = A.predict_with_stack_batch(df, models)
+    p_cmp, c_cmp = kernel.predict(X)
+
+    out = {
+        "model_version": models["version"],
+        "rows": len(rows),
+        "compile_ms": round(compile_ms, 2),
+        "max_abs_diff_prob": float(abs(p_lib - p_cmp).max()),
+        "max_abs_diff_conf": float(abs(c_lib - c_cmp).max()),
+        "latency_ms": [],
+    }
+    for b in args.batch:
+        b = min(b, len(rows))
+        dfb, Xb = df.iloc[:b], X[:b]
+        lib = median_ms(lambda: A.predict_with_stack_batch(dfb, models), args.repeat)
+        cmp_ = median_ms(lambda: kernel.predict(Xb), args.repeat)
+        out["latency_ms"].append({"batch": b, "library": round(lib, 3), "compiled": round(cmp_, 3),
+                                  "speedup": round(lib / cmp_, 1) if cmp_ else None})
+    print(json.dumps(out, indent=2))
+
+
+if __name__ == "__main__":
+    main()
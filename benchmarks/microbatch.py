@@ -0,0 +1,125 @@
+"""Load test for /api/predict with and without micro-batching (MICROBATCH=1).
+
+    python benchmarks/microbatch.py                              # off vs. 0/2/5 ms waits, 16 clients
+    python benchmarks/microbatch.py --waits 1 --max-rows 16 --inference compiled
+
+Each configuration starts gunicorn (gunicorn.conf.py) with --workers workers
+of --threads threads on a fresh SQLite database, with the prediction cache
+off so every call reaches the ensemble, and drives /api/predict from N
+client threads for --duration seconds. Reports throughput, latency
+percentiles and the batch-size and queue-wait histograms from /metrics as
+JSON. MODELS_DIR is taken from the environment.
+"""
+import argparse
+import json
+import os
+import random
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+from startup import ROOT, free_port
+from write_load import payloads, post, wait_ready
+
+
+def batch_stats(base):
+    with urllib.request.urlopen(base + "/metrics?format=json") as r:
+        hists = json.load(r)["histograms"]
+    out = {}
+    for h in hists:
+        if h["name"] == "admissions_predict_batch_rows":
+            out["batch_rows"] = {k: h[k] for k in ("count", "mean", "p50", "p95", "p99")}
+        elif h["name"] == "admissions_predict_batch_wait_seconds":
+            out["queue_wait_ms"] = {k: round(h[k] * 1000, 3) if h[k] is not None else None
+                                    for k in ("mean", "p50", "p95", "p99")}
+    return out
+
+
+def run(wait_ms, args):
+    tmp = tempfile.mkdtemp(prefix="microbatch-")
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    env = dict(os.environ, GUNICORN_WORKERS=str(args.workers), GUNICORN_THREADS=str(args.threads),
+               GUNICORN_BIND=f"127.0.0.1:{port}", DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'load.db')}",
+               MODEL_WATCH_INTERVAL="0", PREDICT_CACHE_SIZE="0", INFERENCE_MODE=args.inference,
+               MICROBATCH="0" if wait_ms is None else "1", MICROBATCH_WAIT_MS=str(wait_ms or 0),
+               MICROBATCH_MAX_ROWS=str(args.max_rows))
+    env.pop("METRICS_DIR", None)
+    proc = subprocess.Popen([sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py"], cwd=ROOT, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_ready(base)
+        bodies = payloads(base, 500, args.seed)
+        for b in bodies[:20]:
+            post(base + "/api/predict", b)
+        latencies, errors, lock = [], [0], threading.Lock()
+        stop = time.perf_counter() + args.duration
+
+        def client(i):
+            rng = random.Random(args.seed + i)
+            mine = []
+            while time.perf_counter() < stop:
+                t = time.perf_counter()
+                try:
+                    ok = post(base + "/api/predict", rng.choice(bodies)) == 200
+                except Exception:
+                    ok = False
+                mine.append((time.perf_counter() - t) * 1000)
+                if not ok:
+                    with lock:
+                        errors[0] += 1
+            with lock:
+                latencies.extend(mine)
+
+        t0 = time.perf_counter()
+        threads = [threading.Thread(target=client, args=(i,)) for i in range(args.clients)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        elapsed = time.perf_counter() - t0
+        batches = batch_stats(base) if wait_ms is not None and args.workers == 1 else {}
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(60)
+
+    lat = sorted(latencies)
+    pct = lambda q: round(lat[min(len(lat) - 1, int(q * len(lat)))], 2)
+    return {
+        "microbatch": "off" if wait_ms is None else f"{wait_ms:g} ms / {args.max_rows} rows",
+        "inference": args.inference,
+        "workers": args.workers,
+        "threads": args.threads,
+        "clients": args.clients,
+        "requests": len(lat),
+        "errors": errors[0],
+        "throughput_rps": round(len(lat) / elapsed, 1),
+        "latency_ms": {"mean": round(statistics.mean(lat), 2), "p50": pct(0.50), "p95": pct(0.95), "p99": pct(0.99),
+                       "max": round(lat[-1], 2)},
+        **batches,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--workers", type=int, default=1, help="batch histograms are read when this is 1")
+    ap.add_argument("--threads", type=int, default=16)
+    ap.add_argument("--clients", type=int, default=16)
+    ap.add_argument("--duration", type=float, default=15)
+    ap.add_argument("--waits", type=float, nargs="+", default=[0, 2, 5], help="MICROBATCH_WAIT_MS values to try")
+    ap.add_argument("--max-rows", type=int, default=32)
+    ap.add_argument("--inference", choices=["library", "compiled"], default="library")
+    ap.add_argument("--no-baseline", action="store_true", help="skip the MICROBATCH=0 run")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+    configs = ([] if args.no_baseline else [None]) + args.waits
+    results = [run(w, args) for w in configs]
+    json.dump(results, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Mixed read/write load on SQLite with SQLITE_PROFILE=off vs. performance.
+
+    python benchmarks/sqlite_load.py                        # 4 writers, 4 readers, 15 s per profile
+    python benchmarks/sqlite_load.py --writers 8 --readers 2 --seed-rows 50000
+
+Each profile gets a fresh database seeded with --seed-rows records. Writer
+processes commit single records the way /api/predict does (record + rollup
+in one transaction); reader processes request /api/admin/table and
+/api/admin/metrics with the response cache disabled. Reports operations per
+second, latency percentiles and "database is locked" failures as JSON.
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from synthetic import ROOT, fake_record
+
+sys.path.insert(0, ROOT)
+
+
+def make_app():
+    # models are not needed here (MODELS_DIR points nowhere)
+    import app as A
+    return A, A.create_app()
+
+
+def worker(kind, idx, stop_at, out):
+    A, app = make_app()
+    rng = random.Random(idx)
+    lat, errors = [], 0
+    client = app.test_client()
+    started = time.time()
+    while time.time() < stop_at:
+        t = time.perf_counter()
+        try:
+            if kind == "write":
+                with app.app_context():
+                    A.save_records([fake_record(rng)])
+            else:
+                url = rng.choice(["/api/admin/table?sort=priority&page=%d" % rng.randint(1, 20),
+                                  "/api/admin/metrics?days=30"])
+                if client.get(url).status_code != 200:
+                    errors += 1
+        except Exception as e:
+            errors += 1
+            if "locked" not in str(e):
+                print(f"[{kind}] {e}", file=sys.stderr)
+            with app.app_context():
+                A.db.session.rollback()
+        lat.append((time.perf_counter() - t) * 1000)
+    out.put((kind, lat, errors, time.time() - started))
+
+
+def run(profile, writers, readers, duration, seed_rows):
+    tmp = tempfile.mkdtemp(prefix="sqlite-load-")
+    os.environ.update(DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'load.db')}", SQLITE_PROFILE=profile,
+                      ADMIN_CACHE_TTL="0", MODEL_WATCH_INTERVAL="0", WRITE_BEHIND="0",
+                      MODELS_DIR=os.path.join(tmp, "no-models"))
+    A, app = make_app()
+    rng = random.Random(0)
+    now = datetime.utcnow()
+    with app.app_context():
+        for i in range(0, seed_rows, 5000):
+            A.save_records([fake_record(rng, now - timedelta(minutes=rng.randint(0, 60 * 24 * 60)))
+                            for _ in range(min(5000, seed_rows - i))])
+        A.db.engine.dispose()
+
+    ctx = mp.get_context("fork")
+    out = ctx.Queue()
+    stop_at = time.time() + 3 + duration  # children need a moment to build their app; rates use their own clock
+    procs = [ctx.Process(target=worker, args=("write", i, stop_at, out)) for i in range(writers)]
+    procs += [ctx.Process(target=worker, args=("read", 100 + i, stop_at, out)) for i in range(readers)]
+    for p in procs: p.start()
+    results = [out.get() for _ in procs]
+    for p in procs: p.join()
+
+    report = {"profile": profile, "writers": writers, "readers": readers, "seed_rows": seed_rows}
+    for kind in ("write", "read"):
+        mine = [r for r in results if r[0] == kind]
+        lat = sorted(x for r in mine for x in r[1])
+        if not lat:
+            continue
+        errs = sum(r[2] for r in mine)
+        elapsed = max(r[3] for r in mine)
+        pct = lambda q: round(lat[min(len(lat) - 1, int(q * len(lat)))], 2)
+        report[kind] = {"ops": len(lat), "ops_per_s": round(len(lat) / elapsed, 1), "errors": errs,
+                        "p50_ms": pct(0.5), "p95_ms": pct(0.95), "p99_ms": pct(0.99), "max_ms": round(lat[-1], 2)}
+    return report
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--writers", type=int, default=4)
+    ap.add_argument("--readers", type=int, default=4)
+    ap.add_argument("--duration", type=float, default=15)
+    ap.add_argument("--seed-rows", type=int, default=20000)
+    ap.add_argument("--profiles", nargs="+", choices=["off", "performance"], default=["off", "performance"])
+    args = ap.parse_args()
+    results = [run(p, args.writers, args.readers, args.duration, args.seed_rows) for p in args.profiles]
+    json.dump(results, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
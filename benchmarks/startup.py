@@ -0,0 +1,137 @@
+"""Cold-start time and per-worker memory of the gunicorn deployment.
+
+    python benchmarks/startup.py                   # 1, 4 and 8 workers, preload on and off
+    python benchmarks/startup.py --workers 4 --modes preload
+    python benchmarks/startup.py --workers 1 --snapshots off cold warm
+
+For every run it starts gunicorn with gunicorn.conf.py on a free port, polls
+/health/ready until every worker has answered 200, and reads RSS and PSS (RSS
+with shared pages split between the processes sharing them) of the master and
+each worker from /proc. A 503 from /health/ready counts as live. --snapshots
+runs each configuration without startup snapshots (off), with an empty
+snapshot directory (cold) and with one a previous start has filled (warm).
+Results are printed as JSON.
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import shutil
+import tempfile
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def children(pid):
+    out = []
+    for task in os.listdir(f"/proc/{pid}/task"):
+        try:
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                out += [int(p) for p in f.read().split()]
+        except OSError:
+            pass
+    return out
+
+
+def memory_mb(pid):
+    mem = {"rss_mb": None, "pss_mb": None}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, val = line.split(":", 1)
+                if key in ("Rss", "Pss"):
+                    mem[key.lower() + "_mb"] = round(int(val.split()[0]) / 1024, 1)
+    except OSError:
+        pass
+    return mem
+
+
+def poll(port):
+    # (ready, body) from /health/ready, or None while nothing answers
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/health/ready", timeout=2) as r:
+            return True, json.load(r)
+    except urllib.error.HTTPError as e:
+        return False, json.load(e)
+    except Exception:
+        return None
+
+
+def run(workers, preload, snapshot="warm", snapshot_dir=None, timeout=300):
+    port = free_port()
+    env = dict(os.environ, GUNICORN_WORKERS=str(workers), GUNICORN_PRELOAD="1" if preload else "0",
+               GUNICORN_BIND=f"127.0.0.1:{port}", STARTUP_SNAPSHOT="0" if snapshot == "off" else "1")
+    if snapshot_dir:
+        if snapshot == "cold":
+            shutil.rmtree(snapshot_dir, ignore_errors=True)
+        env["STARTUP_SNAPSHOT_DIR"] = snapshot_dir
+    t0 = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py"], cwd=ROOT, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    live, ready, startup = {}, {}, None
+    try:
+        while len(ready) < workers and time.perf_counter() - t0 < timeout:
+            res = poll(port)
+            if res is None:
+                time.sleep(0.05)
+                continue
+            ok, body = res
+            now = time.perf_counter() - t0
+            live.setdefault(body.get("pid"), now)
+            if ok:
+                ready.setdefault(body.get("pid"), now)
+                startup = body.get("startup")
+            else:
+                time.sleep(0.05)
+        all_ready = max(ready.values()) if len(ready) >= workers else None
+        pids = children(proc.pid)
+        per_worker = [memory_mb(p) for p in pids]
+        return {
+            "workers": workers,
+            "preload": preload,
+            "snapshot": snapshot,
+            "first_live_s": round(min(live.values()), 3) if live else None,
+            "first_ready_s": round(min(ready.values()), 3) if ready else None,
+            "all_workers_ready_s": round(all_ready, 3) if all_ready else None,
+            "model_load_s": startup and startup["seconds"],
+            "master": memory_mb(proc.pid),
+            "per_worker": per_worker,
+            "total_pss_mb": round(sum(m["pss_mb"] or 0 for m in per_worker + [memory_mb(proc.pid)]), 1),
+        }
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(30)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    ap.add_argument("--modes", nargs="+", choices=["preload", "no-preload"], default=["preload", "no-preload"])
+    ap.add_argument("--snapshots", nargs="+", choices=["off", "cold", "warm"], default=["warm"],
+                    help="startup snapshot state per run (warm: whatever the default directory holds)")
+    args = ap.parse_args()
+    snapshot_dir = tempfile.mkdtemp(prefix="startup-snapshots-") if args.snapshots != ["warm"] else None
+    try:
+        results = [run(w, mode == "preload", snap, snapshot_dir)
+                   for mode in args.modes for w in args.workers for snap in args.snapshots]
+    finally:
+        if snapshot_dir:
+            shutil.rmtree(snapshot_dir, ignore_errors=True)
+    json.dump(results, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""Reproducible benchmark suite: prediction, encoding and dashboard queries.
+
+    python benchmarks/suite.py --out bench.json               # full run (10k / 100k / 1M records)
+    python benchmarks/suite.py --quick --out bench.json       # 10k records, fewer repeats
+    python benchmarks/suite.py --compare base.json bench.json # p50 ratios; exit 1 on regressions
+
+Runs offline: a small RF/LR/XGBoost/meta stack is trained on synthetic
+applicants (benchmarks/synthetic.py) with the real column layout, and every
+database is a fresh SQLite file in a temp dir. Seeds are fixed, so two runs
+on one machine differ only by noise. The JSON also records the commit,
+library versions and machine, so runs of different commits can be compared.
+
+Sections:
+  predict    /api/predict and /api/predict/batch latency per INFERENCE_MODE
+  encode     encode_row_to_training (get_dummies) vs. the compiled encoder by column count
+  dashboard  /api/admin/metrics and /api/admin/table latency by records-table size
+
+The prediction and admin caches are disabled, so every request does the work.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from synthetic import ROOT, applicants, payloads, seed_records, train_stack, training_columns
+
+sys.path.insert(0, ROOT)
+
+CITIES = 200  # vocabulary of the synthetic stack used for predict and dashboard
+
+
+def stats(samples):
+    s = sorted(samples)
+    pct = lambda q: round(s[min(len(s) - 1, int(q * len(s)))], 3)
+    return {"n": len(s), "p50": pct(0.50), "p95": pct(0.95), "p99": pct(0.99),
+            "mean": round(statistics.mean(s), 3), "min": round(s[0], 3)}
+
+
+def timed(fn, repeat):
+    out = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        out.append((time.perf_counter() - t) * 1000)
+    return out
+
+
+def check(resp):
+    if resp.status_code != 200:
+        raise RuntimeError(f"{resp.request.path} -> {resp.status_code}: {resp.get_data(as_text=True)[:200]}")
+    return resp
+
+
+def make_app(A, db_path, **env):
+    os.environ.update(DATABASE_URL=f"sqlite:///{db_path}", STARTUP_SNAPSHOT="0", **env)
+    app = A.create_app()
+    if not A.wait_for_models():
+        raise RuntimeError("synthetic models did not load")
+    client = app.test_client()
+    with client.session_transaction() as s:
+        s["is_admin"] = True
+    return app, client
+
+
+def bench_predict(A, tmp, modes, singles, batches, repeat, seed):
+    bodies = payloads(max([singles] + batches) * 2, seed + 1, CITIES)
+    out = {}
+    for mode in modes:
+        app, c = make_app(A, os.path.join(tmp, f"predict-{mode}.db"), INFERENCE_MODE=mode)
+        for b in bodies[:10]:
+            check(c.post("/api/predict", json=b))  # warm-up
+        it = iter(bodies * (singles // len(bodies) + 1))
+        res = {"inference": "compiled" if A.MODELS["compiled"] is not None else "library",
+               "single_ms": stats(timed(lambda: check(c.post("/api/predict", json=next(it))), singles))}
+        for size in batches:
+            chunk = bodies[:size]
+            res[f"batch_{size}_ms"] = stats(timed(lambda: check(c.post("/api/predict/batch", json=chunk)), repeat))
+            res[f"batch_{size}_ms"]["per_row_p50"] = round(res[f"batch_{size}_ms"]["p50"] / size, 4)
+        out[mode] = res
+        print(f"[predict] {mode}: single p50 {res['single_ms']['p50']} ms", file=sys.stderr)
+    return out
+
+
+def bench_encode(A, city_counts, row_counts, repeat, seed):
+    out = []
+    for cities in city_counts:
+        cols = training_columns(cities, seed)
+        models = {"training_columns": cols, "encoder": A.compile_encoder(cols)}
+        sample, _ = applicants(max(row_counts), seed + 2, cities)
+        for n in row_counts:
+            rows = sample[:n]
+            ref = timed(lambda: A.encode_row_to_training(pd.DataFrame(rows), models), repeat)
+            comp = timed(lambda: A.encode_matrix(rows, models), repeat)
+            out.append({"columns": len(cols), "rows": n, "get_dummies_ms": stats(ref), "compiled_ms": stats(comp)})
+        print(f"[encode] {len(cols)} columns done", file=sys.stderr)
+    return out
+
+
+def bench_dashboard(A, tmp, sizes, repeat, seed):
+    out = []
+    for size in sizes:
+        app, c = make_app(A, os.path.join(tmp, f"dashboard-{size}.db"))
+        t = time.perf_counter()
+        with app.app_context():
+            rollup_rows = seed_records(A, size, seed)
+        entry = {"records": size, "rollup_rows": rollup_rows, "seed_s": round(time.perf_counter() - t, 1)}
+        deep = check(c.get("/api/admin/table?days=365&sort=priority&page=200")).get_json()["next"]
+        queries = {
+            "metrics_30d": "/api/admin/metrics?days=30",
+            "metrics_365d": "/api/admin/metrics?days=365",
+            "metrics_365d_program": "/api/admin/metrics?days=365&program=bsit",
+            "metrics_365d_raw": "/api/admin/metrics?days=365",
+            "table_priority_page1": "/api/admin/table?days=365&sort=priority&page=1",
+            "table_priority_page201": "/api/admin/table?days=365&sort=priority&page=201",
+            "table_priority_keyset201": f"/api/admin/table?days=365&sort=priority&after={deep}",
+            "table_recent_program": "/api/admin/table?days=30&program=bsit&sort=created_at",
+        }
+        for name, url in queries.items():
+            # raw = aggregate the records table instead of the daily rollup
+            os.environ["METRICS_ROLLUP"] = "0" if name.endswith("_raw") else "1"
+            check(c.get(url))
+            entry[name + "_ms"] = stats(timed(lambda: check(c.get(url)), repeat))
+        os.environ["METRICS_ROLLUP"] = "1"
+        with app.app_context():
+            A.db.engine.dispose()
+        out.append(entry)
+        print(f"[dashboard] {size} records: metrics_365d p50 {entry['metrics_365d_ms']['p50']} ms", file=sys.stderr)
+    return out
+
+
+def environment():
+    import numpy, sklearn, xgboost
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {"commit": commit, "at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+            "numpy": numpy.__version__, "pandas": pd.__version__, "sklearn": sklearn.__version__,
+            "xgboost": xgboost.__version__}
+
+
+def flatten(node, prefix=""):
+    # "section.key..." -> p50 for every timing in a results file
+    out = {}
+    if isinstance(node, dict):
+        if "p50" in node:
+            return {prefix: node["p50"]}
+        for k, v in node.items():
+            if k != "meta":
+                out.update(flatten(v, f"{prefix}.{k}" if prefix else k))
+    elif isinstance(node, list):
+        for item in node:
+            tag = ",".join(f"{k}={item[k]}" for k in ("records", "columns", "rows") if k in item)
+            out.update(flatten({k: v for k, v in item.items()}, f"{prefix}[{tag}]"))
+    return out
+
+
+def compare(base_path, new_path, threshold):
+    with open(base_path) as f: base = flatten(json.load(f))
+    with open(new_path) as f: new = flatten(json.load(f))
+    regressions = 0
+    for key in sorted(set(base) & set(new)):
+        ratio = new[key] / base[key] if base[key] else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            flag, regressions = "  SLOWER", regressions + 1
+        elif ratio < 1 - threshold:
+            flag = "  faster"
+        print(f"{key:80s} {base[key]:10.3f} {new[key]:10.3f}  x{ratio:5.2f}{flag}")
+    print(f"{regressions} of {len(set(base) & set(new))} timings more than {threshold:.0%} slower")
+    return 1 if regressions else 0
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--out", help="write results here (default: stdout)")
+    ap.add_argument("--sections", nargs="+", choices=["predict", "encode", "dashboard"],
+                    default=["predict", "encode", "dashboard"])
+    ap.add_argument("--records", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    ap.add_argument("--modes", nargs="+", choices=["library", "compiled"], default=["library", "compiled"])
+    ap.add_argument("--singles", type=int, default=300, help="single /api/predict requests per mode")
+    ap.add_argument("--batches", type=int, nargs="+", default=[32, 512])
+    ap.add_argument("--cities", type=int, nargs="+", default=[25, 200, 1500],
+                    help="city vocabularies for the encode sweep (sets the column count)")
+    ap.add_argument("--encode-rows", type=int, nargs="+", default=[1, 512])
+    ap.add_argument("--repeat", type=int, default=30)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--quick", action="store_true", help="10k records, 100 singles, 10 repeats")
+    ap.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="compare two result files and exit")
+    ap.add_argument("--threshold", type=float, default=0.10, help="ratio counted as a regression by --compare")
+    args = ap.parse_args()
+
+    if args.compare:
+        sys.exit(compare(*args.compare, args.threshold))
+    if args.quick:
+        args.records, args.singles, args.repeat = [10_000], 100, 10
+
+    tmp = tempfile.mkdtemp(prefix="bench-")
+    os.environ.update(MODELS_DIR=os.path.join(tmp, "models"), MODEL_WATCH_INTERVAL="0", WRITE_BEHIND="0",
+                      PREDICT_CACHE_SIZE="0", ADMIN_CACHE_TTL="0", SERVER_TIMING="0", METRICS_ROLLUP="1")
+    os.environ.pop("METRICS_DIR", None)
+    try:
+        columns = train_stack(os.environ["MODELS_DIR"], seed=args.seed, cities=CITIES)
+        import app as A
+
+        results = {"meta": {**environment(), "args": vars(args), "model_columns": columns}}
+        if "predict" in args.sections:
+            results["predict"] = bench_predict(A, tmp, args.modes, args.singles, args.batches, args.repeat, args.seed)
+        if "encode" in args.sections:
+            results["encode"] = bench_encode(A, args.cities, args.encode_rows, args.repeat, args.seed)
+        if "dashboard" in args.sections:
+            results["dashboard"] = bench_dashboard(A, tmp, args.records, args.repeat, args.seed)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
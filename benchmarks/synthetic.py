@@ -0,0 +1,132 @@
+"""Synthetic data for the benchmarks: a small trained stack and fake records.
+
+train_stack() fits RF, LR, XGBoost and the meta model on generated
+applicants and writes them in the same layout as app/AIMODEL
+(meta_model.pkl, rf.pkl, lr.pkl, xg.pkl, training_columns.pkl,
+X_train_encoded.pkl), so the app and the benchmarks run offline without the
+Drive artifacts. Tokens come from app/static/psgc, so the one-hot columns
+look like the real ones ("Current City_lipa city", ...).
+"""
+import json
+import os
+import random
+from datetime import datetime, timedelta
+
+import joblib
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PSGC_DIR = os.path.join(ROOT, "app", "static", "psgc")
+PROGRAMS = ["bsit", "bscs", "bsba", "bsis", "bsn", "bs accountancy"]
+REGIONS = ["calabarzon", "national capital region", "central luzon", "mimaropa region", "bicol region"]
+
+
+def psgc(level):
+    with open(os.path.join(PSGC_DIR, f"{level}.json"), encoding="utf-8") as f:
+        return json.load(f)["items"]
+
+
+def applicants(n, seed=0, cities=None):
+    """n model input rows (the dicts build_feature_row returns) plus a label each.
+
+    cities: how many distinct cities to draw from; the one-hot width grows with it.
+    """
+    rng = random.Random(seed)
+    regions = {r["code"]: r["token"] for r in psgc("regions")}
+    provinces = {p["code"]: p for p in psgc("provinces")}
+    pool = [c for c in psgc("cities") if c["province_code"] in provinces]
+    rng.shuffle(pool)
+    pool = pool[:cities] if cities else pool
+    rows, y = [], []
+    for _ in range(n):
+        city = rng.choice(pool)
+        prov = provinces[city["province_code"]]
+        region = regions.get(prov["region_code"], "calabarzon")
+        same = rng.random() < 0.8
+        row = {
+            "Program (First Choice)": rng.choice(PROGRAMS),
+            "Program (Second Choice)": rng.choice(PROGRAMS + [""]),
+            "Current Region": region,
+            "Current Province": prov["token"],
+            "Current City": city["token"],
+            "Permanent Country": "philippines" if rng.random() < 0.95 else "japan",
+            "Permanent Region": region if same else "calabarzon",
+            "Permanent Province": prov["token"] if same else "batangas",
+            "Permanent City": city["token"] if same else "lipa city",
+            "Student Type": rng.choice(["full time", "part time"]),
+            "School Type": rng.choice(["public", "private"]),
+        }
+        row["LocalOrForeign"] = "local" if row["Permanent Country"] == "philippines" else "foreign"
+        row["SameRegion"] = int(row["Current Region"] == row["Permanent Region"])
+        row["SameProvince"] = int(row["Current Province"] == row["Permanent Province"])
+        row["SameCity"] = int(row["Current City"] == row["Permanent City"])
+        row["Age"] = rng.randint(16, 30)
+        rows.append(row)
+        y.append(int((row["SameRegion"] and rng.random() < 0.7) or rng.random() < 0.3))
+    return rows, np.array(y)
+
+
+def training_columns(cities, seed=0, n=None):
+    # the one-hot layout a stack trained on applicants(cities=...) would have
+    rows, _ = applicants(n or max(600, cities * 4), seed, cities)
+    return pd.get_dummies(pd.DataFrame(rows)).columns
+
+
+def train_stack(out_dir, n=600, seed=0, cities=None, trees=30):
+    """Fit and save a small stack in the app's artifact layout; returns the number of columns."""
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression
+    from xgboost import XGBClassifier
+
+    rows, y = applicants(n, seed, cities)
+    X = pd.get_dummies(pd.DataFrame(rows)).astype(float)
+    rf = RandomForestClassifier(n_estimators=trees, max_depth=8, random_state=seed).fit(X, y)
+    lr = LogisticRegression(max_iter=500).fit(X, y)
+    xg = XGBClassifier(n_estimators=trees, max_depth=4, eval_metric="logloss", random_state=seed).fit(X.to_numpy(), y)
+    stacked = np.column_stack([rf.predict_proba(X)[:, 1], lr.predict_proba(X)[:, 1], xg.predict_proba(X.to_numpy())[:, 1]])
+    meta = LogisticRegression().fit(stacked, y)
+    os.makedirs(out_dir, exist_ok=True)
+    for name, obj in (("meta_model.pkl", meta), ("rf.pkl", rf), ("lr.pkl", lr), ("xg.pkl", xg),
+                      ("training_columns.pkl", X.columns), ("X_train_encoded.pkl", X)):
+        joblib.dump(obj, os.path.join(out_dir, name))
+    return X.shape[1]
+
+
+def payloads(n, seed=0, cities=None):
+    # /api/predict bodies (input keys, not model columns) for the same population
+    rows, _ = applicants(n, seed, cities)
+    rng = random.Random(seed)
+    return [{
+        "first program": r["Program (First Choice)"], "second program": r["Program (Second Choice)"],
+        "current region": r["Current Region"], "current province": r["Current Province"],
+        "current city/municipality": r["Current City"], "permanent country": r["Permanent Country"],
+        "permanent region": r["Permanent Region"], "permanent province": r["Permanent Province"],
+        "permanent city/municipality": r["Permanent City"], "student type": r["Student Type"],
+        "school type": r["School Type"],
+        "dateofbirth": f"{rng.randint(1995, 2009)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+    } for r in rows]
+
+
+def fake_record(rng, when=None):
+    prob, conf = rng.random(), 0.5 + rng.random() / 2
+    return {"first_program": rng.choice(PROGRAMS), "second_program": rng.choice(PROGRAMS),
+            "curr_region": rng.choice(REGIONS), "curr_province": "batangas", "curr_city": "lipa city",
+            "per_country": "philippines", "per_region": rng.choice(REGIONS), "per_province": "batangas",
+            "per_city": "lipa city", "student_type": rng.choice(["full time", "part time"]),
+            "school_type": rng.choice(["public", "private"]), "date_of_birth": "2005-01-01", "age_years": 20,
+            "local_or_foreign": "local", "same_region": 1, "same_province": 1, "same_city": 1,
+            "prob_enroll_pct": prob, "confidence": conf, "priority": prob * conf, "oov_mask": 0,
+            "created_at": when or datetime.utcnow()}
+
+
+def seed_records(A, n, seed=0, days=365, chunk=20000):
+    """Insert n fake records spread over the last `days` days, then rebuild the rollup."""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    for i in range(0, n, chunk):
+        batch = [fake_record(rng, now - timedelta(seconds=rng.randint(0, days * 86400)))
+                 for _ in range(min(chunk, n - i))]
+        A.db.session.execute(A.db.insert(A.Record), batch)
+        A.db.session.commit()
+    return A.rebuild_rollup()
@@ -0,0 +1,131 @@
+"""Load test for /api/predict with inline commits vs. the write-behind queue.
+
+    python benchmarks/write_load.py                          # 4 workers, 16 clients, 20 s per mode
+    python benchmarks/write_load.py --clients 32 --duration 30 --modes write-behind
+
+Each mode starts gunicorn (gunicorn.conf.py) on a fresh SQLite database,
+drives /api/predict from N client threads with varied applicants, then
+stops the server and counts the rows that reached the database. Reports
+throughput and latency percentiles as JSON.
+"""
+import argparse
+import json
+import os
+import random
+import signal
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+from startup import ROOT, free_port
+
+
+def post(url, payload):
+    req = urllib.request.Request(url, data=json.dumps(payload).encode(), headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=30) as r:
+        return r.status
+
+
+def wait_ready(base, timeout=300):
+    t0 = time.time()
+    while time.time() - t0 < timeout:
+        try:
+            with urllib.request.urlopen(base + "/health/ready", timeout=2):
+                return
+        except Exception:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError("server did not become ready")
+
+
+def payloads(base, n, seed):
+    with urllib.request.urlopen(base + "/api/options") as r:
+        tokens = json.load(r)["tokens"]
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        p = {k: (rng.choice(v) if v else "") for k, v in tokens.items()}
+        p["dateofbirth"] = f"{rng.randint(1990, 2008)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        out.append(p)
+    return out
+
+
+def run(mode, workers, clients, duration, seed):
+    tmp = tempfile.mkdtemp(prefix="write-load-")
+    db_path = os.path.join(tmp, "load.db")
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    env = dict(os.environ, GUNICORN_WORKERS=str(workers), GUNICORN_BIND=f"127.0.0.1:{port}",
+               DATABASE_URL=f"sqlite:///{db_path}", WRITE_SPOOL_DIR=os.path.join(tmp, "spool"),
+               WRITE_BEHIND="1" if mode == "write-behind" else "0", MODEL_WATCH_INTERVAL="0")
+    proc = subprocess.Popen([sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py"], cwd=ROOT, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_ready(base)
+        bodies = payloads(base, 500, seed)
+        latencies, errors, lock = [], [0], threading.Lock()
+        stop = time.perf_counter() + duration
+
+        def client(i):
+            rng = random.Random(seed + i)
+            mine = []
+            while time.perf_counter() < stop:
+                t = time.perf_counter()
+                try:
+                    ok = post(base + "/api/predict", rng.choice(bodies)) == 200
+                except Exception:
+                    ok = False
+                mine.append((time.perf_counter() - t) * 1000)
+                if not ok:
+                    with lock:
+                        errors[0] += 1
+            with lock:
+                latencies.extend(mine)
+
+        t0 = time.perf_counter()
+        threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        elapsed = time.perf_counter() - t0
+    finally:
+        # SIGTERM lets the workers drain their queues before exiting
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(60)
+
+    with sqlite3.connect(db_path) as conn:
+        stored = conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+    lat = sorted(latencies)
+    pct = lambda q: round(lat[min(len(lat) - 1, int(q * len(lat)))], 2)
+    return {
+        "mode": mode,
+        "workers": workers,
+        "clients": clients,
+        "requests": len(lat),
+        "errors": errors[0],
+        "stored_records": stored,
+        "throughput_rps": round(len(lat) / elapsed, 1),
+        "latency_ms": {"mean": round(statistics.mean(lat), 2), "p50": pct(0.50), "p95": pct(0.95), "p99": pct(0.99),
+                       "max": round(lat[-1], 2)},
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--clients", type=int, default=16)
+    ap.add_argument("--duration", type=float, default=20)
+    ap.add_argument("--modes", nargs="+", choices=["inline", "write-behind"], default=["inline", "write-behind"])
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+    results = [run(m, args.workers, args.clients, args.duration, args.seed) for m in args.modes]
+    json.dump(results, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# Production entry point:  gunicorn -c gunicorn.conf.py
+#
+# The app (and with it the whole model ensemble) is imported once in the master and then forked,
+# so workers start instantly and share the model pages copy-on-write instead of each unpickling
+# their own copy.
+import gc
+import multiprocessing
+import os
+
+wsgi_app = "wsgi:app"
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("GUNICORN_WORKERS", min(multiprocessing.cpu_count(), 4)))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+# threads per worker (gthread); an open /api/admin/stream holds one, so a sync worker would be pinned by it
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+
+# memory-map artifact arrays as well, so the page cache backs them even across restarts
+os.environ.setdefault("MODEL_MMAP", "1")
+# preloaded: load the models in the master before forking so workers inherit them ready; otherwise each
+# worker answers /health/live at once and loads in the background until /health/ready turns 200
+os.environ.setdefault("MODEL_LOAD_BACKGROUND", "0" if preload_app else "1")
+
+
+def on_starting(server):
+    # per-worker metric files from a previous run would otherwise be summed into this one's /metrics
+    d = os.getenv("METRICS_DIR")
+    if d and os.path.isdir(d):
+        for name in os.listdir(d):
+            if name.startswith("metrics-"):
+                os.remove(os.path.join(d, name))
+
+
+def when_ready(server):
+    # runs in the master after the preloaded app is built and before any worker is forked:
+    # move everything allocated so far into the permanent generation, so the cyclic GC in the
+    # workers never writes to (and thereby un-shares) the pages holding the models
+    if preload_app:
+        gc.collect()
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    # connections opened by the master during create_app() must not be shared between processes
+    if preload_app:
+        from app import db
+        with server.app.wsgi().app_context():
+            db.engine.dispose(close=False)
@@ -0,0 +1,52 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+
+@pytest.fixture
+def A(tmp_path, monkeypatch):
+    # the app module on a fresh SQLite file; no models unless a test points MODELS_DIR somewhere
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setenv("MODELS_DIR", str(tmp_path / "models"))
+    monkeypatch.setenv("MODEL_WATCH_INTERVAL", "0")
+    monkeypatch.setenv("MODEL_LOAD_BACKGROUND", "0")
+    monkeypatch.setenv("STARTUP_SNAPSHOT", "0")
+    monkeypatch.setenv("ADMIN_PASSWORD", "test")
+    import app
+    return app
+
+
+@pytest.fixture
+def admin(A):
+    app = A.create_app()
+    client = app.test_client()
+    with client.session_transaction() as s:
+        s["is_admin"] = True
+    with app.app_context():
+        yield app, client
+
+
+@pytest.fixture(scope="session")
+def stack_root(tmp_path_factory):
+    # two small synthetic stacks in the versioned layout: v1 and v2 differ in their city vocabulary
+    from synthetic import train_stack
+    root = tmp_path_factory.mktemp("models")
+    train_stack(str(root / "v1"), n=300, seed=0, cities=6, trees=10)
+    train_stack(str(root / "v2"), n=300, seed=1, cities=9, trees=10)
+    (root / "CURRENT").write_text("v1\n")
+    return root
+
+
+@pytest.fixture
+def served(A, stack_root, monkeypatch):
+    # the app serving v1 of stack_root (CURRENT is restored afterwards)
+    monkeypatch.setenv("MODELS_DIR", str(stack_root))
+    app = A.create_app()
+    assert A.wait_for_models(60)
+    yield app
+    (stack_root / "CURRENT").write_text("v1\n")
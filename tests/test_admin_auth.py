@@ -0,0 +1,23 @@
+import pytest
+
+
+@pytest.fixture
+def client(A):
+    return A.create_app().test_client()
+
+
+def test_export_requires_admin(A, client, monkeypatch):
+    assert client.get("/api/admin/export.csv").status_code == 403
+    monkeypatch.setenv("ADMIN_API_TOKEN", "secret")
+    assert client.get("/api/admin/export.csv", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    assert client.get("/api/admin/export.csv", headers={"X-Admin-Token": "secret"}).status_code == 200
+    with client.session_transaction() as s:
+        s["is_admin"] = True
+    assert client.get("/api/admin/export.csv").status_code == 200
+
+
+def test_record_requires_admin(A, client):
+    assert client.get("/api/admin/record/1").status_code == 403
+    with client.session_transaction() as s:
+        s["is_admin"] = True
+    assert client.get("/api/admin/record/1").status_code == 404
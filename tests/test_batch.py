@@ -0,0 +1,69 @@
+import io
+
+import pandas as pd
+
+from synthetic import payloads
+
+
+def batch_input():
+    # four good applicants plus a missing field (index 1) and a bad date (index 3)
+    rows = payloads(6, seed=3, cities=6)
+    rows[1]["current region"] = ""
+    rows[3]["dateofbirth"] = "someday"
+    return rows
+
+
+def check(A, client, body, rows):
+    assert body["ok"] and body["n"] == 6 and body["scored"] == 4 and body["failed"] == 2
+    assert body["model_version"] == "v1"
+    assert [(e["index"], e["error"]) for e in body["errors"]] == [(1, "missing_fields"), (3, "invalid_date")]
+    assert body["errors"][0]["fields"] == ["current region"]
+    assert [r["index"] for r in body["results"]] == [0, 2, 4, 5]
+    for r in body["results"]:
+        one = client.post("/api/predict", json=rows[r["index"]]).get_json()
+        assert abs(r["prob_enroll_pct"] - one["prob_enroll_pct"]) < 1e-9
+        assert abs(r["confidence"] - one["confidence"]) < 1e-9
+
+
+def upload(client, data, name):
+    return client.post("/api/predict/batch", data={"file": (io.BytesIO(data), name)}, content_type="multipart/form-data")
+
+
+def test_batch_json(A, served):
+    client, rows = served.test_client(), batch_input()
+    resp = client.post("/api/predict/batch", json=rows)
+    assert resp.status_code == 200
+    check(A, client, resp.get_json(), rows)
+    assert client.post("/api/predict/batch", json={"rows": rows}).get_json()["scored"] == 4
+    with served.app_context():
+        assert A.Record.query.count() == 4 + 4 + 4  # both batches and the single calls made by check()
+
+
+def test_batch_csv(A, served):
+    client, rows = served.test_client(), batch_input()
+    csv = pd.DataFrame(rows).rename(columns=str.upper).to_csv(index=False).encode()  # headers are case-insensitive
+    resp = upload(client, csv, "applicants.csv")
+    assert resp.status_code == 200
+    check(A, client, resp.get_json(), rows)
+
+
+def test_batch_xlsx_with_date_cells(A, served):
+    client, rows = served.test_client(), batch_input()
+    frame = pd.DataFrame(rows)
+    frame["dateofbirth"] = [pd.Timestamp(d) if d != "someday" else d for d in frame["dateofbirth"]]
+    buf = io.BytesIO()
+    frame.to_excel(buf, index=False)
+    resp = upload(client, buf.getvalue(), "applicants.xlsx")
+    assert resp.status_code == 200
+    check(A, client, resp.get_json(), rows)
+
+
+def test_batch_rejects_bad_input(A, served, monkeypatch):
+    client = served.test_client()
+    resp = upload(client, b"hello", "applicants.txt")
+    assert resp.status_code == 400 and resp.get_json()["error"] == "unsupported_file"
+    resp = client.post("/api/predict/batch", json={"applicant": {}})
+    assert resp.status_code == 400 and resp.get_json()["error"] == "bad_payload"
+    monkeypatch.setenv("PREDICT_BATCH_MAX", "5")
+    resp = client.post("/api/predict/batch", json=batch_input())
+    assert resp.status_code == 413 and resp.get_json()["rows"] == 6
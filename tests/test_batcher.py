@@ -0,0 +1,35 @@
+import os
+import queue
+import threading
+import time
+
+from app.batcher import MicroBatcher
+
+
+class SlowQueue(queue.Queue):
+    # widens the window between noticing the fork and having the new queue in place
+    def __init__(self, *args):
+        time.sleep(0.1)
+        super().__init__(*args)
+
+
+def test_submits_racing_a_restart_all_reach_the_new_thread(monkeypatch):
+    b = MicroBatcher(lambda rows, oov: (list(rows), list(rows), "v1"), timeout=3)
+    b._pid = os.getpid() + 1  # as inherited from the parent: its queue has no consumer in this process
+    monkeypatch.setattr("app.batcher.queue.Queue", SlowQueue)
+    results, errors = {}, []
+
+    def call(i):
+        try:
+            results[i] = b.submit([i])[0]
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+        time.sleep(0.01)
+    for t in threads: t.join()
+    assert not errors
+    assert results == {i: [i] for i in range(8)}
+    assert b.stats["requests"] == 8
@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+
+from synthetic import applicants
+
+
+def test_compiled_kernels_match_predict_proba(A, served):
+    from app.compiled import compile_ensemble
+    models = A.MODELS
+    kernel = compile_ensemble(models)
+    rows, _ = applicants(300, seed=7, cities=12)
+    rows += [A.unseen_row(r) for r in rows[:20]]
+    X = A.encode_matrix(rows, models)
+    df = pd.DataFrame(X, columns=pd.Index(models["training_columns"]))
+    for name in ("rf", "lr"):
+        ref = models[name].predict_proba(df)[:, 1]
+        assert np.allclose(getattr(kernel, name).predict_pos(X), ref, rtol=0, atol=1e-9), name
+    assert np.allclose(kernel.xg.predict_pos(X), models["xg"].predict_proba(X)[:, 1], rtol=0, atol=1e-6)
+    p_ref, c_ref = A.predict_with_stack_batch(df, models)
+    p, c = kernel.predict(X)
+    assert np.allclose(p, p_ref, rtol=0, atol=1e-6) and np.allclose(c, c_ref, rtol=0, atol=1e-6)
+
+
+def test_served_compiled_mode_passes_its_startup_check(A, stack_root, monkeypatch):
+    monkeypatch.setenv("MODELS_DIR", str(stack_root))
+    monkeypatch.setenv("INFERENCE_MODE", "compiled")
+    A.create_app()
+    assert A.wait_for_models(60)
+    assert A.MODELS["compiled"] is not None and A.MODELS["checks"]["compiled"]
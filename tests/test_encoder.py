@@ -0,0 +1,20 @@
+from synthetic import applicants
+
+
+def test_compiled_encoder_matches_get_dummies(A, served):
+    models = A.MODELS
+    assert models["encoder"] is not None and models["checks"]["encoder"]
+    rows, _ = applicants(200, seed=5, cities=12)  # includes cities the stack never saw
+    rows += [A.unseen_row(r) for r in rows[:20]]
+    assert A.encoder_matches(models, rows)
+
+
+def test_encoder_mismatch_is_detected(A, served):
+    models = dict(A.MODELS)
+    enc = dict(models["encoder"])
+    onehot = dict(enc["onehot"])
+    key = next(k for k in onehot if k[0] == "Current City")
+    onehot[key] = (onehot[key] + 1) % enc["width"]
+    models["encoder"] = {**enc, "onehot": onehot}
+    rows, _ = applicants(200, seed=0, cities=6)
+    assert not A.encoder_matches(models, rows)
@@ -0,0 +1,67 @@
+import json
+import threading
+import time
+
+import pytest
+
+from test_rollup import record
+
+
+@pytest.fixture
+def feed(A, monkeypatch):
+    monkeypatch.setenv("SSE_POLL_INTERVAL", "0.3")
+    monkeypatch.setenv("SSE_HEARTBEAT", "0.2")
+    app = A.create_app()
+    with app.app_context():
+        yield A
+
+
+def listen(A, cursor=None, seconds=1.5):
+    # consume a stream in the background, as a connected dashboard would; join() the thread for the events
+    out = []
+    def run():
+        for frame in A.FEED.stream(cursor, lambda r: True, A.feed_delta, max_seconds=seconds):
+            if "event: records" in frame:
+                out.append(json.loads(frame.split("data: ", 1)[1]))
+    t = threading.Thread(target=run)
+    t.start()
+    time.sleep(0.1)  # connected
+    return t, out
+
+
+def other_worker_commit(A, *records):
+    # committed by another process: no poke() reaches this worker's feed
+    A.db.session.bulk_insert_mappings(A.Record, list(records))
+    A.db.session.commit()
+
+
+def prob_list(events):
+    return [r["prob"] for e in events for r in e["records"]]
+
+
+def test_new_stream_skips_records_saved_while_idle(feed):
+    A = feed
+    A.save_records([record(0.9, 0.9)])
+    t, out = listen(A, seconds=0.5)
+    t.join()
+    time.sleep(0.5)  # the poller goes idle
+    other_worker_commit(A, record(0.2, 0.5), record(0.3, 0.5))
+    t, out = listen(A)
+    A.save_records([record(0.85, 0.9)])
+    t.join()
+    assert prob_list(out) == [0.85]
+    delta = out[0]["delta"]
+    assert delta["n"] == 1 and delta["high"] == 1
+    assert delta["queues"] == {"call_now": 1, "warm": 0, "nurture": 0}
+
+
+def test_reconnect_resumes_after_last_event_id(feed):
+    A = feed
+    t, out = listen(A, seconds=0.8)
+    A.save_records([record(0.6, 0.5)])
+    t.join()
+    last = out[-1]["records"][-1]["id"]
+    other_worker_commit(A, record(0.1, 0.5), record(0.7, 0.9))  # saved while disconnected
+    t, out = listen(A, cursor=last, seconds=0.8)
+    t.join()
+    assert prob_list(out) == [0.1, 0.7]
@@ -0,0 +1,20 @@
+def touch_artifacts(A, d):
+    d.mkdir(parents=True, exist_ok=True)
+    for f in A.MODEL_FILES:
+        (d / f).write_bytes(b"")
+
+
+def test_flat_artifacts_win_without_current(A, tmp_path):
+    root = tmp_path / "models"
+    touch_artifacts(A, root)
+    touch_artifacts(A, root / "2025-11-15")
+    assert A.resolve_model_dir(str(root)) == (str(root), None)
+    A.activate_model_version(str(root), "2025-11-15")
+    assert A.resolve_model_dir(str(root)) == (str(root / "2025-11-15"), "2025-11-15")
+
+
+def test_latest_version_without_flat_artifacts(A, tmp_path):
+    root = tmp_path / "models"
+    touch_artifacts(A, root / "2025-10-01")
+    touch_artifacts(A, root / "2025-11-15")
+    assert A.resolve_model_dir(str(root))[1] == "2025-11-15"
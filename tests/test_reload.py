@@ -0,0 +1,19 @@
+def test_reload_warms_with_the_new_models_tokens(A, served, monkeypatch):
+    seen = []
+    real = A.parity_rows
+    monkeypatch.setattr(A, "parity_rows", lambda options, n=32: seen.append(options) or real(options, n))
+    A.activate_model_version(A.model_root(served), "v2")
+    assert A.reload_models(served) and A.RELOAD_STATE["state"] == "ok"
+    assert A.MODELS["version"] == "v2"
+    want = A.token_options(A.MODELS["tokens"])
+    assert seen and all(o == want for o in seen)
+    assert A.CACHED_TOKEN_OPTIONS == want
+
+
+def test_training_tokens_replace_the_previous_vocabulary(A, served):
+    tokens = dict(A.MODELS["tokens"])
+    assert tokens["current city/municipality"]
+    del tokens["current city/municipality"]
+    A.set_training_tokens({"tokens": tokens, "token_index": None})
+    assert A.CACHED_TOKEN_OPTIONS["current city/municipality"] == A.DEFAULT_TOKEN_OPTIONS["current city/municipality"]
+    assert "current city/municipality" not in A.TOKEN_INDEX
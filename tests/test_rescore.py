@@ -0,0 +1,51 @@
+import json
+
+import pytest
+from sqlalchemy import event
+
+from synthetic import payloads
+
+
+class Stop(Exception):
+    pass
+
+
+def interrupt_after(chunks):
+    # log() is called once up front and once per written chunk
+    calls = []
+    def log(msg):
+        calls.append(msg)
+        if len(calls) > chunks: raise Stop()
+    return log
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_interrupted_rescore_resumes_without_gaps_or_repeats(A, served, tmp_path, workers):
+    client = served.test_client()
+    assert client.post("/api/predict/batch", json=payloads(23, seed=4, cities=6)).get_json()["scored"] == 23
+    with served.app_context():
+        A.db.session.add(A.Record(first_program=None, model_version="old"))  # no usable feature row
+        A.db.session.execute(A.db.update(A.Record).values(model_version="old"))
+        A.db.session.commit()
+        ids = [r.id for r in A.Record.query.order_by(A.Record.id)]
+
+        updated = []
+        def count_updates(conn, cursor, statement, params, context, executemany):
+            if statement.startswith("UPDATE records"):
+                updated.extend(p[-1] for p in (params if executemany else [params]))
+        event.listen(A.db.engine, "before_cursor_execute", count_updates)
+        try:
+            checkpoint = str(tmp_path / "rescore-v1.json")
+            with pytest.raises(Stop):
+                A.rescore_records(checkpoint, chunk=4, workers=workers, log=interrupt_after(2))
+            saved = json.load(open(checkpoint))
+            assert not saved["finished"] and saved["last_id"] == ids[7]
+            assert sorted(updated) == ids[:8]
+
+            state = A.rescore_records(checkpoint, chunk=4, workers=workers, log=lambda msg: None)
+        finally:
+            event.remove(A.db.engine, "before_cursor_execute", count_updates)
+
+        assert state["finished"] and state["done"] == 23 and state["failed"] == 1
+        assert sorted(updated) == ids[:23]  # each scorable record written exactly once
+        assert {r.model_version for r in A.Record.query if r.first_program} == {"v1"}
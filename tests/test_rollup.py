@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+
+
+def record(prob, conf, program="bsit", region="calabarzon", days_ago=0):
+    return {"first_program": program, "curr_region": region, "student_type": "full time",
+            "local_or_foreign": "local", "prob_enroll_pct": prob, "confidence": conf,
+            "priority": prob * conf if prob is not None and conf is not None else None,
+            "created_at": datetime.utcnow() - timedelta(days=days_ago)}
+
+
+def rounded(x):
+    if isinstance(x, float): return round(x, 9)
+    if isinstance(x, dict): return {k: rounded(v) for k, v in x.items()}
+    if isinstance(x, list): return [rounded(v) for v in x]
+    return x
+
+
+def metrics(A, client, monkeypatch, rollup, **params):
+    monkeypatch.setenv("METRICS_ROLLUP", "1" if rollup else "0")
+    A.ADMIN_CACHE.invalidate()
+    resp = client.get("/api/admin/metrics", query_string=params)
+    assert resp.status_code == 200
+    body = resp.get_json()
+    body.pop("top"), body.pop("queues")  # read from the records on both paths
+    return rounded(body)
+
+
+def test_rollup_matches_raw_with_null_scores(A, admin, monkeypatch):
+    app, client = admin
+    A.save_records([record(0.9, 0.85), record(0.62, 0.4, program="bsba"), record(0.1, 0.95, days_ago=2),
+                    record(None, 0.7), record(0.55, None, region="ncr"), record(None, None, days_ago=1)])
+    for params in ({}, {"bucket": "L"}, {"bucket": "M"}, {"bucket": "H"}, {"min_conf": 0.5}, {"program": "bsit"}):
+        raw = metrics(A, client, monkeypatch, False, **params)
+        rolled = metrics(A, client, monkeypatch, True, **params)
+        assert rolled == raw, params
+
+
+def test_rollup_averages_skip_nulls(A, admin, monkeypatch):
+    app, client = admin
+    A.save_records([record(0.8, 0.6), record(None, None)])
+    s = metrics(A, client, monkeypatch, True)["summary"]
+    assert s["n"] == 2
+    assert abs(s["avg_prob"] - 0.8) < 1e-9 and abs(s["avg_conf"] - 0.6) < 1e-9
+
+
+def rollup_rows(A):
+    cols = [c for c in A.RecordDailyRollup.__table__.columns if c.name != "id"]
+    return sorted(tuple(round(v, 9) if isinstance(v, float) else v for v in row)
+                  for row in A.db.session.execute(A.db.select(*cols)).all())
+
+
+def test_rollup_row_per_day_and_dimensions(A, admin, monkeypatch):
+    app, client = admin
+    A.save_records([record(i / 40, 1 - i / 40) for i in range(40)] + [record(0.3, 0.3, days_ago=1)])
+    assert A.RecordDailyRollup.query.count() == 2
+    assert metrics(A, client, monkeypatch, True) == metrics(A, client, monkeypatch, False)
+
+
+def test_rebuild_matches_incremental(A, admin, monkeypatch):
+    app, client = admin
+    A.save_records([record(0.9, 0.85), record(0.62, 0.4, program="bsba"), record(0.1, 0.95, days_ago=2),
+                    record(None, 0.7), record(0.55, None, region="ncr"), record(None, None, days_ago=1)])
+    A.save_records([record(0.95, 0.99), record(0.05, 0.01)])
+    incremental = rollup_rows(A)
+    A.rebuild_rollup()
+    assert rollup_rows(A) == incremental
+
+
+def test_queues_are_each_queues_top_ten(A, admin, monkeypatch):
+    app, client = admin
+    recs = [record((i % 50) / 50, 0.5 + (i % 7) / 14) for i in range(150)]
+    A.save_records(recs)
+    A.ADMIN_CACHE.invalidate()
+    queues = client.get("/api/admin/metrics").get_json()["queues"]
+    expect = {"call_now": [], "warm": [], "nurture": []}
+    for r in recs:
+        p, c = r["prob_enroll_pct"], r["confidence"]
+        q = "call_now" if p >= 0.75 and c >= 0.8 else "warm" if 0.5 <= p < 0.75 else "nurture" if p < 0.5 else None
+        if q: expect[q].append((p * c if q == "call_now" else p))
+    for q, vals in expect.items():
+        got = [(r["prob"] * r["conf"] if q == "call_now" else r["prob"]) for r in queues[q]]
+        assert rounded(got) == rounded(sorted(vals, reverse=True)[:10]), q
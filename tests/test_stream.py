@@ -0,0 +1,10 @@
+def test_sse_cap_leaves_a_thread_free(A, monkeypatch):
+    monkeypatch.setenv("GUNICORN_THREADS", "4")
+    monkeypatch.delenv("SSE_MAX_CLIENTS", raising=False)
+    assert A.sse_max_clients() == 3
+    monkeypatch.setenv("SSE_MAX_CLIENTS", "10")
+    assert A.sse_max_clients() == 3
+    monkeypatch.setenv("SSE_MAX_CLIENTS", "2")
+    assert A.sse_max_clients() == 2
+    monkeypatch.setenv("GUNICORN_THREADS", "1")
+    assert A.sse_max_clients() == 0
@@ -0,0 +1,8 @@
+def test_suggest_rejects_non_integer_k(A):
+    client = A.create_app().test_client()
+    resp = client.get("/api/suggest", query_string={"field": "cities", "q": "lipa", "k": "abc"})
+    assert resp.status_code == 400
+    assert resp.get_json()["error"] == "bad_params"
+    resp = client.get("/api/suggest", query_string={"field": "cities", "q": "lipa", "k": "3"})
+    assert resp.status_code == 200
+    assert 0 < len(resp.get_json()["items"]) <= 3
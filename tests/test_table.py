@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+
+
+def seed(A):
+    now = datetime.utcnow()
+    recs = []
+    for i in range(14):
+        prob = None if i % 4 == 0 else (i % 5) / 5  # repeated values and a NULL tail
+        conf = None if i % 3 == 0 else 0.5 + (i % 2) / 4
+        recs.append({"first_program": "bsit", "prob_enroll_pct": prob, "confidence": conf,
+                     "priority": prob * conf if prob is not None and conf is not None else None,
+                     "created_at": now - timedelta(minutes=i)})
+    A.save_records(recs)
+    return [(i + 1, r) for i, r in enumerate(recs)]
+
+
+def expected(recs, field, direction):
+    desc = direction == "desc"
+    scored = sorted((r[field], i) for i, r in recs if r[field] is not None)
+    nulls = sorted(i for i, r in recs if r[field] is None)
+    if desc: scored, nulls = scored[::-1], nulls[::-1]
+    return [i for _, i in scored] + nulls
+
+
+def walk(client, **params):
+    ids, after = [], None
+    while True:
+        args = dict(params, page_size=3, **({"after": after} if after else {}))
+        resp = client.get("/api/admin/table", query_string=args)
+        assert resp.status_code == 200, resp.get_json()
+        body = resp.get_json()
+        ids += [r["id"] for r in body["rows"]]
+        after = body["next"]
+        if not after: return ids
+
+
+def test_keyset_pages_through_null_scores(A, admin):
+    app, client = admin
+    recs = seed(A)
+    for sort, field in (("priority", "priority"), ("prob", "prob_enroll_pct"), ("conf", "confidence")):
+        for direction in ("desc", "asc"):
+            want = expected(recs, field, direction)
+            assert walk(client, sort=sort, dir=direction) == want, (sort, direction)
+            pages = [client.get("/api/admin/table", query_string={"sort": sort, "dir": direction, "page": p, "page_size": 3})
+                     .get_json()["rows"] for p in range(1, 6)]
+            assert [r["id"] for page in pages for r in page] == want, (sort, direction)
+
+
+def test_cursor_for_another_sort_is_rejected(A, admin):
+    app, client = admin
+    seed(A)
+    after = client.get("/api/admin/table", query_string={"sort": "prob", "page_size": 3}).get_json()["next"]
+    resp = client.get("/api/admin/table", query_string={"sort": "conf", "after": after})
+    assert resp.status_code == 400 and resp.get_json()["error"] == "bad_cursor"